@@ -0,0 +1,35 @@
+from logging.config import fileConfig
+from alembic import context
+from app.database import Base, engine
+from app.models import user, product, cart, order, metrics, media  # Import all models
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Maintained by install_search_index rather than declared as tables, see app/services/search.py
+SEARCH_INDEX_OBJECTS = ("products_fts", "ix_products_search")
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate from proposing to drop the full-text index objects"""
+    return not (name or "").startswith(SEARCH_INDEX_OBJECTS)
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite can't ALTER most things in place; batch mode copies the table instead
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+    
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    # The Postgres search index can't be rendered as a plain SQL script
+    raise SystemExit("Offline (--sql) migrations aren't supported; run them against the database")
+run_migrations_online()
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""initial schema
+
+The schema as create_all() built it, plus the full-text search index. A
+database created before migrations is adopted with `python scripts/migrate.py`,
+which brings it up to this revision with scripts/update_database.py and stamps it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 04:20:29.658631
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.services.search import drop_search_index, install_search_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blobs',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('extension', sa.String(length=8), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('variants', sa.JSON(none_as_null=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('product_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_categories_id', 'categories', ['id'], unique=False)
+    op.create_index('ix_categories_name', 'categories', ['name'], unique=True)
+
+    op.create_table('metric_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=8), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('revenue', sa.Float(), server_default='0', nullable=False),
+    sa.Column('orders', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('units_sold', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('new_users', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('orders_pending', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('orders_processing', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('orders_shipped', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('orders_delivered', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('orders_cancelled', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('granularity', 'bucket', name='uq_metric_rollups_bucket')
+    )
+    op.create_index('ix_metric_rollups_id', 'metric_rollups', ['id'], unique=False)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_admin', sa.Boolean(), nullable=True),
+    sa.Column('token_version', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+
+    op.create_table('carts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index('ix_carts_id', 'carts', ['id'], unique=False)
+
+    op.create_table('orders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'SHIPPED', 'DELIVERED', 'CANCELLED', name='orderstatus'), nullable=True),
+    sa.Column('shipping_address', sa.String(), nullable=True),
+    sa.Column('payment_intent_id', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_orders_created', 'orders', ['created_at'], unique=False)
+    op.create_index('ix_orders_id', 'orders', ['id'], unique=False)
+    op.create_index('ix_orders_status_created', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_orders_user_created', 'orders', ['user_id', 'created_at'], unique=False)
+
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sku', sa.String(length=64), nullable=True),
+    sa.Column('name', sa.String(length=200), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('price', sa.Float(), nullable=True),
+    sa.Column('stock_quantity', sa.Integer(), nullable=True),
+    sa.Column('image', sa.String(length=500), nullable=True),
+    sa.Column('image_variants', sa.JSON(none_as_null=True), nullable=True),
+    sa.Column('image_blob', sa.String(length=64), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_featured', sa.Boolean(), nullable=True),
+    sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('review_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_products_active_created', 'products', ['is_active', 'created_at', 'id'], unique=False)
+    op.create_index('ix_products_active_name', 'products', ['is_active', 'name', 'id'], unique=False)
+    op.create_index('ix_products_active_price', 'products', ['is_active', 'price', 'id'], unique=False)
+    op.create_index('ix_products_category_created', 'products', ['category_id', 'is_active', 'created_at', 'id'], unique=False)
+    op.create_index('ix_products_category_price', 'products', ['category_id', 'is_active', 'price', 'id'], unique=False)
+    op.create_index('ix_products_featured', 'products', ['is_active', 'is_featured', 'created_at'], unique=False)
+    op.create_index('ix_products_id', 'products', ['id'], unique=False)
+    op.create_index('ix_products_image_blob', 'products', ['image_blob'], unique=False)
+    op.create_index('ix_products_name', 'products', ['name'], unique=False)
+    op.create_index('ix_products_sku', 'products', ['sku'], unique=True)
+    # Product.average_rating, written exactly as the model compiles it so sorts by rating use the index
+    products = sa.table('products', sa.column('is_active'), sa.column('rating_sum'), sa.column('review_count'), sa.column('id'))
+    average_rating = sa.case(
+        (products.c.review_count > sa.literal_column('0'), sa.cast(products.c.rating_sum, sa.Float) / products.c.review_count),
+        else_=sa.literal_column('0.0')
+    )
+    op.create_index('ix_products_active_rating', 'products', [products.c.is_active, average_rating, products.c.id], unique=False)
+
+    op.create_table('cart_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cart_id', sa.Integer(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=True),
+    sa.Column('added_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['cart_id'], ['carts.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_cart_items_cart_product', 'cart_items', ['cart_id', 'product_id'], unique=False)
+    op.create_index('ix_cart_items_id', 'cart_items', ['id'], unique=False)
+
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_order_items_id', 'order_items', ['id'], unique=False)
+    op.create_index('ix_order_items_order', 'order_items', ['order_id'], unique=False)
+
+    op.create_table('reviews',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=True),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_reviews_id', 'reviews', ['id'], unique=False)
+    op.create_index('ix_reviews_product_created', 'reviews', ['product_id', 'created_at'], unique=False)
+    op.create_index('ix_reviews_user_product', 'reviews', ['user_id', 'product_id'], unique=False)
+
+    install_search_index(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_search_index(op.get_bind())
+
+    op.drop_index('ix_reviews_user_product', table_name='reviews')
+    op.drop_index('ix_reviews_product_created', table_name='reviews')
+    op.drop_index('ix_reviews_id', table_name='reviews')
+    op.drop_table('reviews')
+
+    op.drop_index('ix_order_items_order', table_name='order_items')
+    op.drop_index('ix_order_items_id', table_name='order_items')
+    op.drop_table('order_items')
+
+    op.drop_index('ix_cart_items_id', table_name='cart_items')
+    op.drop_index('ix_cart_items_cart_product', table_name='cart_items')
+    op.drop_table('cart_items')
+
+    op.drop_index('ix_products_active_rating', table_name='products')
+    op.drop_index('ix_products_sku', table_name='products')
+    op.drop_index('ix_products_name', table_name='products')
+    op.drop_index('ix_products_image_blob', table_name='products')
+    op.drop_index('ix_products_id', table_name='products')
+    op.drop_index('ix_products_featured', table_name='products')
+    op.drop_index('ix_products_category_price', table_name='products')
+    op.drop_index('ix_products_category_created', table_name='products')
+    op.drop_index('ix_products_active_price', table_name='products')
+    op.drop_index('ix_products_active_name', table_name='products')
+    op.drop_index('ix_products_active_created', table_name='products')
+    op.drop_table('products')
+
+    op.drop_index('ix_orders_user_created', table_name='orders')
+    op.drop_index('ix_orders_status_created', table_name='orders')
+    op.drop_index('ix_orders_id', table_name='orders')
+    op.drop_index('ix_orders_created', table_name='orders')
+    op.drop_table('orders')
+    sa.Enum(name='orderstatus').drop(op.get_bind(), checkfirst=True)
+
+    op.drop_index('ix_carts_id', table_name='carts')
+    op.drop_table('carts')
+
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
+
+    op.drop_index('ix_metric_rollups_id', table_name='metric_rollups')
+    op.drop_table('metric_rollups')
+
+    op.drop_index('ix_categories_name', table_name='categories')
+    op.drop_index('ix_categories_id', table_name='categories')
+    op.drop_table('categories')
+
+    op.drop_table('blobs')
\ No newline at end of file
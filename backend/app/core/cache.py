@@ -0,0 +1,283 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, Optional
+from pydantic import TypeAdapter
+from app.core.config import settings
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+def serialize(schema, value) -> bytes:
+    """Validate ORM objects against a response schema and render the JSON body once"""
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag for a rendered body; cheap next to serializing it"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check, using the weak comparison GET requests call for"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+class ResponseCache:
+    """Serialized JSON responses keyed by endpoint parameters and tagged with what they depend on.
+    
+    Writers call `invalidate` with the tags they touched ("products", "featured",
+    "product:<id>", "category:<id>", "categories"); every entry carrying one of
+    those tags is dropped. `ttl` bounds staleness for anything not invalidated.
+    
+    A response is read from the database after a miss and stored afterwards, so
+    a write can commit and invalidate in between, leaving nothing to drop. Every
+    invalidation therefore marks its tags with the time, and `set` skips storing
+    a response if one of its tags was marked since the miss (`clock()` taken
+    before the read). A read replica may not have a write for a while after it
+    cleared the cache, so for replica reads marks count from `settle` seconds
+    before the miss.
+    """
+    def __init__(self, ttl: float, settle: float = 0):
+        self.ttl = ttl
+        self.settle = settle
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.skipped = 0
+        self.errors = 0
+    
+    @staticmethod
+    def key(namespace: str, **params) -> str:
+        """Key from an endpoint's validated parameters, so equivalent query strings share an entry"""
+        return namespace + "?" + "&".join(
+            f"{name}={params[name]}" for name in sorted(params) if params[name] is not None
+        )
+    
+    def _count(self, field: str, amount: int = 1):
+        with self._counter_lock:
+            setattr(self, field, getattr(self, field) + amount)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        body = await self._get(key)
+        self._count("hits" if body is not None else "misses")
+        return body
+    
+    async def clock(self) -> float:
+        """The time invalidations are marked in; take it on a miss, before reading what will be stored"""
+        return time.monotonic()
+    
+    async def set(self, key: str, body: bytes, tags: Iterable[str], since: float, replica: bool = False):
+        """Store a response read after `since` (from `clock()`); `replica` marks one read from the read replica"""
+        if replica:
+            since -= self.settle
+        if not await self._set(key, body, set(tags), since):
+            self._count("skipped")
+    
+    async def invalidate(self, *tags: str):
+        self._count("invalidations", await self._invalidate(set(tags)))
+    
+    @property
+    def mark_retention(self) -> float:
+        """How long invalidation marks are kept; a miss taking longer to render than its TTL may be stored stale"""
+        return self.ttl + self.settle
+    
+    def stats(self) -> dict:
+        with self._counter_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+                "invalidated_entries": self.invalidations,
+                "skipped_stale_stores": self.skipped,
+                "errors": self.errors,
+            }
+    
+    async def _get(self, key: str) -> Optional[bytes]:
+        return None
+    
+    async def _set(self, key: str, body: bytes, tags: set, since: float) -> bool:
+        """Store unless a tag was marked at or after `since`; False if skipped for that"""
+        return True
+    
+    async def _invalidate(self, tags: set) -> int:
+        return 0
+
+class MemoryResponseCache(ResponseCache):
+    """Per-process LRU; other worker processes only see invalidations once their entries expire"""
+    def __init__(self, ttl: float, max_entries: int, settle: float = 0):
+        super().__init__(ttl, settle)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tags: dict = {}
+        # tag -> when it was last invalidated, oldest first
+        self._marks: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _drop(self, key: str):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+    
+    async def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    async def _set(self, key: str, body: bytes, tags: set, since: float) -> bool:
+        with self._lock:
+            if any(self._marks.get(tag, float("-inf")) >= since for tag in tags):
+                return False
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, time.monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            return True
+    
+    async def _invalidate(self, tags: set) -> int:
+        now = time.monotonic()
+        with self._lock:
+            while self._marks and next(iter(self._marks.values())) < now - self.mark_retention:
+                self._marks.popitem(last=False)
+            for tag in tags:
+                self._marks[tag] = now
+                self._marks.move_to_end(tag)
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._marks.clear()
+
+class RedisResponseCache(ResponseCache):
+    """Shared across workers through Redis (or anything speaking its protocol).
+    
+    Each tag is a Redis set of the keys carrying it. Redis errors are counted and
+    treated as misses so an unavailable cache only costs the uncached path.
+    Invalidation marks use the Redis server's clock, shared by every worker.
+    """
+    def __init__(self, url: str, ttl: float, settle: float = 0, prefix: str = "shopswift:cache:"):
+        super().__init__(ttl, settle)
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the 'redis' package")
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._errors = (redis.RedisError, OSError)
+        self._watch_error = redis.WatchError
+    
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+    
+    def _mark_key(self, tag: str) -> str:
+        return f"{self.prefix}invalidated:{tag}"
+    
+    async def _now(self) -> float:
+        seconds, microseconds = await self._redis.time()
+        return seconds + microseconds / 1e6
+    
+    async def clock(self) -> float:
+        try:
+            return await self._now()
+        except self._errors:
+            # Unknown, so any invalidation still marked blocks the store
+            self._count("errors")
+            return float("-inf")
+    
+    async def _get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._redis.get(self.prefix + key)
+        except self._errors:
+            self._count("errors")
+            return None
+    
+    async def _set(self, key: str, body: bytes, tags: set, since: float) -> bool:
+        ttl = max(int(self.ttl), 1)
+        mark_keys = [self._mark_key(tag) for tag in tags]
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                # An invalidation landing between the check and the write aborts the write
+                if mark_keys:
+                    await pipe.watch(*mark_keys)
+                    marks = await pipe.mget(mark_keys)
+                    if any(mark is not None and float(mark) >= since for mark in marks):
+                        return False
+                pipe.multi()
+                pipe.set(self.prefix + key, body, ex=ttl)
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), self.prefix + key)
+                    pipe.expire(self._tag_key(tag), ttl)
+                await pipe.execute()
+        except self._watch_error:
+            return False
+        except self._errors:
+            self._count("errors")
+        return True
+    
+    async def _invalidate(self, tags: set) -> int:
+        if not tags:
+            return 0
+        try:
+            # Marked before anything is dropped, so a store racing this either sees a mark or is dropped
+            now = await self._now()
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.set(self._mark_key(tag), repr(now), px=max(int(self.mark_retention * 1000), 1))
+                await pipe.execute()
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            keys = await self._redis.sunion(*tag_keys)
+            if keys:
+                await self._redis.delete(*keys)
+            await self._redis.delete(*tag_keys)
+            return len(keys)
+        except self._errors:
+            self._count("errors")
+            return 0
+
+def create_response_cache() -> ResponseCache:
+    backend = settings.RESPONSE_CACHE_BACKEND
+    # READ_YOUR_WRITES_SECONDS is how far the replica is allowed to lag behind
+    settle = settings.READ_YOUR_WRITES_SECONDS if settings.DATABASE_READ_URL else 0
+    if backend == "memory":
+        return MemoryResponseCache(settings.RESPONSE_CACHE_TTL_SECONDS, settings.RESPONSE_CACHE_MAX_ENTRIES, settle)
+    if backend == "redis":
+        return RedisResponseCache(settings.REDIS_URL, settings.RESPONSE_CACHE_TTL_SECONDS, settle)
+    if backend == "none":
+        return ResponseCache(settings.RESPONSE_CACHE_TTL_SECONDS)
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {backend}")
+
+response_cache = create_response_cache()
\ No newline at end of file
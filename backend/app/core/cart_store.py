@@ -0,0 +1,342 @@
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+
+@dataclass(frozen=True)
+class StoredItem:
+    product_id: int
+    quantity: int
+    added_at: datetime
+
+@dataclass(frozen=True)
+class StoredCart:
+    """A cart as the store holds it: one line per product, keyed by product id"""
+    cart_id: int
+    created_at: datetime
+    updated_at: datetime
+    items: Dict[int, StoredItem] = field(default_factory=dict)
+
+class CartStore(ABC):
+    """Carts kept outside the primary database, written behind to carts/cart_items.
+    
+    A cart must be seeded (from its database rows) before it's changed; every
+    change marks the user dirty, and `take_dirty` hands those users to the
+    write-behind task exactly once per round of changes. Each method is atomic
+    for one user's cart.
+    """
+    def __init__(self):
+        self._counter_lock = threading.Lock()
+        self.writes = 0
+        self.persisted = 0
+        self.persist_errors = 0
+    
+    def count(self, field: str, amount: int = 1):
+        with self._counter_lock:
+            setattr(self, field, getattr(self, field) + amount)
+    
+    @abstractmethod
+    async def get(self, user_id: int) -> Optional[StoredCart]:
+        ...
+    
+    @abstractmethod
+    async def seed(self, user_id: int, cart: StoredCart) -> StoredCart:
+        """Store `cart` unless the user already has one; return whichever is stored"""
+    
+    @abstractmethod
+    async def add(self, user_id: int, product_id: int, quantity: int) -> int:
+        """Add units of a product, creating its line if needed; return the line's new quantity"""
+    
+    @abstractmethod
+    async def set_quantity(self, user_id: int, product_id: int, quantity: int) -> bool:
+        """Change an existing line; False if the cart has no line for the product"""
+    
+    @abstractmethod
+    async def set_lines(self, user_id: int, quantities: Dict[int, int]):
+        """Set several lines' quantities at once, adding missing lines; 0 removes a line"""
+    
+    @abstractmethod
+    async def remove(self, user_id: int, product_id: int) -> bool:
+        ...
+    
+    @abstractmethod
+    async def clear(self, user_id: int):
+        ...
+    
+    @abstractmethod
+    async def take_dirty(self, limit: int) -> List[int]:
+        """Pop up to `limit` users whose carts changed since they were last taken"""
+    
+    @abstractmethod
+    async def mark_dirty(self, user_ids: Iterable[int]):
+        """Queue users again, e.g. after their write-behind failed"""
+    
+    @abstractmethod
+    async def pending(self) -> int:
+        ...
+    
+    async def stats(self) -> dict:
+        with self._counter_lock:
+            counters = {
+                "writes": self.writes,
+                "persisted_carts": self.persisted,
+                "persist_errors": self.persist_errors,
+            }
+        return {"backend": type(self).__name__, "pending_carts": await self.pending(), **counters}
+
+class MemoryCartStore(CartStore):
+    """Per process, so only for a single worker (or development); other workers wouldn't see the carts"""
+    def __init__(self):
+        super().__init__()
+        self._carts: Dict[int, StoredCart] = {}
+        self._dirty: Dict[int, None] = {}
+        self._lock = threading.Lock()
+    
+    def _change(self, user_id: int, cart: StoredCart, items: Dict[int, StoredItem]):
+        self._carts[user_id] = replace(cart, updated_at=datetime.utcnow(), items=items)
+        self._dirty[user_id] = None
+        self.count("writes")
+    
+    async def get(self, user_id: int) -> Optional[StoredCart]:
+        with self._lock:
+            return self._carts.get(user_id)
+    
+    async def seed(self, user_id: int, cart: StoredCart) -> StoredCart:
+        with self._lock:
+            return self._carts.setdefault(user_id, cart)
+    
+    async def add(self, user_id: int, product_id: int, quantity: int) -> int:
+        with self._lock:
+            cart = self._carts[user_id]
+            line = cart.items.get(product_id)
+            if line is None:
+                line = StoredItem(product_id, quantity, datetime.utcnow())
+            else:
+                line = replace(line, quantity=line.quantity + quantity)
+            self._change(user_id, cart, {**cart.items, product_id: line})
+            return line.quantity
+    
+    async def set_quantity(self, user_id: int, product_id: int, quantity: int) -> bool:
+        with self._lock:
+            cart = self._carts[user_id]
+            line = cart.items.get(product_id)
+            if line is None:
+                return False
+            self._change(user_id, cart, {**cart.items, product_id: replace(line, quantity=quantity)})
+            return True
+    
+    async def set_lines(self, user_id: int, quantities: Dict[int, int]):
+        with self._lock:
+            cart = self._carts[user_id]
+            items = dict(cart.items)
+            now = datetime.utcnow()
+            for product_id, quantity in quantities.items():
+                if quantity <= 0:
+                    items.pop(product_id, None)
+                elif product_id in items:
+                    items[product_id] = replace(items[product_id], quantity=quantity)
+                else:
+                    items[product_id] = StoredItem(product_id, quantity, now)
+            self._change(user_id, cart, items)
+    
+    async def remove(self, user_id: int, product_id: int) -> bool:
+        with self._lock:
+            cart = self._carts[user_id]
+            if product_id not in cart.items:
+                return False
+            self._change(user_id, cart, {pid: line for pid, line in cart.items.items() if pid != product_id})
+            return True
+    
+    async def clear(self, user_id: int):
+        with self._lock:
+            cart = self._carts.get(user_id)
+            if cart is not None and cart.items:
+                self._change(user_id, cart, {})
+    
+    async def take_dirty(self, limit: int) -> List[int]:
+        with self._lock:
+            user_ids = list(self._dirty)[:limit]
+            for user_id in user_ids:
+                del self._dirty[user_id]
+            return user_ids
+    
+    async def mark_dirty(self, user_ids: Iterable[int]):
+        with self._lock:
+            for user_id in user_ids:
+                self._dirty[user_id] = None
+    
+    async def pending(self) -> int:
+        with self._lock:
+            return len(self._dirty)
+
+class RedisCartStore(CartStore):
+    """Shared across workers through Redis (or anything speaking its protocol).
+    
+    Each cart is one hash: cart_id/created_at/updated_at plus qty:<product> and
+    added:<product> per line, so adding units is a single HINCRBY. Dirty users
+    are a set. Carts expire after `ttl` seconds without changes; they've long
+    been written behind by then and reload from the database on next use.
+    """
+    def __init__(self, url: str, ttl: int, prefix: str = "shopswift:cart:"):
+        super().__init__()
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("CART_STORE_BACKEND=redis needs the 'redis' package")
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._watch_error = redis.WatchError
+    
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}{user_id}"
+    
+    @property
+    def _dirty_key(self) -> str:
+        return f"{self.prefix}dirty"
+    
+    async def _write(self, user_id: int, pipe):
+        """Queue the bookkeeping every change shares, then run the transaction"""
+        key = self._key(user_id)
+        pipe.hset(key, "updated_at", datetime.utcnow().isoformat())
+        pipe.expire(key, self.ttl)
+        pipe.sadd(self._dirty_key, user_id)
+        result = await pipe.execute()
+        self.count("writes")
+        return result
+    
+    async def _change_if(self, user_id: int, check, change) -> bool:
+        """Apply `change(pipe, found)` only if `check(pipe)` finds something, as one atomic step.
+    
+        The cart is WATCHed while it's checked; if it changes before the write,
+        the transaction aborts and both run again.
+        """
+        key = self._key(user_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    found = await check(pipe)
+                    if not found:
+                        return False
+                    pipe.multi()
+                    change(pipe, found)
+                    await self._write(user_id, pipe)
+                    return True
+                except self._watch_error:
+                    continue
+    
+    async def get(self, user_id: int) -> Optional[StoredCart]:
+        fields = await self._redis.hgetall(self._key(user_id))
+        if b"cart_id" not in fields:
+            return None
+        fields = {name.decode(): value.decode() for name, value in fields.items()}
+        updated_at = datetime.fromisoformat(fields["updated_at"])
+        items = {}
+        for name, value in fields.items():
+            if name.startswith("qty:"):
+                product_id = int(name[4:])
+                added_at = fields.get(f"added:{product_id}")
+                items[product_id] = StoredItem(
+                    product_id, int(value), datetime.fromisoformat(added_at) if added_at else updated_at
+                )
+        return StoredCart(
+            cart_id=int(fields["cart_id"]),
+            created_at=datetime.fromisoformat(fields["created_at"]),
+            updated_at=updated_at,
+            items=items,
+        )
+    
+    async def seed(self, user_id: int, cart: StoredCart) -> StoredCart:
+        key = self._key(user_id)
+        mapping = {
+            "cart_id": cart.cart_id,
+            "created_at": cart.created_at.isoformat(),
+            "updated_at": cart.updated_at.isoformat(),
+        }
+        for line in cart.items.values():
+            mapping[f"qty:{line.product_id}"] = line.quantity
+            mapping[f"added:{line.product_id}"] = line.added_at.isoformat()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                # Only if nobody seeded it first; their copy may already hold changes
+                await pipe.watch(key)
+                if not await pipe.hexists(key, "cart_id"):
+                    pipe.multi()
+                    pipe.hset(key, mapping=mapping)
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+                    return cart
+            except self._watch_error:
+                pass
+        return await self.get(user_id)
+    
+    async def add(self, user_id: int, product_id: int, quantity: int) -> int:
+        key = self._key(user_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, f"qty:{product_id}", quantity)
+            pipe.hsetnx(key, f"added:{product_id}", datetime.utcnow().isoformat())
+            result = await self._write(user_id, pipe)
+        return result[0]
+    
+    async def set_quantity(self, user_id: int, product_id: int, quantity: int) -> bool:
+        key = self._key(user_id)
+        return await self._change_if(
+            user_id,
+            lambda pipe: pipe.hexists(key, f"qty:{product_id}"),
+            lambda pipe, _: pipe.hset(key, f"qty:{product_id}", quantity)
+        )
+    
+    async def set_lines(self, user_id: int, quantities: Dict[int, int]):
+        key = self._key(user_id)
+        now = datetime.utcnow().isoformat()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for product_id, quantity in quantities.items():
+                if quantity > 0:
+                    pipe.hset(key, f"qty:{product_id}", quantity)
+                    pipe.hsetnx(key, f"added:{product_id}", now)
+                else:
+                    pipe.hdel(key, f"qty:{product_id}", f"added:{product_id}")
+            await self._write(user_id, pipe)
+    
+    async def remove(self, user_id: int, product_id: int) -> bool:
+        key = self._key(user_id)
+        return await self._change_if(
+            user_id,
+            lambda pipe: pipe.hexists(key, f"qty:{product_id}"),
+            lambda pipe, _: pipe.hdel(key, f"qty:{product_id}", f"added:{product_id}")
+        )
+    
+    async def clear(self, user_id: int):
+        key = self._key(user_id)
+    
+        async def lines(pipe):
+            return [name for name in await pipe.hkeys(key) if name.startswith((b"qty:", b"added:"))]
+    
+        await self._change_if(user_id, lines, lambda pipe, found: pipe.hdel(key, *found))
+    
+    async def take_dirty(self, limit: int) -> List[int]:
+        return [int(user_id) for user_id in await self._redis.spop(self._dirty_key, limit) or []]
+    
+    async def mark_dirty(self, user_ids: Iterable[int]):
+        user_ids = list(user_ids)
+        if user_ids:
+            await self._redis.sadd(self._dirty_key, *user_ids)
+    
+    async def pending(self) -> int:
+        return await self._redis.scard(self._dirty_key)
+
+def create_cart_store() -> Optional[CartStore]:
+    """None for the default "database" backend, where routers read and write cart rows directly"""
+    backend = settings.CART_STORE_BACKEND
+    if backend == "memory":
+        return MemoryCartStore()
+    if backend == "redis":
+        return RedisCartStore(settings.REDIS_URL, settings.CART_STORE_TTL_SECONDS)
+    if backend == "database":
+        return None
+    raise ValueError(f"Unknown CART_STORE_BACKEND: {backend}")
+
+cart_store = create_cart_store()
\ No newline at end of file
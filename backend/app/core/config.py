@@ -1,13 +1,99 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import json
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./shopswift.db"
+    # Derived from DATABASE_URL (aiosqlite / asyncpg) unless set explicitly
+    DATABASE_ASYNC_URL: Optional[str] = None
+    
+    # Connection pool, per engine and per worker process. Overflow defaults to 10,
+    # or 0 on SQLite where a single writer makes extra connections pointless
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: Optional[int] = None
+    DATABASE_POOL_TIMEOUT: int = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    
+    # Optional read replica for catalog reads. Users who just wrote read from the
+    # primary for READ_YOUR_WRITES_SECONDS; a replica that fails to connect is
+    # skipped for DATABASE_READ_RETRY_SECONDS
+    DATABASE_READ_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: int = 5
+    DATABASE_READ_RETRY_SECONDS: int = 30
+    
+    # Applied to every SQLite connection; cache size is in KiB
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Serialized catalog responses: "memory" (per process), "redis" (shared) or "none"
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    REDIS_URL: str = "redis://localhost:6379/0"
+    
+    # Carts: "database" (rows per request), or "memory" (single worker) / "redis" (shared)
+    # with changes written behind to the database every CART_WRITE_BEHIND_SECONDS
+    CART_STORE_BACKEND: str = "database"
+    CART_STORE_TTL_SECONDS: int = 604800
+    CART_WRITE_BEHIND_SECONDS: float = 5
+    CART_WRITE_BEHIND_BATCH: int = 500
+    
+    # Cache-Control for browsers and the CDN, per catalog route
+    PRODUCT_LIST_CACHE_CONTROL: str = "public, max-age=30, stale-while-revalidate=60"
+    PRODUCT_DETAIL_CACHE_CONTROL: str = "public, max-age=30, stale-while-revalidate=120"
+    FEATURED_CACHE_CONTROL: str = "public, max-age=60, stale-while-revalidate=300"
+    CATEGORY_LIST_CACHE_CONTROL: str = "public, max-age=300, stale-while-revalidate=600"
+    
+    # Authenticated users are cached per process; 0 disables the cache
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    
+    # bcrypt runs in its own process pool; 0 workers hashes on a single thread instead
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Product images are stored under UPLOAD_DIR/products and served at /uploads
+    UPLOAD_DIR: str = "uploads"
+    MAX_IMAGE_UPLOAD_BYTES: int = 20971520
+    # Resized variants of uploads (thumb/card/detail), rendered on their own process pool;
+    # 0 workers renders on a single thread instead
+    IMAGE_WORKERS: int = 2
+    IMAGE_VARIANT_FORMAT: str = "webp"
+    IMAGE_VARIANT_QUALITY: int = 80
+    
+    # Content-addressed image storage: "local" (UPLOAD_DIR/media) or "s3" (any S3-compatible
+    # endpoint; scripts/local_s3.py stands in for one locally). Unreferenced blobs are
+    # collected once they've been orphaned for MEDIA_GC_GRACE_SECONDS
+    MEDIA_STORAGE_BACKEND: str = "local"
+    MEDIA_S3_ENDPOINT: str = "http://localhost:9000"
+    MEDIA_S3_BUCKET: str = "shopswift-media"
+    MEDIA_S3_ACCESS_KEY: str = ""
+    MEDIA_S3_SECRET_KEY: str = ""
+    MEDIA_S3_REGION: str = "us-east-1"
+    MEDIA_CACHE_CONTROL: str = "public, max-age=31536000, immutable"
+    MEDIA_GC_GRACE_SECONDS: int = 3600
+    MEDIA_GC_INTERVAL_SECONDS: float = 3600
+    
+    # Production server (serve.py): one worker per available CPU unless SERVER_WORKERS is set.
+    # With SERVER_REUSE_PORT each worker listens on its own SO_REUSEPORT socket and the
+    # kernel balances connections between them. On SIGTERM workers stop accepting and get
+    # SERVER_GRACEFUL_SHUTDOWN_SECONDS to finish requests; checkouts always run to completion
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: Optional[int] = None
+    SERVER_LOOP: str = "uvloop"
+    SERVER_HTTP: str = "httptools"
+    SERVER_REUSE_PORT: bool = True
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    SERVER_ACCESS_LOG: bool = False
+    
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
     
     STRIPE_SECRET_KEY: str = ""
@@ -24,7 +110,7 @@ class Settings(BaseSettings):
     
     class Config:
         env_file = ".env"
-        
+    
     def parse_cors_origins(self):
         if isinstance(self.CORS_ORIGINS, str):
             return json.loads(self.CORS_ORIGINS)
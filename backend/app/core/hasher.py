@@ -0,0 +1,85 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+
+class HasherOverloaded(Exception):
+    """Raised instead of queueing when too many hash jobs are already pending"""
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, size-capped process pool.
+    
+    Keeps password hashing off the event loop and out of the threadpool that
+    serves every other sync endpoint. Jobs beyond `max_pending` are rejected
+    immediately so a login burst can't build an unbounded queue.
+    """
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._busy_seconds = 0.0
+    
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    # spawn rather than fork: the server process already runs threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hasher")
+            return self._executor
+    
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherOverloaded()
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+    
+        start = time.monotonic()
+        try:
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self._busy_seconds += time.monotonic() - start
+    
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_latency_ms": round(self._busy_seconds / self.completed * 1000, 2) if self.completed else 0,
+            }
+    
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Set
+
+class InFlight:
+    """Runs work that must finish once started, and lets shutdown wait for it.
+    
+    When the server's graceful shutdown times out it cancels the requests still
+    running. Work started with `run()` carries on regardless, and the caller
+    waits for it instead of unwinding, so nothing the work uses (its request's
+    session, say) is torn down under it and its response still goes out.
+    `drain()` in the lifespan shutdown waits for those requests to finish before
+    flushing anything their work changes. Per process.
+    """
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.completed = 0
+        self.held_cancellations = 0
+        # Requests awaiting work; none of them finishes before its work does
+        self._callers: Set[asyncio.Task] = set()
+    
+    async def run(self, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) to completion, swallowing any cancellation of the caller meanwhile"""
+        caller = asyncio.current_task()
+        if caller not in self._callers:
+            self._callers.add(caller)
+            caller.add_done_callback(self._callers.discard)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        task = asyncio.ensure_future(fn(*args, **kwargs))
+        try:
+            while True:
+                try:
+                    result = await asyncio.shield(task)
+                    break
+                except asyncio.CancelledError:
+                    if task.done():
+                        raise
+                    # Our caller was cancelled, not the work: keep waiting for it
+                    self.held_cancellations += 1
+        finally:
+            self.active -= 1
+            self.completed += 1
+        return result
+    
+    async def drain(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for the requests running work to finish; False if some still are"""
+        if not self._callers:
+            return True
+        _, pending = await asyncio.wait(set(self._callers), timeout=timeout)
+        return not pending
+    
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "peak": self.peak,
+            "completed": self.completed,
+            "held_cancellations": self.held_cancellations,
+        }
+
+# Order placement: stock, the order, the cart and its write-behind copy change together
+checkouts = InFlight()
\ No newline at end of file
@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+from fastapi import HTTPException
+from sqlalchemy import String, and_, literal, or_
+
+def encode_cursor(sort_by: str, order: str, value: Any, last_id: int) -> str:
+    """Build an opaque cursor pointing just past (value, last_id)"""
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+    payload = {"s": sort_by, "o": order, "v": value, "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> Tuple[Any, int]:
+    """Return (value, last_id) from a cursor, rejecting cursors minted for another sort"""
+    invalid = HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = payload["v"], int(payload["id"])
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+    except (ValueError, KeyError, TypeError):
+        raise invalid
+    
+    if payload.get("s") != sort_by or payload.get("o") != order:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return value, last_id
+
+def sort_value(value: Any, dialect: str):
+    """A cursor's sort value, bound so the database compares it like the stored column.
+    
+    SQLite keeps timestamps as text ("YYYY-MM-DD HH:MM:SS" from server defaults)
+    and compares them as text, so a datetime is rendered the same way rather than
+    with the ".000000" SQLAlchemy's binding would add.
+    """
+    if isinstance(value, datetime) and dialect == "sqlite":
+        rendered = value.strftime("%Y-%m-%d %H:%M:%S")
+        if value.microsecond:
+            rendered += f".{value.microsecond:06d}"
+        return literal(rendered, String)
+    return value
+
+def keyset_filter(sort_column, id_column, order: str, value: Any, last_id: int):
+    """WHERE clause selecting rows strictly after (value, last_id) in (sort_column, id) order"""
+    if order == "desc":
+        return or_(sort_column < value, and_(sort_column == value, id_column < last_id))
+    return or_(sort_column > value, and_(sort_column == value, id_column > last_id))
+
+def keyset_order(sort_column, id_column, order: str):
+    """ORDER BY matching keyset_filter, with id as the tiebreaker"""
+    if order == "desc":
+        return sort_column.desc(), id_column.desc()
+    return sort_column.asc(), id_column.asc()
+
+def split_page(rows, limit: int):
+    """Split a `limit + 1` fetch into (page, has_more)"""
+    return rows[:limit], len(rows) > limit
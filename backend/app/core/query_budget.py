@@ -0,0 +1,11 @@
+def query_budget(queries: int):
+    """Declare how many SQL statements one request to this endpoint may run.
+    
+    Goes directly above the function, under the route decorator. The budget must
+    not grow with the data (cart size, order lines, reviews);
+    scripts/check_query_budgets.py enforces it.
+    """
+    def declare(endpoint):
+        endpoint.query_budget = queries
+        return endpoint
+    return declare
\ No newline at end of file
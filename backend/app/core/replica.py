@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import settings
+
+class ReadRouting:
+    """Decides per request whether a read may be served by the replica.
+    
+    A user who committed a write within the last `window` seconds reads from the
+    primary so they see their own change despite replication lag. After a failed
+    connection the replica is skipped for `retry` seconds. Both are per process.
+    """
+    def __init__(self, window: float, retry: float, max_entries: int = 10000):
+        self.window = window
+        self.retry = retry
+        self.max_entries = max_entries
+        self._writers: "OrderedDict[str, float]" = OrderedDict()
+        self._replica_down_until = 0.0
+        self._lock = threading.Lock()
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+    
+    def record_write(self, subject: Optional[str]):
+        if subject is None or self.window <= 0:
+            return
+        with self._lock:
+            self._writers[subject] = time.monotonic() + self.window
+            self._writers.move_to_end(subject)
+            while len(self._writers) > self.max_entries:
+                self._writers.popitem(last=False)
+    
+    def wrote_recently(self, subject: Optional[str]) -> bool:
+        if subject is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            until = self._writers.get(subject)
+            if until is None:
+                return False
+            if now < until:
+                return True
+            del self._writers[subject]
+            return False
+    
+    def replica_available(self) -> bool:
+        return time.monotonic() >= self._replica_down_until
+    
+    def count_read(self, replica: bool):
+        with self._lock:
+            if replica:
+                self.replica_reads += 1
+            else:
+                self.primary_reads += 1
+    
+    def mark_replica_down(self):
+        with self._lock:
+            self._replica_down_until = time.monotonic() + self.retry
+            self.fallbacks += 1
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "replica_reads": self.replica_reads,
+                "primary_reads": self.primary_reads,
+                "fallbacks": self.fallbacks,
+                "replica_down": time.monotonic() < self._replica_down_until,
+                "recent_writers": len(self._writers),
+            }
+
+read_routing = ReadRouting(settings.READ_YOUR_WRITES_SECONDS, settings.DATABASE_READ_RETRY_SECONDS)
\ No newline at end of file
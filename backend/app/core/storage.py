@@ -0,0 +1,220 @@
+import datetime
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+import anyio
+from app.core.config import settings
+
+READ_CHUNK_BYTES = 64 * 1024
+MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "avif": "image/avif"}
+
+def media_type(key: str) -> str:
+    return MEDIA_TYPES.get(key.rsplit(".", 1)[-1], "application/octet-stream")
+
+class BlobStore(ABC):
+    """Immutable blobs by key. Keys are content addressed, so a key's bytes never
+    change: a put of an existing key can be skipped and anything read can be cached
+    forever.
+    """
+    @abstractmethod
+    async def size(self, key: str) -> Optional[int]:
+        """Length in bytes, None if there's no such blob"""
+    
+    @abstractmethod
+    async def put(self, key: str, path: Path):
+        """Store the file at `path` under `key`; the file may be moved rather than copied"""
+    
+    @abstractmethod
+    def read(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Bytes `start` through `end` inclusive, in chunks"""
+    
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+    
+    @asynccontextmanager
+    async def local_file(self, key: str):
+        """A path on local disk holding the blob, for as long as the context is open"""
+        size = await self.size(key)
+        if size is None:
+            raise FileNotFoundError(key)
+        fd, name = await anyio.to_thread.run_sync(lambda: tempfile.mkstemp(suffix=Path(key).suffix))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in self.read(key, 0, size - 1):
+                    await anyio.to_thread.run_sync(f.write, chunk)
+            yield Path(name)
+        finally:
+            await anyio.to_thread.run_sync(os.remove, name)
+    
+    async def close(self):
+        pass
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under `root`, sharded by the first characters of their key"""
+    def __init__(self, root: str):
+        self.root = Path(root)
+    
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+    
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return (await anyio.to_thread.run_sync(os.stat, self._path(key))).st_size
+        except FileNotFoundError:
+            return None
+    
+    async def put(self, key: str, path: Path):
+        target = self._path(key)
+        def move():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # A rename within one filesystem, so readers never see a partial blob; the staging
+            # name is unique, as the same image can be uploaded twice at once
+            fd, staged = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+            os.close(fd)
+            try:
+                shutil.move(path, staged)
+                os.replace(staged, target)
+            except BaseException:
+                if os.path.exists(staged):
+                    os.remove(staged)
+                raise
+        await anyio.to_thread.run_sync(move)
+    
+    async def read(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        f = await anyio.open_file(self._path(key), "rb")
+        try:
+            await f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await f.read(min(READ_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await f.aclose()
+    
+    async def delete(self, key: str):
+        try:
+            await anyio.to_thread.run_sync(os.remove, self._path(key))
+        except FileNotFoundError:
+            pass
+    
+    @asynccontextmanager
+    async def local_file(self, key: str):
+        yield self._path(key)
+
+class S3BlobStore(BlobStore):
+    """Blobs as objects in an S3-compatible bucket (AWS, MinIO, R2, or
+    scripts/local_s3.py in development), addressed path-style and signed with
+    SigV4.
+    """
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str, region: str):
+        import httpx
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self._host = httpx.URL(endpoint).netloc.decode()
+        self._client = httpx.AsyncClient(base_url=endpoint, timeout=60)
+    
+    def _path(self, key: str) -> str:
+        return quote(f"/{self.bucket}/{key}", safe="/~")
+    
+    def _sign(self, method: str, path: str, headers: dict, payload_hash: str = "UNSIGNED-PAYLOAD") -> dict:
+        """`headers` plus the SigV4 date, payload hash and Authorization headers"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        headers = {
+            **{name.lower(): str(value) for name, value in headers.items()},
+            "host": self._host,
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": payload_hash,
+        }
+        return {**headers, "authorization": sigv4_authorization(
+            method, path, headers, payload_hash, self.access_key, self.secret_key, self.region, amz_date
+        )}
+    
+    async def size(self, key: str) -> Optional[int]:
+        path = self._path(key)
+        response = await self._client.head(path, headers=self._sign("HEAD", path, {}))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return int(response.headers["content-length"])
+    
+    async def put(self, key: str, path: Path):
+        size = (await anyio.to_thread.run_sync(os.stat, path)).st_size
+        async def body():
+            f = await anyio.open_file(path, "rb")
+            try:
+                while chunk := await f.read(READ_CHUNK_BYTES):
+                    yield chunk
+            finally:
+                await f.aclose()
+        object_path = self._path(key)
+        headers = self._sign("PUT", object_path, {"content-length": size, "content-type": media_type(key)})
+        response = await self._client.put(object_path, content=body(), headers=headers)
+        response.raise_for_status()
+    
+    async def read(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        path = self._path(key)
+        headers = self._sign("GET", path, {"range": f"bytes={start}-{end}"})
+        async with self._client.stream("GET", path, headers=headers) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(READ_CHUNK_BYTES):
+                yield chunk
+    
+    async def delete(self, key: str):
+        path = self._path(key)
+        response = await self._client.delete(path, headers=self._sign("DELETE", path, {}))
+        if response.status_code != 404:
+            response.raise_for_status()
+    
+    async def close(self):
+        await self._client.aclose()
+
+def sigv4_authorization(
+    method: str, path: str, headers: dict, payload_hash: str,
+    access_key: str, secret_key: str, region: str, amz_date: str
+) -> str:
+    """AWS Signature Version 4 Authorization header for an S3 request with no query string"""
+    signed = sorted(headers)
+    canonical_request = "\n".join([
+        method,
+        path,
+        "",
+        "".join(f"{name}:{' '.join(str(headers[name]).split())}\n" for name in signed),
+        ";".join(signed),
+        payload_hash,
+    ])
+    scope = f"{amz_date[:8]}/{region}/s3/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()
+    ])
+    key = f"AWS4{secret_key}".encode()
+    for part in (amz_date[:8], region, "s3", "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, SignedHeaders={';'.join(signed)}, Signature={signature}"
+
+def create_blob_store() -> BlobStore:
+    backend = settings.MEDIA_STORAGE_BACKEND
+    if backend == "local":
+        return LocalBlobStore(os.path.join(settings.UPLOAD_DIR, "media"))
+    if backend == "s3":
+        return S3BlobStore(
+            settings.MEDIA_S3_ENDPOINT, settings.MEDIA_S3_BUCKET,
+            settings.MEDIA_S3_ACCESS_KEY, settings.MEDIA_S3_SECRET_KEY, settings.MEDIA_S3_REGION
+        )
+    raise ValueError(f"Unknown MEDIA_STORAGE_BACKEND: {backend}")
+
+blob_store = create_blob_store()
\ No newline at end of file
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import anyio
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+from app.core.config import settings
+
+# First bytes of the formats the catalog accepts; the client's content_type isn't trusted
+IMAGE_SIGNATURES = [(b"\xff\xd8\xff", "jpg"), (b"\x89PNG\r\n\x1a\n", "png")]
+SNIFF_BYTES = 12
+# File bytes are gathered into writes of about this size, each one thread hop
+WRITE_BUFFER_BYTES = 1 << 20
+# Room for the boundaries, part headers and small form fields around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+INVALID_IMAGE = "Invalid file type. Only JPEG, PNG, and WebP are allowed."
+
+@dataclass(frozen=True)
+class ReceivedImage:
+    path: Path
+    extension: str
+    # sha256 of the file, computed as it was written
+    digest: str
+    size: int
+
+class UploadTooLarge(Exception):
+    """Raised as soon as an upload goes over its size limit, before the rest is read"""
+
+class InvalidUpload(Exception):
+    """Raised for a body that isn't a multipart upload of a supported image"""
+
+def sniff_image(head: bytes) -> Optional[str]:
+    """File extension for a JPEG, PNG or WebP header, None for anything else"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    return None
+
+def upload_path(url: Optional[str]) -> Optional[Path]:
+    """Where an /uploads/... URL is stored on disk; None for external URLs"""
+    if not url or not url.startswith("/uploads/") or ".." in url.split("/"):
+        return None
+    return Path(settings.UPLOAD_DIR) / url[len("/uploads/"):]
+
+def staging_dir() -> Path:
+    """Where uploads and rendered variants wait before they go into storage"""
+    directory = Path(settings.UPLOAD_DIR) / "tmp"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def write_chunk(file, digest, data: bytes):
+    digest.update(data)
+    file.write(data)
+
+def sync_and_close(file):
+    file.flush()
+    os.fsync(file.fileno())
+    file.close()
+
+async def receive_image(request: Request, directory: Path, max_bytes: int, field: str = "file") -> ReceivedImage:
+    """Stream the `field` part of a multipart body into a temp file in `directory`.
+    
+    The body is parsed as it arrives, so only the file's bytes are kept and they
+    reach disk on a worker thread. It's rejected once it passes `max_bytes` or
+    once its first bytes turn out not to be an image.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUpload("Expected a multipart/form-data upload")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise UploadTooLarge()
+    
+    events = []
+    parser = MultipartParser(boundary, {
+        "on_part_begin": lambda: events.append(("part", b"")),
+        "on_header_field": lambda data, start, end: events.append(("header_field", data[start:end])),
+        "on_header_value": lambda data, start, end: events.append(("header_value", data[start:end])),
+        "on_header_end": lambda: events.append(("header_end", b"")),
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("part_end", b"")),
+    })
+    
+    fd, temp_name = await anyio.to_thread.run_sync(lambda: tempfile.mkstemp(dir=directory, suffix=".part"))
+    temp_path = Path(temp_name)
+    try:
+        out = await anyio.to_thread.run_sync(os.fdopen, fd, "wb")
+        digest = hashlib.sha256()
+        received = size = 0
+        head = b""
+        extension = None
+        header_name = header_value = b""
+        in_file = found = False
+        buffer = []
+        buffered = 0
+        try:
+            async for chunk in request.stream():
+                # Also bounds bodies without a Content-Length
+                received += len(chunk)
+                if received > max_bytes + MULTIPART_OVERHEAD_BYTES:
+                    raise UploadTooLarge()
+                parser.write(chunk)
+                for kind, data in events:
+                    if kind == "header_field":
+                        header_name += data
+                    elif kind == "header_value":
+                        header_value += data
+                    elif kind == "header_end":
+                        if header_name.lower() == b"content-disposition" and not found:
+                            _, disposition = parse_options_header(header_value)
+                            in_file = found = disposition.get(b"name") == field.encode()
+                        header_name = header_value = b""
+                    elif kind == "data" and in_file:
+                        size += len(data)
+                        if size > max_bytes:
+                            raise UploadTooLarge()
+                        if extension is None and len(head) < SNIFF_BYTES:
+                            head += data[:SNIFF_BYTES - len(head)]
+                            if len(head) == SNIFF_BYTES:
+                                extension = sniff_image(head)
+                                if extension is None:
+                                    raise InvalidUpload(INVALID_IMAGE)
+                        buffer.append(data)
+                        buffered += len(data)
+                    elif kind == "part_end":
+                        in_file = False
+                events.clear()
+                if buffered >= WRITE_BUFFER_BYTES:
+                    await anyio.to_thread.run_sync(write_chunk, out, digest, b"".join(buffer))
+                    buffer, buffered = [], 0
+            parser.finalize()
+            if buffer:
+                await anyio.to_thread.run_sync(write_chunk, out, digest, b"".join(buffer))
+        finally:
+            # Synced before it's moved into storage, so a crash can't publish a partial file
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(sync_and_close, out)
+    
+        if not found:
+            raise InvalidUpload(f"No '{field}' file in the upload")
+        extension = extension or sniff_image(head)
+        if extension is None:
+            raise InvalidUpload(INVALID_IMAGE)
+        return ReceivedImage(temp_path, extension, digest.hexdigest(), size)
+    except BaseException:
+        # Also when the client disconnects and the request is cancelled
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(remove_file, temp_path)
+        raise
\ No newline at end of file
@@ -1,15 +1,112 @@
 # filepath: /home/syed/Documents/Learning/resume/backend/app/database.py
-from sqlalchemy import create_engine
+import os
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.replica import read_routing
+from app.core.security import token_subject
 
+# Async drivers for each sync URL scheme the app accepts
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def pool_options(url: str, poolclass) -> dict:
+    """Pool arguments for an engine on `url`, sized from Settings"""
+    parsed = make_url(url)
+    sqlite = parsed.get_backend_name() == "sqlite"
+    if sqlite and parsed.database in (None, "", ":memory:"):
+        # An in-memory database lives on its single connection; keep the dialect's pool
+        return {}
+    
+    max_overflow = settings.DATABASE_MAX_OVERFLOW
+    if max_overflow is None:
+        max_overflow = 0 if sqlite else 10
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        # A file handle can't go stale, a server connection can
+        "pool_pre_ping": not sqlite,
+    }
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the writer; busy_timeout makes writers wait instead of failing"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.close()
+
+def pool_stats(pool) -> dict:
+    """Occupancy of a connection pool, for the admin dashboard"""
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    return stats
+
+# Sync engine: startup, scripts and migrations
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
+    **pool_options(settings.DATABASE_URL, QueuePool)
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+class PrimarySession(Session):
+    """Session on the primary; a commit sends its user's next reads to the primary too"""
+
+# Async engine: every request handler
+async_url = settings.DATABASE_ASYNC_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(async_url, **pool_options(async_url, AsyncAdaptedQueuePool))
+# expire_on_commit=False so committed objects can still be serialized without
+# an implicit (and, under asyncio, impossible) lazy reload
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, sync_session_class=PrimarySession, autoflush=False, expire_on_commit=False
+)
+
+# Optional read replica: read-only catalog endpoints only
+read_engine = None
+ReadSessionLocal = None
+if settings.DATABASE_READ_URL:
+    read_url = async_database_url(settings.DATABASE_READ_URL)
+    read_engine = create_async_engine(read_url, **pool_options(read_url, AsyncAdaptedQueuePool))
+    ReadSessionLocal = async_sessionmaker(read_engine, autoflush=False, expire_on_commit=False)
+
+for sqlite_engine in (engine, async_engine.sync_engine, read_engine and read_engine.sync_engine):
+    if sqlite_engine is not None and sqlite_engine.dialect.name == "sqlite":
+        event.listen(sqlite_engine, "connect", apply_sqlite_pragmas)
+
+@event.listens_for(PrimarySession, "after_commit")
+def remember_writer(session):
+    if read_engine is not None:
+        read_routing.record_write(token_subject(session.info.get("authorization")))
+
 Base = declarative_base()
 
 def get_db():
@@ -19,16 +116,72 @@ def get_db():
     finally:
         db.close()
 
-def create_db_and_tables():
-    from app.models import user, product, order, cart  # Import all models
-    Base.metadata.create_all(bind=engine)
+async def get_async_db(request: Request):
+    async with AsyncSessionLocal() as db:
+        db.info["authorization"] = request.headers.get("authorization")
+        yield db
+
+async def get_read_db(request: Request):
+    """Session for read-only endpoints: the replica when configured and safe, else the primary"""
+    db = None
+    fresh = False
+    if read_engine is not None:
+        # Someone who just wrote must see it: primary, and no cached responses either
+        fresh = read_routing.wrote_recently(token_subject(request.headers.get("authorization")))
+        if not fresh and read_routing.replica_available():
+            db = ReadSessionLocal()
+            try:
+                await db.connection()
+            except (DBAPIError, OSError):
+                await db.close()
+                read_routing.mark_replica_down()
+                db = None
+        read_routing.count_read(replica=db is not None)
     
-    # Create admin user if not exists
+    replica = db is not None
+    if db is None:
+        db = AsyncSessionLocal()
+    db.info["skip_response_cache"] = fresh
+    # Responses read from the replica may predate a write that just cleared the cache
+    db.info["replica"] = replica
+    try:
+        yield db
+    finally:
+        await db.close()
+
+# alembic.ini sits next to the app package
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+def alembic_config():
+    from alembic.config import Config
+    config = Config(ALEMBIC_INI)
+    # Leave the caller's logging alone; alembic.ini configures it for the CLI
+    config.attributes["configure_logger"] = False
+    return config
+
+def schema_revision(connection) -> Optional[str]:
+    """The migration the database is at; None if it has never been migrated"""
+    from alembic.runtime.migration import MigrationContext
+    return MigrationContext.configure(connection).get_current_revision()
+
+def upgrade_database():
+    """Apply any pending migrations (alembic/versions) to DATABASE_URL"""
+    from alembic import command
+    command.upgrade(alembic_config(), "head")
+
+def create_admin_user() -> bool:
+    """Create the ADMIN_EMAIL user if it's missing; True if it was created.
+    
+    Hashing its password takes a bcrypt round, which is why this runs as a
+    deploy step (scripts/migrate.py) rather than in every worker's startup.
+    """
     from app.core.security import get_password_hash
     from app.models.user import User
+    from app.services.metrics import rollup_delta
     db = SessionLocal()
-    admin = db.query(User).filter(User.email == settings.ADMIN_EMAIL).first()
-    if not admin:
+    try:
+        if db.query(User.id).filter(User.email == settings.ADMIN_EMAIL).first() is not None:
+            return False
         admin = User(
             email=settings.ADMIN_EMAIL,
             hashed_password=get_password_hash(settings.ADMIN_PASSWORD),
@@ -37,11 +190,14 @@ def create_db_and_tables():
             is_active=True
         )
         db.add(admin)
+        db.flush()
+        db.execute(rollup_delta(engine.dialect.name, admin.created_at, new_users=1))
         db.commit()
-    db.close()
-
-
-
-
+        return True
+    finally:
+        db.close()
 
-    
\ No newline at end of file
+def create_db_and_tables():
+    """Migrate and bootstrap a database in one go, for scripts working on a scratch copy"""
+    upgrade_database()
+    create_admin_user()
\ No newline at end of file
@@ -1,4 +1,6 @@
 from app.models.user import User
 from app.models.product import Product, Category, Review
 from app.models.cart import Cart, CartItem
-from app.models.order import Order, OrderItem
\ No newline at end of file
+from app.models.order import Order, OrderItem
+from app.models.metrics import MetricRollup
+from app.models.media import Blob
\ No newline at end of file
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Blob(Base):
+    """An uploaded image, stored once by content hash however many products use it.
+    
+    Its rendered variants are stored alongside under keys derived from the same
+    digest, and go with it when it's collected.
+    """
+    __tablename__ = "blobs"
+    
+    # sha256 of the original file; the storage key is <digest>.<extension>
+    digest = Column(String(64), primary_key=True)
+    extension = Column(String(8), nullable=False)
+    size = Column(Integer, nullable=False)
+    # Products whose image is this blob, refreshed by app.services.media on every image change
+    ref_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # {"thumb"|"card"|"detail": {"url", "width", "height"}} in IMAGE_VARIANT_FORMAT, once rendered
+    variants = Column(JSON(none_as_null=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Last change of ref_count; a blob at 0 refs is collected a grace period after this
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
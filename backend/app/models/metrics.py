@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint
+from app.database import Base
+
+class MetricRollup(Base):
+    """Dashboard counters for one hour, one day, or all time ("total", bucket at the epoch).
+    
+    Maintained by app.services.metrics in the same transaction as the write it
+    counts. Orders count in the bucket they were created in; a cancelled order
+    keeps its order count but gives back its revenue and units.
+    """
+    __tablename__ = "metric_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket", name="uq_metric_rollups_bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(8), nullable=False)
+    bucket = Column(DateTime, nullable=False)
+    revenue = Column(Float, default=0, server_default="0", nullable=False)
+    orders = Column(Integer, default=0, server_default="0", nullable=False)
+    units_sold = Column(Integer, default=0, server_default="0", nullable=False)
+    new_users = Column(Integer, default=0, server_default="0", nullable=False)
+    # Orders currently in each OrderStatus
+    orders_pending = Column(Integer, default=0, server_default="0", nullable=False)
+    orders_processing = Column(Integer, default=0, server_default="0", nullable=False)
+    orders_shipped = Column(Integer, default=0, server_default="0", nullable=False)
+    orders_delivered = Column(Integer, default=0, server_default="0", nullable=False)
+    orders_cancelled = Column(Integer, default=0, server_default="0", nullable=False)
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, Index, JSON, case, cast, literal_column
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -10,6 +11,8 @@ class Category(Base):
     name = Column(String(100), unique=True, index=True)
     description = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
+    # Active products in this category, refreshed by app.services.category_counts on every product write
+    product_count = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -17,16 +20,35 @@ class Category(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Catalog listing: WHERE is_active [AND category_id] ORDER BY <sort>, id
+        Index("ix_products_active_created", "is_active", "created_at", "id"),
+        Index("ix_products_active_price", "is_active", "price", "id"),
+        Index("ix_products_active_name", "is_active", "name", "id"),
+        Index("ix_products_category_created", "category_id", "is_active", "created_at", "id"),
+        Index("ix_products_category_price", "category_id", "is_active", "price", "id"),
+        # Homepage featured strip
+        Index("ix_products_featured", "is_active", "is_featured", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    # Supplier stock-keeping unit; bulk imports upsert on it
+    sku = Column(String(64), unique=True, index=True, nullable=True)
     name = Column(String(200), index=True)
     description = Column(Text, nullable=True)
     price = Column(Float)
     stock_quantity = Column(Integer, default=0)
     image = Column(String(500), nullable=True)
+    # {"thumb"|"card"|"detail": {"url", "width", "height"}}, rendered from an uploaded image by app.services.images
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
+    # Digest of the blob behind an /media/ image URL; None for external or legacy /uploads/ images
+    image_blob = Column(String(64), index=True, nullable=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     is_active = Column(Boolean, default=True)
     is_featured = Column(Boolean, default=False)
+    # Review aggregates, maintained by app.services.ratings on every review write
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    review_count = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -35,9 +57,40 @@ class Product(Base):
     reviews = relationship("Review", back_populates="product", cascade="all, delete-orphan")
     order_items = relationship("OrderItem", back_populates="product")
     cart_items = relationship("CartItem", back_populates="product")
+    
+    @hybrid_property
+    def average_rating(self):
+        if not self.review_count:
+            return 0
+        return self.rating_sum / self.review_count
+    
+    @average_rating.expression
+    def average_rating(cls):
+        # Literal constants (not bound parameters) so the expression matches
+        # ix_products_active_rating textually and the planner can use it
+        return case(
+            (cls.review_count > literal_column("0"), cast(cls.rating_sum, Float) / cls.review_count),
+            else_=literal_column("0.0")
+        )
+    
+    @property
+    def image_srcset(self):
+        """The variants as an <img srcset>, narrowest first; None until they're rendered"""
+        if not self.image_variants:
+            return None
+        # A small source renders every variant at the same width; list it once
+        widths = {variant["width"]: variant["url"] for variant in self.image_variants.values()}
+        return ", ".join(f"{url} {width}w" for width, url in sorted(widths.items()))
+
+Index("ix_products_active_rating", Product.is_active, Product.average_rating, Product.id)
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Newest-first reviews for a product, and the one-review-per-user check
+        Index("ix_reviews_product_created", "product_id", "created_at"),
+        Index("ix_reviews_user_product", "user_id", "product_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     rating = Column(Integer)
@@ -1,160 +1,425 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+import asyncio
+import csv
+import io
+import json
+import os
+from app.database import AsyncSessionLocal, get_async_db, engine, async_engine, read_engine, pool_stats
 from app.models.user import User
 from app.models.product import Product, Category
 from app.models.order import Order, OrderStatus
+from app.models.metrics import MetricRollup
+from app.models.media import Blob
 from app.schemas.product import ProductCreate, ProductUpdate, CategoryCreate
-from app.schemas.order import OrderUpdate
+from app.schemas.order import OrderUpdate, AdminOrderListResponse
 from app.routers.auth import get_current_active_user, get_current_admin_user
+from app.core.config import settings
+from app.core.principal import principal_cache
+from app.core.hasher import password_hasher
+from app.core.inflight import checkouts
+from app.core.replica import read_routing
+from app.core.cache import response_cache
+from app.core.cart_store import cart_store
+from app.services.category_counts import refresh_product_counts
+from app.services.images import image_jobs, queue_missing_variants, queue_variants
+from app.services.media import media_stats, set_product_image
+from app.services.metrics import record_status_change, series_buckets, summarize
+from app.services.product_import import export_query, import_products
+from app.core.query_budget import query_budget
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_order, split_page
 
 router = APIRouter()
 
-def get_admin_user(current_user: User = Depends(get_current_active_user)):
+async def get_admin_user(current_user: User = Depends(get_current_active_user)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
     return current_user
 
 @router.post("/products")
-def create_product(
+async def create_product(
     product: ProductCreate,
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    if product.sku and await db.scalar(select(Product.id).filter(Product.sku == product.sku)):
+        raise HTTPException(status_code=400, detail="Product with this SKU already exists")
+    
     db_product = Product(**product.dict())
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await set_product_image(db, db_product, db_product.image)
+    await db.flush()
+    await db.execute(refresh_product_counts([db_product.category_id]))
+    await db.commit()
+    await response_cache.invalidate("products", "categories", "featured", f"category:{db_product.category_id}")
+    queue_variants(db_product)
+    await db.refresh(db_product)
     return db_product
 
 @router.put("/products/{product_id}")
-def update_product(
+async def update_product(
     product_id: int,
     product_update: ProductUpdate,
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    if product_update.sku and await db.scalar(
+        select(Product.id).filter(Product.sku == product_update.sku, Product.id != product_id)
+    ):
+        raise HTTPException(status_code=400, detail="Product with this SKU already exists")
     
-    for field, value in product_update.dict(exclude_unset=True).items():
+    old_category_id = product.category_id
+    changes = product_update.dict(exclude_unset=True)
+    image_changed = "image" in changes and changes["image"] != product.image
+    for field, value in changes.items():
         setattr(product, field, value)
+    if image_changed:
+        await set_product_image(db, product, product.image)
     
-    db.commit()
-    db.refresh(product)
+    await db.flush()
+    await db.execute(refresh_product_counts([old_category_id, product.category_id]))
+    await db.commit()
+    await response_cache.invalidate(
+        "products", "categories", "featured", f"product:{product_id}",
+        f"category:{old_category_id}", f"category:{product.category_id}"
+    )
+    if image_changed:
+        queue_variants(product)
+    await db.refresh(product)
     return product
 
+@router.post("/products/import")
+async def import_product_feed(
+    request: Request,
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    create_categories: bool = Query(False, description="Create categories the feed names that don't exist yet"),
+    admin: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Upsert products on SKU from a CSV (with header) or NDJSON request body, parsed as it streams in"""
+    report = await import_products(db, request.stream(), format, create_categories)
+    await queue_missing_variants(db)
+    return report
+
+@router.get("/products/export")
+@query_budget(1)
+async def export_product_catalog(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    admin: User = Depends(get_admin_user)
+):
+    """Every product as NDJSON or CSV, in the layout /products/import reads back"""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"products-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        export_rows(export_query(), format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.delete("/products/{product_id}")
-def delete_product(
+async def delete_product(
     product_id: int,
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     product.is_active = False
-    db.commit()
+    await db.flush()
+    await db.execute(refresh_product_counts([product.category_id]))
+    await db.commit()
+    await response_cache.invalidate(
+        "products", "categories", "featured", f"product:{product_id}", f"category:{product.category_id}"
+    )
     return {"message": "Product deleted"}
 
 @router.post("/categories")
-def create_category(
+async def create_category(
     category: CategoryCreate,
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     db_category = Category(**category.dict())
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await response_cache.invalidate("categories")
+    await db.refresh(db_category)
     return db_category
 
-@router.get("/orders")
-def get_all_orders(
+# Flat order rows for the listing and exports: no items, just the customer's email
+ADMIN_ORDER_COLUMNS = (
+    Order.id,
+    Order.user_id,
+    User.email.label("user_email"),
+    Order.status,
+    Order.total_amount,
+    Order.shipping_address,
+    Order.payment_intent_id,
+    Order.created_at,
+    Order.updated_at,
+)
+
+def admin_order_query(
+    status: Optional[OrderStatus],
+    user_id: Optional[int],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime]
+):
+    """Filtered orders, newest first, with id as the keyset tiebreaker"""
+    query = select(*ADMIN_ORDER_COLUMNS).outerjoin(User, User.id == Order.user_id)
+    if status:
+        query = query.filter(Order.status == status)
+    if user_id is not None:
+        query = query.filter(Order.user_id == user_id)
+    if created_from:
+        query = query.filter(Order.created_at >= created_from)
+    if created_to:
+        query = query.filter(Order.created_at < created_to)
+    return query.order_by(*keyset_order(Order.created_at, Order.id, "desc"))
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, OrderStatus):
+        return value.value
+    return value
+
+async def export_rows(query, format: str):
+    """Stream the query as NDJSON or CSV from a server-side cursor, in constant memory"""
+    # Its own session: the response body is produced after the endpoint has returned
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=1000))
+        names = list(result.keys())
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            yield buffer.getvalue()
+        async for rows in result.partitions():
+            if format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([[export_value(value) for value in row] for row in rows])
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(names, map(export_value, row)))) + "\n" for row in rows
+                )
+
+@router.get("/orders", response_model=AdminOrderListResponse)
+@query_budget(1)
+async def get_all_orders(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
+    status: Optional[OrderStatus] = None,
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = Query(None, description="Orders created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Orders created before this time"),
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Orders newest first, one keyset page at a time"""
+    query = admin_order_query(status, user_id, created_from, created_to)
+    if cursor:
+        value, last_id = decode_cursor(cursor, "created_at", "desc")
+        query = query.filter(keyset_filter(Order.created_at, Order.id, "desc", value, last_id))
+    
+    rows, has_more = split_page((await db.execute(query.limit(limit + 1))).all(), limit)
+    
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor("created_at", "desc", last.created_at, last.id)
+    return {"data": [row._mapping for row in rows], "limit": limit, "next_cursor": next_cursor}
+
+@router.get("/orders/export")
+@query_budget(1)
+async def export_orders(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    status: Optional[OrderStatus] = None,
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = Query(None, description="Orders created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Orders created before this time"),
+    admin: User = Depends(get_admin_user)
 ):
-    orders = db.query(Order).order_by(Order.created_at.desc()).all()
-    return orders
+    """Every matching order as NDJSON or CSV, streamed for finance exports"""
+    query = admin_order_query(status, user_id, created_from, created_to)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"orders-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        export_rows(query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.put("/orders/{order_id}")
-def update_order_status(
+@query_budget(5)
+async def update_order_status(
     order_id: int,
     order_update: OrderUpdate,
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    order = db.query(Order).filter(Order.id == order_id).first()
+    # Locked so concurrent status changes can't both move the same rollup counts
+    order = await db.get(Order, order_id, with_for_update=True)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
     if order_update.status:
+        old_status = order.status
         order.status = order_update.status
+        await record_status_change(db, order, old_status)
     
-    db.commit()
-    db.refresh(order)
+    await db.commit()
+    await db.refresh(order)
     return order
 
 @router.get("/stats")
-def get_admin_stats(
+@query_budget(4)
+async def get_admin_stats(
+    days: int = Query(30, ge=1, le=366, description="Length of the series, ending now"),
+    granularity: str = Query("day", regex="^(day|hour)$"),
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get dashboard statistics"""
-    # Total revenue
-    total_revenue = db.query(func.sum(Order.total)).filter(
-        Order.status == "completed"
-    ).scalar() or 0
+    """Get dashboard statistics from the metric rollups"""
+    if granularity == "hour" and days > 31:
+        raise HTTPException(status_code=400, detail="Hourly series cover at most 31 days")
     
-    # Total orders
-    total_orders = db.query(func.count(Order.id)).scalar()
+    buckets = series_buckets(datetime.utcnow(), days, granularity)
+    total = await db.scalar(select(MetricRollup).filter(MetricRollup.granularity == "total"))
+    rows = {
+        row.bucket: row
+        for row in await db.scalars(
+            select(MetricRollup).filter(
+                MetricRollup.granularity == granularity,
+                MetricRollup.bucket >= buckets[0]
+            )
+        )
+    }
     
     # Active products
-    active_products = db.query(func.count(Product.id)).filter(
-        Product.is_active == True
-    ).scalar()
-    
-    # Total users
-    total_users = db.query(func.count(User.id)).scalar()
+    active_products = await db.scalar(
+        select(func.count(Product.id)).filter(Product.is_active == True)
+    )
     
     # Recent orders
-    recent_orders = db.query(Order).order_by(
-        Order.created_at.desc()
-    ).limit(5).all()
+    recent_orders = await db.scalars(
+        select(Order).options(joinedload(Order.user)).order_by(
+            Order.created_at.desc()
+        ).limit(5)
+    )
     
     recent_orders_data = []
     for order in recent_orders:
         recent_orders_data.append({
             "id": order.id,
-            "user_email": order.user.email,
-            "total": order.total,
+            "user_email": order.user.email if order.user else None,
+            "total": order.total_amount,
             "status": order.status,
             "created_at": order.created_at
         })
     
+    all_time = summarize([total] if total else [])
     return {
-        "total_revenue": total_revenue,
-        "total_orders": total_orders,
+        "total_revenue": all_time["revenue"],
+        "total_orders": all_time["orders"],
         "active_products": active_products,
-        "total_users": total_users,
+        "total_users": all_time["new_users"],
+        "units_sold": all_time["units_sold"],
+        "orders_by_status": all_time["orders_by_status"],
+        "range": {"days": days, "granularity": granularity, "from": buckets[0], **summarize(list(rows.values()))},
+        "series": [
+            {"bucket": bucket, **summarize([rows[bucket]] if bucket in rows else [])}
+            for bucket in buckets
+        ],
         "recent_orders": recent_orders_data
     }
 
+@router.get("/system/hasher")
+async def get_hasher_stats(current_user: User = Depends(get_current_admin_user)):
+    """Password hashing pool queue depth and throughput"""
+    return password_hasher.stats()
+
+@router.get("/system/images")
+async def get_image_job_stats(current_user: User = Depends(get_current_admin_user)):
+    """Image variant rendering queue and outcomes for this worker process"""
+    return image_jobs.stats()
+
+@router.get("/system/media")
+async def get_media_stats(
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stored image blobs, how many are shared or orphaned, and this worker's dedup/GC counters"""
+    blobs, size, shared, orphaned = (await db.execute(select(
+        func.count(Blob.digest),
+        func.coalesce(func.sum(Blob.size), 0),
+        func.count(Blob.digest).filter(Blob.ref_count > 1),
+        func.count(Blob.digest).filter(Blob.ref_count == 0),
+    ))).one()
+    return {
+        "backend": settings.MEDIA_STORAGE_BACKEND,
+        "blobs": blobs,
+        "bytes": size,
+        "shared_blobs": shared,
+        "orphaned_blobs": orphaned,
+        **media_stats,
+    }
+
+@router.get("/system/db-pool")
+async def get_db_pool_stats(current_user: User = Depends(get_current_admin_user)):
+    """Connection pool occupancy for this worker process"""
+    return {
+        "dialect": async_engine.dialect.name,
+        "async": pool_stats(async_engine.pool),
+        "sync": pool_stats(engine.pool),
+        "replica": pool_stats(read_engine.pool) if read_engine is not None else None,
+        "read_routing": read_routing.stats() if read_engine is not None else None,
+    }
+
+@router.get("/system/cache")
+async def get_response_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """Catalog response cache hit rate for this worker process (or the shared Redis cache)"""
+    return response_cache.stats()
+
+@router.get("/system/carts")
+async def get_cart_store_stats(current_user: User = Depends(get_current_admin_user)):
+    """Cart store backend and how many changed carts are waiting to be written behind"""
+    if cart_store is None:
+        return {"backend": "database"}
+    return await cart_store.stats()
+
+@router.get("/system/server")
+async def get_server_stats(current_user: User = Depends(get_current_admin_user)):
+    """The worker process that answered: its event loop and checkouts in flight"""
+    return {
+        "pid": os.getpid(),
+        "loop": type(asyncio.get_running_loop()).__module__,
+        "checkouts": checkouts.stats(),
+    }
+
 @router.get("/users")
-def get_users(
+@query_budget(2)
+async def get_users(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all users"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    total = db.query(func.count(User.id)).scalar()
+    users = (await db.scalars(select(User).offset(skip).limit(limit))).all()
+    total = await db.scalar(select(func.count(User.id)))
     
     return {
         "data": users,
@@ -164,39 +429,45 @@ def get_users(
     }
 
 @router.put("/users/{user_id}/toggle-admin")
-def toggle_user_admin(
+async def toggle_user_admin(
     user_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Toggle user admin status"""
     if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot modify your own admin status")
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     user.is_admin = not user.is_admin
-    db.commit()
+    # Revoke outstanding tokens so the new role applies on every worker
+    user.token_version = User.token_version + 1
+    await db.commit()
+    principal_cache.evict(user.id)
     
     return {"id": user.id, "email": user.email, "is_admin": user.is_admin}
 
 @router.put("/users/{user_id}/toggle-active")
-def toggle_user_active(
+async def toggle_user_active(
     user_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Toggle user active status"""
     if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot deactivate yourself")
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     user.is_active = not user.is_active
-    db.commit()
+    # Revoke outstanding tokens so a deactivated user is locked out everywhere
+    user.token_version = User.token_version + 1
+    await db.commit()
+    principal_cache.evict(user.id)
     
     return {"id": user.id, "email": user.email, "is_active": user.is_active}
\ No newline at end of file
@@ -1,57 +1,89 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserRead, Token
-from app.core.security import verify_password, get_password_hash, create_access_token, verify_token
+from app.core.security import create_access_token, verify_token_claims
+from app.core.hasher import password_hasher, HasherOverloaded
 from app.core.config import settings
+from app.core.principal import Principal, principal_cache
+from app.core.query_budget import query_budget
+from app.services.metrics import record_new_user
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    email = verify_token(token, credentials_exception)
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    claims = verify_token_claims(token, credentials_exception)
+    user_id = claims.get("uid")
+    
+    principal = principal_cache.get(user_id) if user_id is not None else None
+    if principal is None:
+        # Tokens issued before uid/ver claims existed only carry the email
+        if user_id is not None:
+            user = await db.get(User, user_id)
+        else:
+            user = await db.scalar(select(User).where(User.email == claims["sub"]))
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.put(principal)
+    
+    if claims.get("ver", 0) != principal.token_version:
         raise credentials_exception
-    return user
+    return principal
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized. Admin access required.")
     return current_user
 
+def hasher_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts in progress, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=Token)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except HasherOverloaded:
+        raise hasher_busy()
+    
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
         full_name=user.full_name
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
+    await record_new_user(db, db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.email}, expires_delta=access_token_expires
+        data={"sub": db_user.email, "uid": db_user.id, "ver": db_user.token_version},
+        expires_delta=access_token_expires
     )
     
     return {
@@ -61,10 +93,15 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     }
 
 @router.post("/token", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    print("user", user)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    
+    try:
+        password_ok = user is not None and await password_hasher.verify(form_data.password, user.hashed_password)
+    except HasherOverloaded:
+        raise hasher_busy()
+    
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -73,7 +110,8 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id, "ver": user.token_version},
+        expires_delta=access_token_expires
     )
     
     return {
@@ -83,5 +121,6 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     }
 
 @router.get("/me", response_model=UserRead)
-def read_users_me(current_user: User = Depends(get_current_active_user)):
-    return current_user
\ No newline at end of file
+@query_budget(0)
+async def read_users_me(current_user: User = Depends(get_current_active_user)):
+    return current_user
@@ -1,41 +1,51 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from typing import List
-from app.database import get_db
+from app.database import get_async_db
 from app.models.cart import Cart, CartItem
 from app.models.product import Product
-from app.schemas.cart import CartRead, CartItemCreate, CartItemUpdate
+from app.schemas.cart import CartRead, CartItemCreate, CartItemUpdate, CartItemsPatch
 from app.routers.auth import get_current_active_user
 from app.models.user import User
+from app.core.query_budget import query_budget
+from app.core.cart_store import cart_store
+from app.services.carts import cart_response, stored_cart
 
 router = APIRouter()
 
-@router.get("/", response_model=CartRead)
-def get_cart(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+# Everything CartRead serializes; the async session can't lazy-load it later
+cart_read_options = selectinload(Cart.items).joinedload(CartItem.product).joinedload(Product.category)
+
+async def get_or_create_cart(db: AsyncSession, user_id: int, load_items: bool = False) -> Cart:
+    """Return the user's cart, creating it on first use"""
+    query = select(Cart).filter(Cart.user_id == user_id)
+    if load_items:
+        query = query.options(cart_read_options)
+    cart = await db.scalar(query)
     if not cart:
-        cart = Cart(user_id=current_user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
+        db.add(Cart(user_id=user_id))
+        await db.commit()
+        cart = await db.scalar(query)
     return cart
 
+@router.get("/", response_model=CartRead)
+@query_budget(2)
+async def get_cart(current_user: User = Depends(get_current_active_user), db: AsyncSession = Depends(get_async_db)):
+    if cart_store is not None:
+        return await cart_response(db, await stored_cart(db, cart_store, current_user.id))
+    return await get_or_create_cart(db, current_user.id, load_items=True)
+
 @router.post("/items")
-def add_to_cart(
+@query_budget(4)
+async def add_to_cart(
     item: CartItemCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Get or create cart
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart:
-        cart = Cart(user_id=current_user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
-    
     # Check if product exists
-    product = db.query(Product).filter(Product.id == item.product_id).first()
+    product = await db.get(Product, item.product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
@@ -43,11 +53,21 @@ def add_to_cart(
     if product.stock_quantity < item.quantity:
         raise HTTPException(status_code=400, detail="Insufficient stock")
     
+    if cart_store is not None:
+        await stored_cart(db, cart_store, current_user.id)
+        await cart_store.add(current_user.id, item.product_id, item.quantity)
+        return {"message": "Item added to cart"}
+    
+    # Get or create cart
+    cart = await get_or_create_cart(db, current_user.id)
+    
     # Check if item already in cart
-    cart_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == item.product_id
-    ).first()
+    cart_item = await db.scalar(
+        select(CartItem).filter(
+            CartItem.cart_id == cart.id,
+            CartItem.product_id == item.product_id
+        )
+    )
     
     if cart_item:
         cart_item.quantity += item.quantity
@@ -59,20 +79,92 @@ def add_to_cart(
         )
         db.add(cart_item)
     
-    db.commit()
+    await db.commit()
     return {"message": "Item added to cart"}
 
+@router.patch("/items", response_model=CartRead)
+@query_budget(8)
+async def update_cart_items(
+    patch: CartItemsPatch,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Set the quantity of several lines at once (0 removes one) and return the updated cart"""
+    # A later operation on the same product wins
+    quantities = {line.product_id: line.quantity for line in patch.items}
+    
+    # One query checks every product and its stock
+    products = {
+        row.id: row
+        for row in await db.execute(
+            select(Product.id, Product.name, Product.stock_quantity, Product.is_active).filter(
+                Product.id.in_(list(quantities))
+            )
+        )
+    }
+    missing = sorted(product_id for product_id, quantity in quantities.items() if quantity and product_id not in products)
+    if missing:
+        raise HTTPException(status_code=404, detail={"message": "Product not found", "product_ids": missing})
+    short = [
+        {"product_id": row.id, "name": row.name, "requested": quantities[row.id],
+         "available": row.stock_quantity if row.is_active else 0}
+        for row in products.values()
+        if quantities[row.id] > (row.stock_quantity if row.is_active else 0)
+    ]
+    if short:
+        raise HTTPException(status_code=400, detail={"message": "Insufficient stock", "lines": short})
+    
+    if cart_store is not None:
+        await stored_cart(db, cart_store, current_user.id)
+        await cart_store.set_lines(current_user.id, quantities)
+        return await cart_response(db, await cart_store.get(current_user.id))
+    
+    cart = await get_or_create_cart(db, current_user.id, load_items=True)
+    kept = set()
+    for cart_item in list(cart.items):
+        if cart_item.product_id not in quantities:
+            continue
+        if quantities[cart_item.product_id] and cart_item.product_id not in kept:
+            cart_item.quantity = quantities[cart_item.product_id]
+            kept.add(cart_item.product_id)
+        else:
+            cart.items.remove(cart_item)
+    for product_id, quantity in quantities.items():
+        if quantity and product_id not in kept:
+            cart.items.append(CartItem(product_id=product_id, quantity=quantity))
+    await db.commit()
+    
+    return await db.scalar(
+        select(Cart).options(cart_read_options).filter(Cart.id == cart.id)
+        .execution_options(populate_existing=True)
+    )
+
 @router.put("/items/{item_id}")
-def update_cart_item(
+@query_budget(2)
+async def update_cart_item(
     item_id: int,
     update: CartItemUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    cart_item = db.query(CartItem).join(Cart).filter(
-        CartItem.id == item_id,
-        Cart.user_id == current_user.id
-    ).first()
+    if cart_store is not None:
+        # Stored carts key their lines by product id
+        cart = await stored_cart(db, cart_store, current_user.id)
+        product = await db.get(Product, item_id) if item_id in cart.items else None
+        if not product:
+            raise HTTPException(status_code=404, detail="Cart item not found")
+        if product.stock_quantity < update.quantity:
+            raise HTTPException(status_code=400, detail="Insufficient stock")
+        if not await cart_store.set_quantity(current_user.id, item_id, update.quantity):
+            raise HTTPException(status_code=404, detail="Cart item not found")
+        return {"message": "Cart item updated"}
+    
+    cart_item = await db.scalar(
+        select(CartItem).join(Cart).options(joinedload(CartItem.product)).filter(
+            CartItem.id == item_id,
+            Cart.user_id == current_user.id
+        )
+    )
     
     if not cart_item:
         raise HTTPException(status_code=404, detail="Cart item not found")
@@ -82,34 +174,50 @@ def update_cart_item(
         raise HTTPException(status_code=400, detail="Insufficient stock")
     
     cart_item.quantity = update.quantity
-    db.commit()
+    await db.commit()
     return {"message": "Cart item updated"}
 
 @router.delete("/items/{item_id}")
-def remove_from_cart(
+@query_budget(2)
+async def remove_from_cart(
     item_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    cart_item = db.query(CartItem).join(Cart).filter(
-        CartItem.id == item_id,
-        Cart.user_id == current_user.id
-    ).first()
+    if cart_store is not None:
+        await stored_cart(db, cart_store, current_user.id)
+        if not await cart_store.remove(current_user.id, item_id):
+            raise HTTPException(status_code=404, detail="Cart item not found")
+        return {"message": "Item removed from cart"}
+    
+    cart_item = await db.scalar(
+        select(CartItem).join(Cart).filter(
+            CartItem.id == item_id,
+            Cart.user_id == current_user.id
+        )
+    )
     
     if not cart_item:
         raise HTTPException(status_code=404, detail="Cart item not found")
     
-    db.delete(cart_item)
-    db.commit()
+    await db.delete(cart_item)
+    await db.commit()
     return {"message": "Item removed from cart"}
 
 @router.delete("/")
-def clear_cart(
+@query_budget(2)
+async def clear_cart(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    if cart_store is not None:
+        # Seeded first, so the write-behind empties the rows too
+        await stored_cart(db, cart_store, current_user.id)
+        await cart_store.clear(current_user.id)
+        return {"message": "Cart cleared"}
+    
+    cart = await db.scalar(select(Cart).filter(Cart.user_id == current_user.id))
     if cart:
-        db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-        db.commit()
+        await db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
+        await db.commit()
     return {"message": "Cart cleared"}
\ No newline at end of file
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional, Tuple
+import re
+from app.core.cache import etag_matches
+from app.core.config import settings
+from app.core.storage import blob_store, media_type
+
+router = APIRouter()
+
+# <digest>.<ext> for an original, <digest>-<variant>.<format> for a rendered variant
+MEDIA_KEY = re.compile(r"^[0-9a-f]{64}(-[a-z]+)?\.[a-z0-9]+$")
+
+def byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) for a single `bytes=` Range, None to send everything; ValueError if it can't be satisfied"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        # Multiple ranges may be answered with the whole body
+        return None
+    first, dash, last = header[len("bytes="):].strip().partition("-")
+    if not dash or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:
+        # A suffix: the last N bytes
+        if int(last) == 0:
+            raise ValueError()
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise ValueError()
+    if start > end:
+        return None
+    return start, end
+
+@router.api_route("/{key}", methods=["GET", "HEAD"])
+async def get_media(
+    key: str,
+    request: Request,
+    range: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Serve an image blob; its key is its content hash, so it's cacheable forever"""
+    size = await blob_store.size(key) if MEDIA_KEY.match(key) else None
+    if size is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    
+    etag = f'"{key}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": settings.MEDIA_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    # If-Range: a range only applies to the version the client already holds part of
+    try:
+        span = byte_range(range, size) if not if_range or if_range == etag else None
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    status_code = 200
+    start, end = 0, size - 1
+    if span is not None:
+        status_code = 206
+        start, end = span
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    if request.method == "HEAD" or size == 0:
+        return Response(status_code=status_code, headers=headers, media_type=media_type(key))
+    return StreamingResponse(
+        blob_store.read(key, start, end), status_code=status_code, headers=headers, media_type=media_type(key)
+    )
\ No newline at end of file
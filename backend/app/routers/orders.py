@@ -1,50 +1,95 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List
-from app.database import get_db
+from app.database import get_async_db
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.cart import Cart, CartItem
+from app.models.product import Product
 from app.schemas.order import OrderCreate, OrderRead
 from app.routers.auth import get_current_active_user
+from app.core.cache import response_cache
+from app.core.inflight import checkouts
+from app.services.inventory import InsufficientStock, reserve_stock
+from app.services.metrics import record_order_placed
 from app.models.user import User
+from app.core.query_budget import query_budget
+from app.core.cart_store import cart_store
+from app.services.carts import stored_cart
 
 router = APIRouter()
 
+# Everything OrderRead serializes; the async session can't lazy-load it later
+order_read_options = selectinload(Order.items).joinedload(OrderItem.product).joinedload(Product.category)
+
 @router.get("/", response_model=List[OrderRead])
-def get_my_orders(
+@query_budget(2)
+async def get_my_orders(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    orders = db.query(Order).filter(Order.user_id == current_user.id).order_by(Order.created_at.desc()).all()
-    return orders
+    orders = await db.scalars(
+        select(Order).options(order_read_options).filter(
+            Order.user_id == current_user.id
+        ).order_by(Order.created_at.desc())
+    )
+    return orders.all()
 
 @router.get("/{order_id}", response_model=OrderRead)
-def get_order(
+@query_budget(2)
+async def get_order(
     order_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.user_id == current_user.id
-    ).first()
+    order = await db.scalar(
+        select(Order).options(order_read_options).filter(
+            Order.id == order_id,
+            Order.user_id == current_user.id
+        )
+    )
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
-@router.post("/", response_model=OrderRead)
-def create_order(
-    order_data: OrderCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    # Get user's cart
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart or not cart.items:
+async def place_order(order_data: OrderCreate, current_user: User, db: AsyncSession):
+    """Turn the user's cart into an order: reserve stock, write the order, empty the cart"""
+    # Get user's cart as (product id, quantity) lines
+    if cart_store is not None:
+        stored = await stored_cart(db, cart_store, current_user.id)
+        cart_id = stored.cart_id
+        lines = [(line.product_id, line.quantity) for line in stored.items.values()]
+    else:
+        cart = await db.scalar(
+            select(Cart).options(
+                selectinload(Cart.items).joinedload(CartItem.product)
+            ).filter(Cart.user_id == current_user.id)
+        )
+        items = cart.items if cart else []
+        cart_id = cart.id if cart else None
+        lines = [(item.product_id, item.quantity) for item in items]
+        prices = {item.product_id: item.product.price for item in items}
+    if not lines:
         raise HTTPException(status_code=400, detail="Cart is empty")
     
+    # Reserve stock for every line at once; any short line fails the whole order
+    quantities = {}
+    for product_id, quantity in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    try:
+        await reserve_stock(db, quantities)
+    except InsufficientStock as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail={"message": "Insufficient stock", "lines": e.lines})
+    
+    if cart_store is not None:
+        # Reserved products all exist; read the prices they sell at now
+        rows = await db.execute(select(Product.id, Product.price).filter(Product.id.in_(list(quantities))))
+        prices = dict(rows.all())
+    
     # Calculate total
-    total = sum(item.product.price * item.quantity for item in cart.items)
+    total = sum(prices[product_id] * quantity for product_id, quantity in lines)
     
     # Create order
     order = Order(
@@ -54,34 +99,43 @@ def create_order(
         payment_intent_id=order_data.payment_intent_id
     )
     db.add(order)
-    db.flush()
+    await db.flush()
     
-    # Create order items and update stock
-    for cart_item in cart.items:
-        # Check stock
-        if cart_item.product.stock_quantity < cart_item.quantity:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Insufficient stock for {cart_item.product.name}"
-            )
-        
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=cart_item.product_id,
-            quantity=cart_item.quantity,
-            price=cart_item.product.price
-        )
-        db.add(order_item)
-        
-        # Update stock
-        cart_item.product.stock_quantity -= cart_item.quantity
+    # Create order items in one executemany; their ids aren't needed here, so no per-row RETURNING
+    await db.execute(insert(OrderItem), [
+        {
+            "order_id": order.id,
+            "product_id": product_id,
+            "quantity": quantity,
+            "price": prices[product_id]
+        }
+        for product_id, quantity in lines
+    ])
+    await record_order_placed(db, order, sum(quantities.values()))
     
     # Clear cart
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+    await db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
     
-    db.commit()
-    db.refresh(order)
+    await db.commit()
+    if cart_store is not None:
+        await cart_store.clear(current_user.id)
+    # Product pages show exact stock; listings may lag by up to the cache TTL
+    await response_cache.invalidate(*[f"product:{product_id}" for product_id in quantities])
     
     # TODO: Send confirmation email
     
-    return order
\ No newline at end of file
+    return await db.scalar(
+        select(Order).options(order_read_options).filter(Order.id == order.id)
+        .execution_options(populate_existing=True)
+    )
+
+@router.post("/", response_model=OrderRead)
+@query_budget(9)
+async def create_order(
+    order_data: OrderCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # A checkout that has started finishes even if shutdown cancels the request;
+    # otherwise an order could commit without its write-behind cart being cleared
+    return await checkouts.run(place_order, order_data, current_user, db)
\ No newline at end of file
@@ -1,232 +1,319 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, and_
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload, raiseload
+from sqlalchemy import select, func
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_async_db, get_read_db
 from app.models.product import Product, Category, Review
 from app.models.user import User
 from app.schemas.product import (
-    ProductRead, ProductCreate, ProductUpdate, 
+    ProductRead, ProductCreate, ProductUpdate,
     CategoryRead, CategoryCreate, CategoryUpdate, ReviewRead, ReviewCreate,
     ProductDetailRead, ProductListResponse
 )
 from app.routers.auth import get_current_active_user, get_current_admin_user
-import shutil
-import uuid
-from pathlib import Path
-import os
+from app.core.cache import etag_for, etag_matches, response_cache, serialize
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_order, sort_value, split_page
+from app.services.category_counts import refresh_product_counts
+from app.services.images import image_files, queue_variants
+from app.services.media import blob_key, media_url, refresh_blob_refs, set_product_image, store_image
+from app.services.ratings import review_delta
+from app.services.search import apply_search
+from app.core.query_budget import query_budget
+from app.core.storage import blob_store
+from app.core.uploads import InvalidUpload, UploadTooLarge, receive_image, remove_file, staging_dir
+import anyio
 from datetime import datetime
 
 router = APIRouter()
 
+def json_response(
+    db: AsyncSession, body: bytes, cache_status: str, if_none_match: Optional[str], cache_control: str
+) -> Response:
+    """Rendered catalog JSON, or an empty 304 when the client already holds this body"""
+    etag = etag_for(body)
+    headers = {
+        "X-Cache": cache_status,
+        "ETag": etag,
+        # Someone who just wrote must not be served their old copy by the browser
+        "Cache-Control": "private, no-cache" if db.info.get("skip_response_cache") else cache_control,
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def cached_body(db: AsyncSession, key: str):
+    """Cached response for `key`, unless this reader must see their own fresh write"""
+    body = None if db.info.get("skip_response_cache") else await response_cache.get(key)
+    if body is None:
+        # Before the miss is read, so store_response can tell if a write invalidated it meanwhile
+        db.info["cache_miss_at"] = await response_cache.clock()
+    return body
+
+async def store_response(db: AsyncSession, key: str, schema, result, tags) -> bytes:
+    body = serialize(schema, result)
+    await response_cache.set(key, body, tags, db.info["cache_miss_at"], replica=db.info.get("replica", False))
+    return body
+
+async def load_review(db: AsyncSession, review_id: int) -> Review:
+    """Fetch a review together with the author ReviewRead serializes"""
+    return await db.scalar(
+        select(Review).options(joinedload(Review.user)).filter(Review.id == review_id)
+    )
+
 # Public endpoints
 @router.get("/", response_model=ProductListResponse)
-def get_products(
+@query_budget(2)
+async def get_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     category_id: Optional[int] = None,
     search: Optional[str] = None,
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
-    sort_by: Optional[str] = Query("created_at", regex="^(price|name|created_at|rating)$"),
+    sort_by: Optional[str] = Query("created_at", regex="^(price|name|created_at|rating|relevance)$"),
     order: Optional[str] = Query("desc", regex="^(asc|desc)$"),
     featured_only: bool = False,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; replaces skip"),
+    include_total: bool = Query(True, description="Set false to skip the COUNT over the filtered set"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # Base query with eager loading
-    query = db.query(Product).options(
-        joinedload(Product.category),
-        joinedload(Product.reviews)
-    ).filter(Product.is_active == True)
-    
     # Apply filters
+    filters = [Product.is_active == True]
+    
     if featured_only:
-        query = query.filter(Product.is_featured == True)
+        filters.append(Product.is_featured == True)
     
     if category_id:
-        query = query.filter(Product.category_id == category_id)
-    
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term)
-            )
-        )
+        filters.append(Product.category_id == category_id)
     
     if min_price is not None:
-        query = query.filter(Product.price >= min_price)
+        filters.append(Product.price >= min_price)
     
     if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+        filters.append(Product.price <= max_price)
+    
+    if sort_by == "relevance" and not search:
+        raise HTTPException(status_code=400, detail="sort_by=relevance requires a search term")
     
-    # Get total count before pagination
-    total = query.count()
+    cache_key = response_cache.key(
+        "products", skip=skip, limit=limit, category_id=category_id, search=search,
+        min_price=min_price, max_price=max_price, sort_by=sort_by, order=order,
+        featured_only=featured_only, cursor=cursor, include_total=include_total
+    )
+    cached = await cached_body(db, cache_key)
+    if cached is not None:
+        return json_response(db, cached, "HIT", if_none_match, settings.PRODUCT_LIST_CACHE_CONTROL)
+    
+    count_query = select(func.count(Product.id)).filter(*filters)
+    
+    # Page query: category is many-to-one so joining it can't multiply rows; rating
+    # aggregates live on Product, and reviews must never be pulled in for a listing
+    query = select(Product).options(
+        joinedload(Product.category),
+        raiseload(Product.reviews)
+    ).filter(*filters)
     
-    # Sorting
+    # Full-text search through the dialect's index (FTS5 / tsvector)
+    if search:
+        dialect = db.get_bind().dialect.name
+        count_query, _ = apply_search(count_query, search, dialect)
+        query, relevance = apply_search(query, search, dialect)
+    
+    # Get total count before pagination, without selecting anything but ids
+    total = await db.scalar(count_query) if include_total else None
+    
+    # Sorting, with id as tiebreaker so (sort column, id) is a stable keyset
     if sort_by == "rating":
-        # Subquery for average rating
-        avg_rating_subq = db.query(
-            Review.product_id,
-            func.avg(Review.rating).label('avg_rating')
-        ).group_by(Review.product_id).subquery()
-        
-        query = query.outerjoin(avg_rating_subq, Product.id == avg_rating_subq.c.product_id)
-        order_column = func.coalesce(avg_rating_subq.c.avg_rating, 0)
+        order_column = Product.average_rating
+    elif sort_by == "relevance":
+        order_column = relevance
     else:
         order_column = getattr(Product, sort_by)
     
-    if order == "desc":
-        query = query.order_by(order_column.desc())
+    query = query.order_by(*keyset_order(order_column, Product.id, order))
+    
+    # Apply pagination: seek past the cursor when given, otherwise fall back to offset
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, order)
+        value = sort_value(value, db.get_bind().dialect.name)
+        query = query.filter(keyset_filter(order_column, Product.id, order, value, last_id))
+        skip = 0
     else:
-        query = query.order_by(order_column.asc())
+        query = query.offset(skip)
     
-    # Apply pagination
-    products = query.offset(skip).limit(limit).all()
+    # The sort value rides along with each row so the cursor can be built from the last one
+    result = await db.execute(query.add_columns(order_column).limit(limit + 1))
+    rows, has_more = split_page(result.all(), limit)
+    products = [product for product, _ in rows]
     
-    # Calculate average ratings for each product
-    for product in products:
-        if product.reviews:
-            product.average_rating = sum(r.rating for r in product.reviews) / len(product.reviews)
-            product.review_count = len(product.reviews)
-        else:
-            product.average_rating = 0
-            product.review_count = 0
+    next_cursor = None
+    if has_more:
+        last_product, last_value = rows[-1]
+        next_cursor = encode_cursor(sort_by, order, last_value, last_product.id)
     
-    return {
+    result = {
         "data": products,
         "total": total,
         "skip": skip,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor
     }
+    # Any product change can reorder or refill a page; category renames show up in it too
+    tags = {"products"} | {f"category:{p.category_id}" for p in products if p.category_id}
+    if category_id:
+        tags.add(f"category:{category_id}")
+    body = await store_response(db, cache_key, ProductListResponse, result, tags)
+    return json_response(db, body, "MISS", if_none_match, settings.PRODUCT_LIST_CACHE_CONTROL)
 
 @router.get("/featured", response_model=List[ProductRead])
-def get_featured_products(
+@query_budget(1)
+async def get_featured_products(
     limit: int = Query(8, ge=1, le=20),
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get featured products for homepage"""
-    products = db.query(Product).filter(
-        Product.is_active == True,
-        Product.is_featured == True
-    ).order_by(Product.created_at.desc()).limit(limit).all()
-    
-    for product in products:
-        if product.reviews:
-            product.average_rating = sum(r.rating for r in product.reviews) / len(product.reviews)
-            product.review_count = len(product.reviews)
-        else:
-            product.average_rating = 0
-            product.review_count = 0
-    
-    return products
+    cache_key = response_cache.key("featured", limit=limit)
+    cached = await cached_body(db, cache_key)
+    if cached is not None:
+        return json_response(db, cached, "HIT", if_none_match, settings.FEATURED_CACHE_CONTROL)
+    
+    products = await db.scalars(
+        select(Product).options(
+            joinedload(Product.category),
+            raiseload(Product.reviews)
+        ).filter(
+            Product.is_active == True,
+            Product.is_featured == True
+        ).order_by(Product.created_at.desc()).limit(limit)
+    )
+    products = products.all()
+    
+    tags = {"featured"} | {f"product:{p.id}" for p in products}
+    tags |= {f"category:{p.category_id}" for p in products if p.category_id}
+    body = await store_response(db, cache_key, List[ProductRead], products, tags)
+    return json_response(db, body, "MISS", if_none_match, settings.FEATURED_CACHE_CONTROL)
 
 @router.get("/categories", response_model=List[CategoryRead])
-def get_categories(db: Session = Depends(get_db)):
-    """Get all active product categories with product count"""
-    categories = db.query(
-        Category,
-        func.count(Product.id).label('product_count')
-    ).outerjoin(
-        Product, and_(Product.category_id == Category.id, Product.is_active == True)
-    ).filter(
-        Category.is_active == True
-    ).group_by(Category.id).all()
-    
-    result = []
-    for category, count in categories:
-        category_dict = category.__dict__.copy()
-        category_dict['product_count'] = count
-        result.append(category_dict)
-    
-    return result
+@query_budget(1)
+async def get_categories(
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get all active product categories with their stored product count"""
+    cache_key = response_cache.key("categories")
+    cached = await cached_body(db, cache_key)
+    if cached is not None:
+        return json_response(db, cached, "HIT", if_none_match, settings.CATEGORY_LIST_CACHE_CONTROL)
+    
+    categories = await db.scalars(
+        select(Category).filter(Category.is_active == True)
+    )
+    
+    body = await store_response(db, cache_key, List[CategoryRead], categories.all(), {"categories"})
+    return json_response(db, body, "MISS", if_none_match, settings.CATEGORY_LIST_CACHE_CONTROL)
 
 @router.get("/categories/{category_id}", response_model=CategoryRead)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+@query_budget(1)
+async def get_category(category_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get single category details"""
-    category = db.query(Category).filter(
-        Category.id == category_id,
-        Category.is_active == True
-    ).first()
+    category = await db.scalar(
+        select(Category).filter(
+            Category.id == category_id,
+            Category.is_active == True
+        )
+    )
     
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    # Add product count
-    product_count = db.query(Product).filter(
-        Product.category_id == category_id,
-        Product.is_active == True
-    ).count()
-    
-    category.product_count = product_count
     return category
 
 @router.get("/{product_id}", response_model=ProductDetailRead)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+@query_budget(2)
+async def get_product(
+    product_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
     """Get single product with details and reviews"""
-    product = db.query(Product).options(
-        joinedload(Product.category),
-        joinedload(Product.reviews).joinedload(Review.user)
-    ).filter(
-        Product.id == product_id, 
-        Product.is_active == True
-    ).first()
+    cache_key = response_cache.key("product", id=product_id)
+    cached = await cached_body(db, cache_key)
+    if cached is not None:
+        return json_response(db, cached, "HIT", if_none_match, settings.PRODUCT_DETAIL_CACHE_CONTROL)
+    
+    product = await db.scalar(
+        select(Product).options(
+            joinedload(Product.category),
+            # Separate SELECT ... WHERE product_id IN (...) so the product row isn't repeated per review
+            selectinload(Product.reviews).joinedload(Review.user)
+        ).filter(
+            Product.id == product_id,
+            Product.is_active == True
+        )
+    )
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Calculate average rating
-    if product.reviews:
-        product.average_rating = sum(r.rating for r in product.reviews) / len(product.reviews)
-        product.review_count = len(product.reviews)
-    else:
-        product.average_rating = 0
-        product.review_count = 0
-    
     # Sort reviews by date
     product.reviews.sort(key=lambda x: x.created_at, reverse=True)
     
-    return product
+    tags = {f"product:{product.id}"}
+    if product.category_id:
+        tags.add(f"category:{product.category_id}")
+    body = await store_response(db, cache_key, ProductDetailRead, product, tags)
+    return json_response(db, body, "MISS", if_none_match, settings.PRODUCT_DETAIL_CACHE_CONTROL)
 
 @router.get("/{product_id}/reviews", response_model=List[ReviewRead])
-def get_product_reviews(
+@query_budget(1)
+async def get_product_reviews(
     product_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all reviews for a product with pagination"""
-    reviews = db.query(Review).options(
-        joinedload(Review.user)
-    ).filter(
-        Review.product_id == product_id
-    ).order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
+    reviews = await db.scalars(
+        select(Review).options(
+            joinedload(Review.user)
+        ).filter(
+            Review.product_id == product_id
+        ).order_by(Review.created_at.desc()).offset(skip).limit(limit)
+    )
     
-    return reviews
+    return reviews.all()
 
 # Authenticated user endpoints
 @router.post("/{product_id}/reviews", response_model=ReviewRead)
-def create_review(
+@query_budget(5)
+async def create_review(
     product_id: int,
     review_data: ReviewCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a review for a product"""
     # Check if product exists
-    product = db.query(Product).filter(
-        Product.id == product_id,
-        Product.is_active == True
-    ).first()
+    product = await db.scalar(
+        select(Product).filter(
+            Product.id == product_id,
+            Product.is_active == True
+        )
+    )
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Check if user already reviewed this product
-    existing_review = db.query(Review).filter(
-        Review.product_id == product_id,
-        Review.user_id == current_user.id
-    ).first()
+    existing_review = await db.scalar(
+        select(Review).filter(
+            Review.product_id == product_id,
+            Review.user_id == current_user.id
+        )
+    )
     
     if existing_review:
         raise HTTPException(status_code=400, detail="You have already reviewed this product")
@@ -238,25 +325,21 @@ def create_review(
         product_id=product_id
     )
     db.add(review)
-    db.commit()
-    db.refresh(review)
-    
-    # Load user relationship
-    review.user = current_user
+    await db.execute(review_delta(product_id, review_data.rating, 1))
+    await db.commit()
+    await response_cache.invalidate("products", f"product:{product_id}")
     
-    return review
+    return await load_review(db, review.id)
 
 @router.put("/reviews/{review_id}", response_model=ReviewRead)
-def update_review(
+async def update_review(
     review_id: int,
     review_data: ReviewCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update your own review"""
-    review = db.query(Review).filter(
-        Review.id == review_id
-    ).first()
+    review = await db.get(Review, review_id)
     
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
@@ -264,26 +347,22 @@ def update_review(
     if review.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this review")
     
+    await db.execute(review_delta(review.product_id, review_data.rating - review.rating))
     review.rating = review_data.rating
     review.comment = review_data.comment
-    db.commit()
-    db.refresh(review)
-    
-    # Load user relationship
-    review.user = current_user
+    await db.commit()
+    await response_cache.invalidate("products", f"product:{review.product_id}")
     
-    return review
+    return await load_review(db, review.id)
 
 @router.delete("/reviews/{review_id}")
-def delete_review(
+async def delete_review(
     review_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete your own review"""
-    review = db.query(Review).filter(
-        Review.id == review_id
-    ).first()
+    review = await db.get(Review, review_id)
     
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
@@ -292,147 +371,195 @@ def delete_review(
     if review.user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to delete this review")
     
-    db.delete(review)
-    db.commit()
+    await db.execute(review_delta(review.product_id, -review.rating, -1))
+    await db.delete(review)
+    await db.commit()
+    await response_cache.invalidate("products", f"product:{review.product_id}")
     
     return {"message": "Review deleted successfully"}
 
 # Admin endpoints
 @router.post("/", response_model=ProductRead)
-def create_product(
+async def create_product(
     product: ProductCreate,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new product (Admin only)"""
     # Verify category exists if provided
     if product.category_id:
-        category = db.query(Category).filter(Category.id == product.category_id).first()
+        category = await db.get(Category, product.category_id)
         if not category:
             raise HTTPException(status_code=400, detail="Invalid category ID")
+    if product.sku and await db.scalar(select(Product.id).filter(Product.sku == product.sku)):
+        raise HTTPException(status_code=400, detail="Product with this SKU already exists")
     
     db_product = Product(**product.dict())
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
-    
-    # Load relationships
-    if db_product.category_id:
-        db_product.category = category
+    await set_product_image(db, db_product, db_product.image)
+    await db.flush()
+    await db.execute(refresh_product_counts([db_product.category_id]))
+    await db.commit()
+    await response_cache.invalidate(
+        "products", "categories", f"category:{db_product.category_id}",
+        *(["featured"] if db_product.is_featured else [])
+    )
+    queue_variants(db_product)
     
-    db_product.average_rating = 0
-    db_product.review_count = 0
+    # Load relationships; async sessions can't lazy-load them during serialization
+    await db.refresh(db_product)
+    await db.refresh(db_product, ["category"])
+    if db_product.category is not None:
+        # Its product_count was recounted in SQL, behind the session's back
+        await db.refresh(db_product.category)
     
     return db_product
 
 @router.put("/{product_id}", response_model=ProductRead)
-def update_product(
+async def update_product(
     product_id: int,
     product: ProductUpdate,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a product (Admin only)"""
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+    db_product = await db.get(Product, product_id)
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Verify category exists if being updated
     if product.category_id is not None:
-        category = db.query(Category).filter(Category.id == product.category_id).first()
+        category = await db.get(Category, product.category_id)
         if not category:
             raise HTTPException(status_code=400, detail="Invalid category ID")
-    
-    for key, value in product.dict(exclude_unset=True).items():
+    if product.sku and await db.scalar(
+        select(Product.id).filter(Product.sku == product.sku, Product.id != product_id)
+    ):
+        raise HTTPException(status_code=400, detail="Product with this SKU already exists")
+    
+    old_category_id = db_product.category_id
+    changes = product.dict(exclude_unset=True)
+    image_changed = "image" in changes and changes["image"] != db_product.image
+    for key, value in changes.items():
         setattr(db_product, key, value)
-    
-    db.commit()
-    db.refresh(db_product)
-    
-    # Load relationships
-    if db_product.reviews:
-        db_product.average_rating = sum(r.rating for r in db_product.reviews) / len(db_product.reviews)
-        db_product.review_count = len(db_product.reviews)
-    else:
-        db_product.average_rating = 0
-        db_product.review_count = 0
+    if image_changed:
+        await set_product_image(db, db_product, db_product.image)
+    
+    await db.flush()
+    await db.execute(refresh_product_counts([old_category_id, db_product.category_id]))
+    await db.commit()
+    await response_cache.invalidate(
+        "products", "categories", f"product:{product_id}",
+        f"category:{old_category_id}", f"category:{db_product.category_id}",
+        *(["featured"] if "is_featured" in changes or "is_active" in changes or image_changed else [])
+    )
+    if image_changed:
+        queue_variants(db_product)
+    await db.refresh(db_product)
+    await db.refresh(db_product, ["category"])
+    if db_product.category is not None:
+        # Its product_count was recounted in SQL, behind the session's back
+        await db.refresh(db_product.category)
     
     return db_product
 
 @router.delete("/{product_id}")
-def delete_product(
+async def delete_product(
     product_id: int,
     permanent: bool = Query(False),
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a product (Admin only) - soft delete by default"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     if permanent:
         # Permanent delete
-        db.delete(product)
+        await db.delete(product)
     else:
         # Soft delete
         product.is_active = False
     
-    db.commit()
+    await db.flush()
+    await db.execute(refresh_product_counts([product.category_id]))
+    if permanent and product.image_blob is not None:
+        # Its blob is collected once no other product uses it
+        await db.execute(refresh_blob_refs([product.image_blob]))
+    await db.commit()
+    await response_cache.invalidate(
+        "products", "categories", "featured", f"product:{product_id}", f"category:{product.category_id}"
+    )
     
     return {"message": "Product deleted successfully", "permanent": permanent}
 
-@router.post("/{product_id}/upload-image")
+# The body is streamed by the handler itself, so describe it for the docs by hand
+IMAGE_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+@router.post("/{product_id}/upload-image", openapi_extra=IMAGE_UPLOAD_BODY)
 async def upload_product_image(
     product_id: int,
-    file: UploadFile = File(...),
+    request: Request,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload product image (Admin only)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    if not await db.scalar(select(Product.id).filter(Product.id == product_id)):
         raise HTTPException(status_code=404, detail="Product not found")
+    # Hand the connection back to the pool while the body streams in
+    await db.commit()
     
-    # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG, PNG, and WebP are allowed.")
-    
-    # Create uploads directory if it doesn't exist
-    upload_dir = Path("uploads/products")
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Delete old image if exists
-    if product.image:
-        old_path = Path(product.image.lstrip("/"))
-        if old_path.exists():
-            os.remove(old_path)
-    
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1]
-    file_name = f"{uuid.uuid4()}.{file_extension}"
-    file_path = upload_dir / file_name
+    try:
+        upload = await receive_image(request, await anyio.to_thread.run_sync(staging_dir), settings.MAX_IMAGE_UPLOAD_BYTES)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Image is larger than {settings.MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)} MB"
+        )
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Save file
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Stored by content hash, so uploading the same picture again stores nothing new
+    blob = await store_image(db, blob_store, upload)
+    product = await db.get(Product, product_id)
+    if not product:
+        # Deleted while the upload was in flight; the unreferenced blob is collected later
+        await db.commit()
+        raise HTTPException(status_code=404, detail="Product not found")
+    legacy_files = image_files(product.image, product.image_variants)
+    await set_product_image(db, product, media_url(blob_key(blob.digest, blob.extension)))
+    await db.commit()
+    await response_cache.invalidate("products", "featured", f"product:{product_id}")
+    queue_variants(product)
     
-    # Update product image URL
-    product.image = f"/uploads/products/{file_name}"
-    db.commit()
+    # A replaced /media/ image is left to garbage collection; a legacy /uploads/ one goes now
+    await anyio.to_thread.run_sync(lambda: [remove_file(path) for path in legacy_files])
     
     return {"image_url": product.image}
 
 @router.post("/categories", response_model=CategoryRead)
-def create_category(
+async def create_category(
     category: CategoryCreate,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new category (Admin only)"""
     # Check if category with same name exists
-    existing = db.query(Category).filter(Category.name == category.name).first()
+    existing = await db.scalar(select(Category).filter(Category.name == category.name))
     if existing:
         raise HTTPException(
             status_code=400,
@@ -441,28 +568,31 @@ def create_category(
     
     db_category = Category(**category.dict())
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await db.refresh(db_category)
+    await response_cache.invalidate("categories")
     return db_category
 
 @router.put("/categories/{category_id}", response_model=CategoryRead)
-def update_category(
+async def update_category(
     category_id: int,
     category: CategoryUpdate,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a category (Admin only)"""
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+    db_category = await db.get(Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
     
     # Check if new name conflicts with existing category
     if category.name and category.name != db_category.name:
-        existing = db.query(Category).filter(
-            func.lower(Category.name) == func.lower(category.name),
-            Category.id != category_id
-        ).first()
+        existing = await db.scalar(
+            select(Category).filter(
+                func.lower(Category.name) == func.lower(category.name),
+                Category.id != category_id
+            )
+        )
         if existing:
             raise HTTPException(status_code=400, detail="Category name already exists")
     
@@ -471,54 +601,52 @@ def update_category(
         setattr(db_category, key, value)
     
     db_category.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_category)
-    
-    # Add product count
-    product_count = db.query(Product).filter(
-        Product.category_id == category_id,
-        Product.is_active == True
-    ).count()
-    db_category.product_count = product_count
+    await db.commit()
+    await db.refresh(db_category)
+    await response_cache.invalidate("categories", f"category:{category_id}")
     
     return db_category
 
 @router.delete("/categories/{category_id}")
-def delete_category(
+async def delete_category(
     category_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a category (Admin only)"""
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+    db_category = await db.get(Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
     
     # Check if category has products
-    product_count = db.query(Product).filter(Product.category_id == category_id).count()
+    product_count = await db.scalar(
+        select(func.count(Product.id)).filter(Product.category_id == category_id)
+    )
     if product_count > 0:
         raise HTTPException(
             status_code=400,
             detail=f"Cannot delete category. {product_count} products are using this category."
         )
     
-    db.delete(db_category)
-    db.commit()
+    await db.delete(db_category)
+    await db.commit()
+    await response_cache.invalidate("categories", f"category:{category_id}")
     return {"message": "Category deleted successfully"}
 
 @router.put("/{product_id}/toggle-featured")
-def toggle_featured_product(
+async def toggle_featured_product(
     product_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Toggle product featured status (Admin only)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     product.is_featured = not product.is_featured
-    db.commit()
+    await db.commit()
+    await response_cache.invalidate("products", "featured", f"product:{product_id}")
     
     return {
         "id": product.id,
@@ -527,13 +655,13 @@ def toggle_featured_product(
     }
 
 @router.post("/{product_id}/restore")
-def restore_product(
+async def restore_product(
     product_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Restore a soft-deleted product (Admin only)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
@@ -541,6 +669,11 @@ def restore_product(
         raise HTTPException(status_code=400, detail="Product is already active")
     
     product.is_active = True
-    db.commit()
+    await db.flush()
+    await db.execute(refresh_product_counts([product.category_id]))
+    await db.commit()
+    await response_cache.invalidate(
+        "products", "categories", "featured", f"product:{product_id}", f"category:{product.category_id}"
+    )
     
     return {"message": "Product restored successfully"}
\ No newline at end of file
@@ -1,23 +1,29 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.user import UserRead
 from app.routers.auth import get_current_active_user
+from app.core.principal import principal_cache
+from app.core.query_budget import query_budget
 from typing import Optional
 router = APIRouter()
 
 @router.get("/me", response_model=UserRead)
-def read_users_me(current_user: User = Depends(get_current_active_user)):
+@query_budget(0)
+async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 @router.put("/me")
-def update_user_me(
+async def update_user_me(
     full_name: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    user = await db.get(User, current_user.id)
     if full_name:
-        current_user.full_name = full_name
-    db.commit()
-    return current_user
\ No newline at end of file
+        user.full_name = full_name
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.evict(user.id)
+    return user
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 from app.schemas.product import ProductRead
@@ -10,6 +10,14 @@ class CartItemCreate(BaseModel):
 class CartItemUpdate(BaseModel):
     quantity: int
 
+class CartLineSet(BaseModel):
+    product_id: int
+    # The line's new quantity, not an increment; 0 removes it
+    quantity: int = Field(..., ge=0)
+
+class CartItemsPatch(BaseModel):
+    items: List[CartLineSet] = Field(..., min_length=1, max_length=100)
+
 class CartItemRead(BaseModel):
     id: int
     product: ProductRead
@@ -30,4 +30,20 @@ class OrderRead(BaseModel):
     updated_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AdminOrderRead(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    user_email: Optional[str] = None
+    status: OrderStatus
+    total_amount: float
+    shipping_address: Optional[str] = None
+    payment_intent_id: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class AdminOrderListResponse(BaseModel):
+    data: List[AdminOrderRead]
+    limit: int
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, validator, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 class CategoryBase(BaseModel):
@@ -26,6 +26,7 @@ class CategoryRead(CategoryBase):
         from_attributes = True
 
 class ProductBase(BaseModel):
+    sku: Optional[str] = Field(None, min_length=1, max_length=64)
     name: str = Field(..., min_length=1, max_length=200)
     description: Optional[str] = None
     price: float = Field(..., gt=0)
@@ -38,6 +39,7 @@ class ProductCreate(ProductBase):
     pass
 
 class ProductUpdate(BaseModel):
+    sku: Optional[str] = Field(None, min_length=1, max_length=64)
     name: Optional[str] = Field(None, min_length=1, max_length=200)
     description: Optional[str] = None
     price: Optional[float] = Field(None, gt=0)
@@ -47,6 +49,11 @@ class ProductUpdate(BaseModel):
     is_featured: Optional[bool] = None
     is_active: Optional[bool] = None
 
+class ImageVariant(BaseModel):
+    url: str
+    width: int
+    height: int
+
 class ProductRead(ProductBase):
     id: int
     is_active: bool
@@ -55,6 +62,9 @@ class ProductRead(ProductBase):
     category: Optional[CategoryRead] = None
     average_rating: Optional[float] = 0
     review_count: Optional[int] = 0
+    # Resized copies of an uploaded image (thumb/card/detail), filled in shortly after the upload
+    image_variants: Optional[Dict[str, ImageVariant]] = None
+    image_srcset: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -92,9 +102,10 @@ class ProductDetailRead(ProductRead):
 
 class ProductListResponse(BaseModel):
     data: List[ProductRead]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
     
     class Config:
         from_attributes = True
\ No newline at end of file
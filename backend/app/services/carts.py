@@ -0,0 +1,97 @@
+import asyncio
+from typing import List
+from sqlalchemy import select, delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from app.core.cart_store import CartStore, StoredCart, StoredItem
+from app.database import AsyncSessionLocal
+from app.models.cart import Cart, CartItem
+from app.models.product import Product
+
+async def load_stored_cart(db: AsyncSession, user_id: int) -> StoredCart:
+    """The user's cart rows as a StoredCart, creating the carts row on first use"""
+    cart = await db.scalar(select(Cart).options(selectinload(Cart.items)).filter(Cart.user_id == user_id))
+    if not cart:
+        cart = Cart(user_id=user_id, items=[])
+        db.add(cart)
+        await db.commit()
+    
+    # The store keeps one line per product; older carts may hold several
+    items = {}
+    for item in sorted(cart.items, key=lambda item: item.id):
+        line = items.get(item.product_id)
+        if line is None:
+            items[item.product_id] = StoredItem(item.product_id, item.quantity, item.added_at or cart.created_at)
+        else:
+            items[item.product_id] = StoredItem(item.product_id, line.quantity + item.quantity, line.added_at)
+    return StoredCart(cart.id, cart.created_at, cart.updated_at or cart.created_at, items)
+
+async def stored_cart(db: AsyncSession, store: CartStore, user_id: int) -> StoredCart:
+    """The user's cart from the store, loaded from the database the first time it's needed"""
+    cart = await store.get(user_id)
+    if cart is None:
+        cart = await store.seed(user_id, await load_stored_cart(db, user_id))
+    return cart
+
+async def cart_response(db: AsyncSession, cart: StoredCart) -> dict:
+    """A stored cart shaped like CartRead; item ids are product ids"""
+    products = {
+        product.id: product
+        for product in await db.scalars(
+            select(Product).options(joinedload(Product.category)).filter(Product.id.in_(list(cart.items)))
+        )
+    } if cart.items else {}
+    return {
+        "id": cart.cart_id,
+        "created_at": cart.created_at,
+        "updated_at": cart.updated_at,
+        "items": [
+            {"id": line.product_id, "product": products[line.product_id], "quantity": line.quantity, "added_at": line.added_at}
+            for line in sorted(cart.items.values(), key=lambda line: line.added_at)
+            if line.product_id in products
+        ],
+    }
+
+async def persist_carts(store: CartStore, user_ids: List[int]) -> int:
+    """Write the stored carts of `user_ids` over their cart_items rows, in one transaction"""
+    carts = [cart for cart in [await store.get(user_id) for user_id in user_ids] if cart is not None]
+    if not carts:
+        return 0
+    
+    async with AsyncSessionLocal() as db:
+        product_ids = {product_id for cart in carts for product_id in cart.items}
+        # Products deleted since they were added would fail the foreign key
+        existing = set(await db.scalars(select(Product.id).filter(Product.id.in_(product_ids)))) if product_ids else set()
+        rows = [
+            {"cart_id": cart.cart_id, "product_id": line.product_id, "quantity": line.quantity, "added_at": line.added_at}
+            for cart in carts
+            for line in cart.items.values()
+            if line.product_id in existing
+        ]
+        await db.execute(delete(CartItem).where(CartItem.cart_id.in_([cart.cart_id for cart in carts])))
+        if rows:
+            await db.execute(insert(CartItem), rows)
+        await db.execute(update(Cart), [{"id": cart.cart_id, "updated_at": cart.updated_at} for cart in carts])
+        await db.commit()
+    store.count("persisted", len(carts))
+    return len(carts)
+
+async def flush_carts(store: CartStore, batch: int) -> int:
+    """Persist every cart changed since the last flush; failed batches are queued for the next one"""
+    persisted = 0
+    while True:
+        user_ids = await store.take_dirty(batch)
+        if not user_ids:
+            return persisted
+        try:
+            persisted += await persist_carts(store, user_ids)
+        except Exception:
+            await store.mark_dirty(user_ids)
+            store.count("persist_errors")
+            return persisted
+
+async def write_behind(store: CartStore, interval: float, batch: int):
+    """Background task flushing dirty carts every `interval` seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        await flush_carts(store, batch)
\ No newline at end of file
@@ -0,0 +1,20 @@
+from typing import Iterable, Optional
+from sqlalchemy import func, select, update
+from app.models.product import Category, Product
+
+def refresh_product_counts(category_ids: Optional[Iterable[Optional[int]]] = None):
+    """UPDATE recounting active products per category; flush and execute it in the product write's transaction.
+    
+    Recounting (through the category index) rather than adding deltas means a
+    refresh also repairs any drift in the categories it touches.
+    """
+    product_count = select(func.count(Product.id)).where(
+        Product.category_id == Category.id,
+        Product.is_active == True
+    ).scalar_subquery()
+    
+    # updated_at tracks edits to the category itself, not its product count
+    statement = update(Category).values(product_count=product_count, updated_at=Category.updated_at)
+    if category_ids is not None:
+        statement = statement.where(Category.id.in_({id for id in category_ids if id is not None}))
+    return statement.execution_options(synchronize_session=False)
\ No newline at end of file
@@ -0,0 +1,188 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+import anyio
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.storage import BlobStore, blob_store
+from app.core.uploads import staging_dir, upload_path
+from app.database import AsyncSessionLocal
+from app.models.media import Blob
+from app.models.product import Product
+from app.services.media import MEDIA_URL_PREFIX, blob_key, media_url, variant_key
+
+# Bounding box per variant; smaller sources are re-encoded at their own size, never enlarged
+VARIANTS = {"thumb": 160, "card": 480, "detail": 1200}
+
+def render_variants(source: str, directory: str, stem: str, format: str, quality: int) -> Dict[str, dict]:
+    """Resize `source` into every variant as `directory`/<stem>-<variant>.<format>; runs in a pool worker.
+    
+    The EXIF orientation is applied to the pixels, and none of the original's
+    EXIF, XMP or ICC data is written out.
+    """
+    from PIL import Image, ImageOps
+    
+    variants = {}
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        transparent = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if transparent else "RGB")
+        for name, size in VARIANTS.items():
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            file_name = variant_key(stem, name, format)
+            variant.save(os.path.join(directory, file_name), format.upper(), quality=quality)
+            variants[name] = {"file": file_name, "width": variant.width, "height": variant.height}
+    return variants
+
+def image_files(image: Optional[str], variants: Optional[dict]) -> List[Path]:
+    """The files behind a legacy /uploads/ image and its variants; /media/ blobs are collected instead"""
+    urls = [image] + [variant["url"] for variant in (variants or {}).values()]
+    return [path for path in map(upload_path, urls) if path is not None]
+
+class ImageJobs:
+    """Blobs whose variants need rendering, worked off on a local process pool.
+    
+    Jobs are per blob, so a picture shared by many products is rendered once and
+    every product using it gets the result. The queue is per process and not
+    persisted; anything lost on a restart is picked up by
+    scripts/generate_image_variants.py.
+    """
+    def __init__(self, store: BlobStore, workers: int, format: str, quality: int):
+        self.store = store
+        self.workers = workers
+        self.format = format
+        self.quality = quality
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumers: List[asyncio.Task] = []
+        self._queued: Set[str] = set()
+        self.completed = 0
+        self.failed = 0
+        self.stale = 0
+    
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    # spawn rather than fork: the server process already runs threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="images")
+            return self._executor
+    
+    def enqueue(self, digest: str):
+        """Queue a blob for rendering; the consumers start on first use, on the running loop"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._consumers = [asyncio.create_task(self._consume()) for _ in range(max(self.workers, 1))]
+        if digest not in self._queued:
+            self._queued.add(digest)
+            self._queue.put_nowait(digest)
+    
+    async def join(self):
+        """Wait until everything queued so far is rendered"""
+        if self._queue is not None:
+            await self._queue.join()
+    
+    async def _consume(self):
+        while True:
+            digest = await self._queue.get()
+            self._queued.discard(digest)
+            try:
+                await self._render(digest)
+            except Exception:
+                self.failed += 1
+            finally:
+                self._queue.task_done()
+    
+    async def _render(self, digest: str):
+        async with AsyncSessionLocal() as db:
+            blob = await db.get(Blob, digest)
+        if blob is None:
+            self.stale += 1
+            return
+    
+        staging = staging_dir()
+        directory = await anyio.to_thread.run_sync(lambda: tempfile.mkdtemp(dir=staging))
+        try:
+            async with self.store.local_file(blob_key(digest, blob.extension)) as source:
+                rendered = await asyncio.wrap_future(
+                    self._get_executor().submit(render_variants, str(source), directory, digest, self.format, self.quality)
+                )
+            for variant in rendered.values():
+                await self.store.put(variant["file"], Path(directory) / variant["file"])
+        finally:
+            await anyio.to_thread.run_sync(shutil.rmtree, directory, True)
+        variants = {
+            name: {"url": media_url(variant["file"]), "width": variant["width"], "height": variant["height"]}
+            for name, variant in rendered.items()
+        }
+    
+        async with AsyncSessionLocal() as db:
+            blob = await db.get(Blob, digest)
+            if blob is None:
+                # Collected while it was rendering
+                self.stale += 1
+                for variant in rendered.values():
+                    await self.store.delete(variant["file"])
+                return
+            previous, blob.variants = blob.variants, variants
+            product_ids = list(await db.scalars(
+                update(Product).where(Product.image_blob == digest).values(image_variants=variants).returning(Product.id)
+            ))
+            await db.commit()
+        await response_cache.invalidate("products", "featured", *[f"product:{id}" for id in product_ids])
+        # Variants in a previous IMAGE_VARIANT_FORMAT
+        current = {variant["file"] for variant in rendered.values()}
+        for variant in (previous or {}).values():
+            key = variant["url"][len(MEDIA_URL_PREFIX):]
+            if key not in current:
+                await self.store.delete(key)
+        self.completed += 1
+    
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "format": self.format,
+            "queued": len(self._queued),
+            "completed": self.completed,
+            "failed": self.failed,
+            "stale": self.stale,
+        }
+    
+    def shutdown(self):
+        for consumer in self._consumers:
+            consumer.cancel()
+        self._consumers, self._queue = [], None
+        self._queued.clear()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+image_jobs = ImageJobs(blob_store, settings.IMAGE_WORKERS, settings.IMAGE_VARIANT_FORMAT, settings.IMAGE_VARIANT_QUALITY)
+
+async def queue_missing_variants(db: AsyncSession) -> int:
+    """Queue every blob some product uses that has no variants yet, e.g. after a bulk import"""
+    digests = list(await db.scalars(select(Blob.digest).where(Blob.ref_count > 0, Blob.variants.is_(None))))
+    for digest in digests:
+        image_jobs.enqueue(digest)
+    return len(digests)
+
+def queue_variants(product: Product):
+    """Queue the blob behind a product's image unless its variants are already rendered"""
+    if product.image_blob is not None and not product.image_variants:
+        image_jobs.enqueue(product.image_blob)
\ No newline at end of file
@@ -0,0 +1,57 @@
+from typing import Dict, List
+from sqlalchemy import case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.product import Product
+
+class InsufficientStock(Exception):
+    """Some lines couldn't be reserved; the caller must roll back the ones that were"""
+    def __init__(self, lines: List[dict]):
+        super().__init__("Insufficient stock")
+        self.lines = lines
+
+def reserve_statement(quantities: Dict[int, int]):
+    """UPDATE taking `quantities[id]` units from each product that still has them.
+    
+    The stock check and the decrement are one conditional write, so concurrent
+    checkouts can't both pass the check and oversell.
+    """
+    quantity = case(quantities, value=Product.id)
+    return update(Product).where(
+        Product.id.in_(list(quantities)),
+        Product.is_active == True,
+        Product.stock_quantity >= quantity
+    ).values(
+        stock_quantity=Product.stock_quantity - quantity
+    ).execution_options(synchronize_session=False)
+
+async def reserve_stock(db: AsyncSession, quantities: Dict[int, int]):
+    """Reserve every line in the caller's transaction, or raise InsufficientStock naming each short line"""
+    if db.get_bind().dialect.update_returning:
+        # One statement for the whole cart; RETURNING says which lines went through
+        reserved = set(await db.scalars(reserve_statement(quantities).returning(Product.id)))
+    else:
+        reserved = set()
+        for product_id, quantity in quantities.items():
+            result = await db.execute(reserve_statement({product_id: quantity}))
+            if result.rowcount:
+                reserved.add(product_id)
+    
+    short = [product_id for product_id in quantities if product_id not in reserved]
+    if not short:
+        return
+    
+    rows = await db.execute(
+        select(Product.id, Product.name, Product.stock_quantity, Product.is_active).filter(Product.id.in_(short))
+    )
+    found = {row.id: row for row in rows}
+    lines = []
+    for product_id in short:
+        row = found.get(product_id)
+        # A product deleted since it was added to the cart has nothing left and no name
+        lines.append({
+            "product_id": product_id,
+            "name": row.name if row else None,
+            "requested": quantities[product_id],
+            "available": row.stock_quantity if row and row.is_active else 0,
+        })
+    raise InsufficientStock(lines)
\ No newline at end of file
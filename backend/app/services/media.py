@@ -0,0 +1,125 @@
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+import anyio
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.storage import BlobStore
+from app.core.uploads import ReceivedImage, remove_file
+from app.database import AsyncSessionLocal
+from app.models.media import Blob
+from app.models.product import Product
+
+MEDIA_URL_PREFIX = "/media/"
+MEDIA_URL = re.compile(r"^/media/([0-9a-f]{64})\.[a-z0-9]+$")
+
+# Per process, for /api/admin/system/media
+media_stats = {"stored": 0, "deduplicated": 0, "collected": 0, "gc_errors": 0}
+
+def blob_key(digest: str, extension: str) -> str:
+    return f"{digest}.{extension}"
+
+def variant_key(digest: str, variant: str, format: str) -> str:
+    return f"{digest}-{variant}.{format}"
+
+def media_url(key: str) -> str:
+    return f"{MEDIA_URL_PREFIX}{key}"
+
+def media_digest(url: Optional[str]) -> Optional[str]:
+    """The blob digest of an /media/ image URL; None for anything else"""
+    match = MEDIA_URL.match(url or "")
+    return match.group(1) if match else None
+
+def refresh_blob_refs(digests: Optional[Iterable[Optional[str]]] = None):
+    """UPDATE recounting the products using each blob; flush and execute it in the image write's transaction.
+    
+    Only blobs whose count actually changes are touched, so updated_at marks
+    when a blob last gained or lost a product.
+    """
+    ref_count = select(func.count(Product.id)).where(Product.image_blob == Blob.digest).scalar_subquery()
+    statement = update(Blob).values(ref_count=ref_count, updated_at=func.now()).where(Blob.ref_count != ref_count)
+    if digests is not None:
+        statement = statement.where(Blob.digest.in_({digest for digest in digests if digest is not None}))
+    return statement.execution_options(synchronize_session=False)
+
+async def store_image(db: AsyncSession, store: BlobStore, image: ReceivedImage) -> Blob:
+    """Store an upload under its digest (once, however often it's uploaded) and return its blob row.
+    
+    The row is added in the caller's transaction with no references; point a
+    product at it and refresh its refs before committing.
+    """
+    key = blob_key(image.digest, image.extension)
+    if await store.size(key) is None:
+        await store.put(key, image.path)
+        media_stats["stored"] += 1
+    else:
+        media_stats["deduplicated"] += 1
+    await anyio.to_thread.run_sync(remove_file, image.path)
+    
+    upsert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    await db.execute(
+        upsert(Blob)
+        .values(digest=image.digest, extension=image.extension, size=image.size)
+        .on_conflict_do_nothing(index_elements=[Blob.digest])
+    )
+    return await db.get(Blob, image.digest, populate_existing=True)
+
+async def set_product_image(db: AsyncSession, product: Product, image: Optional[str]):
+    """Point a product at an image URL, keeping image_blob, its variants and the blob refs in step.
+    
+    An /media/ URL takes the blob's variants if they're rendered already, so the
+    same picture used for many products is rendered once. Call queue_variants
+    after committing for the ones that aren't.
+    """
+    old_blob = product.image_blob
+    product.image = image
+    product.image_blob = None
+    product.image_variants = None
+    digest = media_digest(image)
+    if digest is not None:
+        blob = await db.get(Blob, digest)
+        if blob is not None:
+            product.image_blob = digest
+            product.image_variants = blob.variants
+    if old_blob != product.image_blob:
+        await db.flush()
+        await db.execute(refresh_blob_refs([old_blob, product.image_blob]))
+
+async def collect_garbage(store: BlobStore, grace_seconds: float, check_only: bool = False) -> dict:
+    """Delete blobs (and their variants) no product has used for `grace_seconds`.
+    
+    The grace period covers an upload that stores a blob while its row is being
+    collected: it has to be a blob orphaned that long, uploaded again during the
+    sweep. Counts are refreshed first, so drift can't keep a used blob eligible.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    orphaned = (Blob.ref_count == 0) & (Blob.updated_at < cutoff)
+    async with AsyncSessionLocal() as db:
+        await db.execute(refresh_blob_refs())
+        if check_only:
+            count, size = (await db.execute(select(func.count(Blob.digest), func.sum(Blob.size)).where(orphaned))).one()
+            await db.rollback()
+            return {"blobs": count, "bytes": size or 0}
+        collected = (await db.execute(
+            delete(Blob).where(orphaned).returning(Blob.digest, Blob.extension, Blob.size, Blob.variants)
+        )).all()
+        await db.commit()
+    
+    # Rows first, then files: a failure here leaves stray files, never a row without its file
+    for digest, extension, size, variants in collected:
+        await store.delete(blob_key(digest, extension))
+        for variant in (variants or {}).values():
+            await store.delete(variant["url"][len(MEDIA_URL_PREFIX):])
+    media_stats["collected"] += len(collected)
+    return {"blobs": len(collected), "bytes": sum(size for _, _, size, _ in collected)}
+
+async def collect_garbage_periodically(store: BlobStore, interval: float, grace_seconds: float):
+    """Background task collecting orphaned blobs every `interval` seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await collect_garbage(store, grace_seconds)
+        except Exception:
+            media_stats["gc_errors"] += 1
\ No newline at end of file
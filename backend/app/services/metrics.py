@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import select, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.metrics import MetricRollup
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.user import User
+
+GRANULARITIES = ("hour", "day", "total")
+STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+EPOCH = datetime(1970, 1, 1)
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return at.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    return EPOCH
+
+def status_column(status) -> str:
+    return f"orders_{OrderStatus(status).value}"
+
+STATUS_COLUMNS = [status_column(status) for status in OrderStatus]
+TOTAL_COLUMNS = ["revenue", "orders", "units_sold", "new_users"]
+
+def series_buckets(now: datetime, days: int, granularity: str) -> List[datetime]:
+    """Every bucket start in the last `days` days, oldest first, ending with the one holding `now`"""
+    step = STEPS[granularity]
+    count = days * 24 if granularity == "hour" else days
+    last = bucket_start(now, granularity)
+    return [last - step * n for n in range(count - 1, -1, -1)]
+
+def summarize(rows) -> dict:
+    """Counters summed over rollup rows, by-status counts grouped under orders_by_status"""
+    values = {name: sum(getattr(row, name) for row in rows) for name in TOTAL_COLUMNS}
+    values["revenue"] = round(values["revenue"], 2)
+    values["orders_by_status"] = {
+        status.value: sum(getattr(row, status_column(status)) for row in rows) for status in OrderStatus
+    }
+    return values
+
+def rollup_delta(dialect: str, at: datetime, **deltas):
+    """One upsert adding `deltas` (column=amount) to the hour, day and total buckets holding `at`.
+    
+    INSERT ... ON CONFLICT DO UPDATE adds to whatever the row holds at write
+    time, so concurrent writers never lose each other's updates. Returns None
+    when there's nothing to add.
+    """
+    deltas = {name: amount for name, amount in deltas.items() if amount}
+    if not deltas:
+        return None
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = insert(MetricRollup).values([
+        {"granularity": granularity, "bucket": bucket_start(at, granularity), **deltas}
+        for granularity in GRANULARITIES
+    ])
+    return statement.on_conflict_do_update(
+        index_elements=["granularity", "bucket"],
+        set_={name: getattr(MetricRollup, name) + getattr(statement.excluded, name) for name in deltas}
+    )
+
+async def apply(db: AsyncSession, statement):
+    if statement is not None:
+        await db.execute(statement)
+
+async def record_order_placed(db: AsyncSession, order: Order, units: int):
+    """Count a flushed order (created_at and status set) in the caller's transaction"""
+    await apply(db, rollup_delta(
+        db.get_bind().dialect.name, order.created_at,
+        orders=1, revenue=order.total_amount, units_sold=units, **{status_column(order.status): 1}
+    ))
+
+async def record_status_change(db: AsyncSession, order: Order, old_status):
+    """Move the order between status counts; cancelling gives back its revenue and units, un-cancelling restores them"""
+    old_status, new_status = OrderStatus(old_status), OrderStatus(order.status)
+    if old_status == new_status:
+        return
+    deltas = {status_column(old_status): -1, status_column(new_status): 1}
+    if OrderStatus.CANCELLED in (old_status, new_status):
+        sign = -1 if new_status == OrderStatus.CANCELLED else 1
+        units = await db.scalar(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).filter(OrderItem.order_id == order.id)
+        )
+        deltas.update(revenue=sign * order.total_amount, units_sold=sign * units)
+    await apply(db, rollup_delta(db.get_bind().dialect.name, order.created_at, **deltas))
+
+async def record_new_user(db: AsyncSession, user: User):
+    await apply(db, rollup_delta(db.get_bind().dialect.name, user.created_at, new_users=1))
\ No newline at end of file
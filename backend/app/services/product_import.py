@@ -0,0 +1,268 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, List, Optional, Tuple
+from pydantic import Field, ValidationError
+from sqlalchemy import bindparam, case, func, insert, null, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import response_cache
+from app.models.media import Blob
+from app.models.product import Category, Product
+from app.schemas.product import ProductCreate
+from app.services.category_counts import refresh_product_counts
+from app.services.media import media_digest, refresh_blob_refs
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+# What a feed row may overwrite on an existing SKU; reviews, is_active and created_at are left alone
+UPSERT_COLUMNS = ["name", "description", "price", "stock_quantity", "category_id", "image", "image_blob", "is_featured"]
+
+class ProductImportRow(ProductCreate):
+    """One feed row: a ProductCreate, optionally naming its category instead of giving category_id.
+    
+    An id (as exports carry) matters only without a SKU: the row then updates that product.
+    """
+    id: Optional[int] = Field(None, ge=1)
+    category: Optional[str] = Field(None, max_length=100)
+
+def export_query():
+    """Every product with its category name, in the column layout the importer reads back"""
+    return select(
+        Product.id,
+        Product.sku,
+        Product.name,
+        Product.description,
+        Product.price,
+        Product.stock_quantity,
+        Category.name.label("category"),
+        Product.image,
+        Product.is_featured,
+        Product.is_active,
+        Product.created_at,
+        Product.updated_at,
+    ).outerjoin(Category, Category.id == Product.category_id).order_by(Product.id)
+
+async def text_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream incrementally and split it into lines"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+async def text_records(chunks: AsyncIterator[bytes], format: str) -> AsyncIterator[Tuple[int, str]]:
+    """(line number, record) pairs, holding no more than one record in memory.
+    
+    A CSV record runs on across newlines while it has an unclosed quote.
+    """
+    record, quotes, start = "", 0, 1
+    line_number = 0
+    async for line in text_lines(chunks):
+        line_number += 1
+        record += line + "\n"
+        if format == "csv":
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+        yield start, record.rstrip("\r\n")
+        record, quotes, start = "", 0, line_number + 1
+    if record:
+        yield start, record.rstrip("\r\n")
+
+async def feed_rows(chunks: AsyncIterator[bytes], format: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(line number, raw row, parse error) for every data row of a CSV (with header) or NDJSON feed"""
+    header = None
+    async for line_number, record in text_records(chunks, format):
+        if not record.strip():
+            continue
+        if format == "ndjson":
+            try:
+                row = json.loads(record)
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, row, None
+            continue
+    
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, None, f"Expected {len(header)} fields, got {len(values)}"
+            continue
+        # Empty cells fall back to the schema defaults
+        yield line_number, {name: value for name, value in zip(header, values) if value != ""}, None
+
+def image_variants_kept(new_image):
+    """SET value for image_variants: rendered variants only survive if the image stays the same"""
+    return case((Product.image.is_not_distinct_from(new_image), Product.image_variants), else_=null())
+
+async def update_by_id(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """Update the products the rows name by id; rows giving the same fields share one executemany"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(frozenset(name for name in UPSERT_COLUMNS if name in row), []).append(row)
+    
+    connection = await db.connection()
+    for fields, group in groups.items():
+        if not fields:
+            continue
+        values = {name: bindparam(f"new_{name}") for name in fields}
+        if "image" in fields:
+            values["image_variants"] = image_variants_kept(bindparam("new_image"))
+        statement = (
+            update(Product.__table__)
+            .where(Product.id == bindparam("product_id"))
+            .values(**values, updated_at=func.now())
+        )
+        await connection.execute(
+            statement, [{"product_id": row["id"], **{f"new_{name}": row[name] for name in fields}} for row in group]
+        )
+    return [row["id"] for row in rows]
+
+async def write_batch(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """Upsert one chunk on sku in the caller's transaction; return product ids.
+    
+    Rows without a SKU update the product their id names, or are plain
+    INSERTs without one. Rows only carry the fields the feed gave, and an
+    existing product only has those overwritten. Rows giving the same fields
+    share one executemany.
+    """
+    # A SKU repeated within one statement can't be updated twice; the later row wins
+    keyed = {row["sku"]: {name: value for name, value in row.items() if name != "id"} for row in rows if row.get("sku")}
+    # Likewise an id; exports carry one, so re-importing products that have no SKU updates them in place
+    by_id = {row["id"]: row for row in rows if not row.get("sku") and row.get("id")}
+    groups = {}
+    for row in list(keyed.values()) + [row for row in rows if not row.get("sku") and not row.get("id")]:
+        groups.setdefault((bool(row.get("sku")), frozenset(row)), []).append(row)
+    
+    ids = await update_by_id(db, list(by_id.values()))
+    upsert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    for (has_sku, fields), group in groups.items():
+        if not has_sku:
+            ids += await db.scalars(insert(Product).returning(Product.id), group)
+            continue
+        statement = upsert(Product)
+        updates = {name: statement.excluded[name] for name in UPSERT_COLUMNS if name in fields}
+        if "image" in updates:
+            updates["image_variants"] = image_variants_kept(statement.excluded.image)
+        if updates:
+            statement = statement.on_conflict_do_update(
+                index_elements=[Product.sku], set_={**updates, "updated_at": func.now()}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=[Product.sku])
+        ids += await db.scalars(statement.returning(Product.id), group)
+    return ids
+
+async def import_products(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    format: str,
+    create_categories: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> dict:
+    """Validate and upsert a product feed chunk by chunk, committing each; returns counts and per-row errors.
+    
+    Empty CSV cells and absent NDJSON keys leave an existing product's field as it is.
+    """
+    categories = {name.casefold(): id for id, name in await db.execute(select(Category.id, Category.name))}
+    category_ids = set(categories.values())
+    report = {"rows": 0, "written": 0, "failed": 0, "errors": []}
+    
+    def fail(line_number: int, errors: List[str]):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_number, "errors": errors})
+    
+    async def flush(batch: List[Tuple[int, dict]]):
+        # A SKU-less row can only update a product that exists
+        named = {row["id"] for _, row in batch if row.get("id") and not row.get("sku")}
+        if named:
+            missing = named - set(await db.scalars(select(Product.id).where(Product.id.in_(named))))
+            for line_number, row in batch:
+                if row.get("id") in missing and not row.get("sku"):
+                    fail(line_number, [f"id: Unknown product {row['id']}"])
+            batch = [(line_number, row) for line_number, row in batch if row.get("id") not in missing or row.get("sku")]
+            if not batch:
+                return
+        try:
+            ids = await write_batch(db, [row for _, row in batch])
+            await db.commit()
+        except DBAPIError as e:
+            await db.rollback()
+            for line_number, _ in batch:
+                fail(line_number, [f"Database error in this row's batch: {e.orig}"])
+            return
+        report["written"] += len(batch)
+        await response_cache.invalidate(*[f"product:{id}" for id in ids])
+    
+    batch = []
+    async for line_number, raw, error in feed_rows(chunks, format):
+        report["rows"] += 1
+        if error:
+            fail(line_number, [error])
+            continue
+        try:
+            row = ProductImportRow.model_validate(raw)
+        except ValidationError as e:
+            fail(line_number, [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()])
+            continue
+    
+        values = row.model_dump(exclude_unset=True, exclude={"category"})
+        category_id = row.category_id
+        if row.category:
+            category_id = categories.get(row.category.casefold())
+            if category_id is None and create_categories:
+                category_id = await db.scalar(insert(Category).values(name=row.category).returning(Category.id))
+                # Committed now, so a failed product batch can't roll it back from under the map
+                await db.commit()
+                categories[row.category.casefold()] = category_id
+                category_ids.add(category_id)
+            elif category_id is None:
+                fail(line_number, [f"category: Unknown category {row.category!r}"])
+                continue
+        elif category_id is not None and category_id not in category_ids:
+            fail(line_number, [f"category_id: Unknown category {category_id}"])
+            continue
+    
+        if row.category:
+            values["category_id"] = category_id
+        if "image" in values:
+            # An /media/ URL reuses an uploaded blob; one that doesn't exist is unlinked at the end
+            values["image_blob"] = media_digest(values["image"])
+        batch.append((line_number, values))
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+    
+    # Recount every category and blob once, rather than per chunk
+    await db.execute(refresh_product_counts())
+    await db.execute(
+        update(Product)
+        .where(Product.image_blob.is_not(None), Product.image_blob.not_in(select(Blob.digest)))
+        .values(image_blob=None)
+    )
+    await db.execute(refresh_blob_refs())
+    # Products sharing an already rendered picture take its variants
+    await db.execute(
+        update(Product)
+        .where(Product.image_blob.is_not(None), Product.image_variants.is_(None))
+        .values(image_variants=select(Blob.variants).where(Blob.digest == Product.image_blob).scalar_subquery())
+    )
+    await db.commit()
+    await response_cache.invalidate("products", "featured", "categories", *[f"category:{id}" for id in category_ids])
+    return report
\ No newline at end of file
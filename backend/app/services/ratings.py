@@ -0,0 +1,27 @@
+from typing import Iterable, Optional
+from sqlalchemy import func, select, update
+from app.models.product import Product, Review
+
+def review_delta(product_id: int, rating_delta: int, count_delta: int = 0):
+    """UPDATE adjusting a product's review aggregates; execute it in the review's transaction.
+    
+    The increment is done in SQL so concurrent review writes can't lose updates.
+    """
+    return update(Product).where(Product.id == product_id).values(
+        rating_sum=Product.rating_sum + rating_delta,
+        review_count=Product.review_count + count_delta,
+    ).execution_options(synchronize_session=False)
+
+def recompute_rating_aggregates(product_ids: Optional[Iterable[int]] = None):
+    """UPDATE rebuilding rating_sum/review_count from the reviews table"""
+    rating_sum = select(func.coalesce(func.sum(Review.rating), 0)).where(
+        Review.product_id == Product.id
+    ).scalar_subquery()
+    review_count = select(func.count(Review.id)).where(
+        Review.product_id == Product.id
+    ).scalar_subquery()
+    
+    statement = update(Product).values(rating_sum=rating_sum, review_count=review_count)
+    if product_ids is not None:
+        statement = statement.where(Product.id.in_(list(product_ids)))
+    return statement.execution_options(synchronize_session=False)
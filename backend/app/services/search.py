@@ -0,0 +1,128 @@
+import re
+from sqlalchemy import Index, false, func, inspect, literal_column, select, table, column, text
+from app.models.product import Product
+
+# Only active products are indexed, so soft delete / restore add and remove index rows
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER products_fts_ai AFTER INSERT ON products WHEN new.is_active BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER products_fts_ad AFTER DELETE ON products WHEN old.is_active BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description, is_active ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        SELECT 'delete', old.id, old.name, old.description WHERE old.is_active;
+        INSERT INTO products_fts(rowid, name, description)
+        SELECT new.id, new.name, new.description WHERE new.is_active;
+    END""",
+]
+
+SQLITE_FTS_REBUILD = [
+    "INSERT INTO products_fts(products_fts) VALUES ('delete-all')",
+    "INSERT INTO products_fts(rowid, name, description) "
+    "SELECT id, name, description FROM products WHERE is_active",
+]
+
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS products_fts_ai",
+    "DROP TRIGGER IF EXISTS products_fts_ad",
+    "DROP TRIGGER IF EXISTS products_fts_au",
+    "DROP TABLE IF EXISTS products_fts",
+]
+
+# PostgreSQL keeps no extra table: an expression GIN index is maintained by the
+# database itself, and queries must use exactly the same expression to hit it
+PG_TS_CONFIG = "english"
+
+def _pg_document():
+    return func.setweight(
+        func.to_tsvector(PG_TS_CONFIG, func.coalesce(Product.name, "")), "A"
+    ).op("||")(
+        func.setweight(func.to_tsvector(PG_TS_CONFIG, func.coalesce(Product.description, "")), "B")
+    )
+
+pg_search_index = Index(
+    "ix_products_search",
+    _pg_document(),
+    postgresql_using="gin",
+    postgresql_where=Product.is_active == True,
+).ddl_if(dialect="postgresql")
+
+products_fts = table("products_fts", column("rowid"), column("name"), column("description"))
+
+def _tokens(term: str):
+    return re.findall(r"\w+", term.lower())
+
+def install_search_index(connection, rebuild: bool = False):
+    """Create the full-text index for the connection's dialect if it's missing.
+    
+    Safe to call on every startup; the index is populated from existing rows
+    when first created or when `rebuild` is set.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = inspect(connection).has_table("products_fts")
+        if not exists:
+            for statement in SQLITE_FTS_DDL:
+                connection.exec_driver_sql(statement)
+        if rebuild or not exists:
+            for statement in SQLITE_FTS_REBUILD:
+                connection.exec_driver_sql(statement)
+    elif dialect == "postgresql":
+        if rebuild:
+            pg_search_index.drop(connection, checkfirst=True)
+        pg_search_index.create(connection, checkfirst=True)
+
+def drop_search_index(connection):
+    if connection.dialect.name == "sqlite":
+        for statement in SQLITE_FTS_DROP:
+            connection.exec_driver_sql(statement)
+    elif connection.dialect.name == "postgresql":
+        pg_search_index.drop(connection, checkfirst=True)
+
+def apply_search(statement, term: str, dialect: str):
+    """Restrict a select() over Product to full-text matches of `term`.
+    
+    Every word is prefix-matched and all words must match. Returns the filtered
+    statement and a relevance expression where higher means a better match.
+    """
+    tokens = _tokens(term)
+    if not tokens:
+        return statement.where(false()), literal_column("0")
+    
+    if dialect == "sqlite":
+        match = " ".join(f'"{token}"*' for token in tokens)
+        hits = (
+            select(
+                products_fts.c.rowid.label("product_id"),
+                # bm25 is lower-is-better; weight name matches above description matches
+                (-func.bm25(literal_column("products_fts"), 10.0, 1.0)).label("relevance"),
+            )
+            .select_from(products_fts)
+            .where(text("products_fts MATCH :fts_query").bindparams(fts_query=match))
+            # LIMIT -1 stops SQLite flattening the subquery, so the MATCH always drives
+            # the join instead of a products index probing the FTS table row by row
+            .limit(-1)
+            .subquery()
+        )
+        statement = statement.join(hits, hits.c.product_id == Product.id)
+        return statement, hits.c.relevance
+    
+    if dialect == "postgresql":
+        ts_query = func.to_tsquery(PG_TS_CONFIG, " & ".join(f"{token}:*" for token in tokens))
+        document = _pg_document()
+        statement = statement.where(document.op("@@")(ts_query), Product.is_active == True)
+        return statement, func.ts_rank_cd(document, ts_query)
+    
+    # Other databases have no index support; keep the old substring behaviour
+    for token in tokens:
+        pattern = f"%{token}%"
+        statement = statement.where(Product.name.ilike(pattern) | Product.description.ilike(pattern))
+    return statement, literal_column("0")
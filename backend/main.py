@@ -2,23 +2,45 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import argparse
+import asyncio
 import uvicorn
 import os
 
-from app.database import create_db_and_tables, engine, Base
-from app.routers import auth, users, products, categories, cart, orders, admin
+from app.routers import auth, users, products, categories, cart, orders, admin, media
 from app.core.config import settings
-
-# Create tables
-Base.metadata.create_all(bind=engine)
+from app.core.hasher import password_hasher
+from app.core.inflight import checkouts
+from app.core.cart_store import cart_store
+from app.services.carts import flush_carts, write_behind
+from app.core.storage import blob_store
+from app.services.images import image_jobs
+from app.services.media import collect_garbage_periodically
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    create_db_and_tables()
+    # Startup; the schema and admin user are a deploy step, see scripts/migrate.py
+    if cart_store is not None:
+        cart_writer = asyncio.create_task(
+            write_behind(cart_store, settings.CART_WRITE_BEHIND_SECONDS, settings.CART_WRITE_BEHIND_BATCH)
+        )
+    media_collector = None
+    if settings.MEDIA_GC_INTERVAL_SECONDS > 0:
+        media_collector = asyncio.create_task(
+            collect_garbage_periodically(blob_store, settings.MEDIA_GC_INTERVAL_SECONDS, settings.MEDIA_GC_GRACE_SECONDS)
+        )
     yield
-    # Shutdown
-    pass
+    # Shutdown; checkouts cancelled by the graceful timeout are still finishing, and
+    # the carts they clear mustn't be flushed back first
+    await checkouts.drain(settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS)
+    if cart_store is not None:
+        cart_writer.cancel()
+        await flush_carts(cart_store, settings.CART_WRITE_BEHIND_BATCH)
+    if media_collector is not None:
+        media_collector.cancel()
+    password_hasher.shutdown()
+    image_jobs.shutdown()
+    await blob_store.close()
 
 app = FastAPI(
     title="ShopSwift API",
@@ -37,10 +59,10 @@ app.add_middleware(
 )
 
 # Create uploads directory if it doesn't exist
-os.makedirs("uploads/products", exist_ok=True)
+os.makedirs(os.path.join(settings.UPLOAD_DIR, "products"), exist_ok=True)
 
-# Mount static files
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Mount static files; new uploads are served from /media instead, see app/routers/media.py
+app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
@@ -50,6 +72,7 @@ app.include_router(categories.router, prefix="/api/categories", tags=["Categorie
 app.include_router(cart.router, prefix="/api/cart", tags=["Cart"])
 app.include_router(orders.router, prefix="/api/orders", tags=["Orders"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(media.router, prefix="/media", tags=["Media"])
 
 @app.get("/")
 async def root():
@@ -60,4 +83,10 @@ async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the database, then run the development server")
+    parser.add_argument("--skip-bootstrap", action="store_true", help="Don't create the admin user")
+    args = parser.parse_args()
+    
+    from scripts.migrate import migrate
+    migrate(bootstrap=not args.skip_bootstrap)
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,46 @@
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, func
+from app.database import SessionLocal
+from app.models import user, product, cart, order  # Import all models
+from app.models.product import Category, Product
+from app.services.category_counts import refresh_product_counts
+
+def find_drifted_categories(db):
+    """Return ids of categories whose stored product_count disagrees with the products table"""
+    rows = db.query(Category.id).outerjoin(
+        Product, and_(Product.category_id == Category.id, Product.is_active == True)
+    ).group_by(Category.id).having(
+        Category.product_count != func.count(Product.id)
+    ).all()
+    return [row.id for row in rows]
+
+def backfill_category_counts(check_only: bool = False):
+    """Recompute Category.product_count from active products"""
+    db = SessionLocal()
+    try:
+        drifted = find_drifted_categories(db)
+        print(f"Categories with stale product counts: {len(drifted)}")
+        if check_only or not drifted:
+            return
+    
+        updated = db.execute(refresh_product_counts(drifted)).rowcount
+        db.commit()
+        print(f"✓ Repaired {updated} categories")
+    except Exception as e:
+        print(f"\n✗ Error occurred: {type(e).__name__}: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill or repair category product counts")
+    parser.add_argument("--check", action="store_true", help="Only report drift, don't write")
+    args = parser.parse_args()
+    
+    print("=== Category Count Backfill ===")
+    backfill_category_counts(check_only=args.check)
\ No newline at end of file
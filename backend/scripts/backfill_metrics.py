@@ -0,0 +1,86 @@
+import sys
+import os
+import argparse
+from collections import defaultdict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, insert
+from app.database import SessionLocal
+from app.models import user, product, cart, order, metrics, media  # Import all models
+from app.models.metrics import MetricRollup
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.user import User
+from app.services.metrics import GRANULARITIES, STATUS_COLUMNS, TOTAL_COLUMNS, bucket_start, status_column
+
+COLUMNS = TOTAL_COLUMNS + STATUS_COLUMNS
+
+def compute_rollups(db) -> dict:
+    """(granularity, bucket) -> counters, rebuilt from orders, order items and users"""
+    rollups = defaultdict(lambda: dict.fromkeys(COLUMNS, 0))
+    def add(at, **deltas):
+        for granularity in GRANULARITIES:
+            counters = rollups[(granularity, bucket_start(at, granularity))]
+            for name, amount in deltas.items():
+                counters[name] += amount
+    
+    units = func.coalesce(func.sum(OrderItem.quantity), 0)
+    orders = db.query(Order.created_at, Order.status, Order.total_amount, units.label("units")).outerjoin(
+        OrderItem, OrderItem.order_id == Order.id
+    ).group_by(Order.id).yield_per(1000)
+    for row in orders:
+        status = row.status or OrderStatus.PENDING
+        kept = status != OrderStatus.CANCELLED
+        add(row.created_at, orders=1, revenue=row.total_amount if kept else 0,
+            units_sold=row.units if kept else 0, **{status_column(status): 1})
+    
+    for (created_at,) in db.query(User.created_at).yield_per(1000):
+        add(created_at, new_users=1)
+    return rollups
+
+def stored_rollups(db) -> dict:
+    return {
+        (row.granularity, row.bucket): {name: getattr(row, name) for name in COLUMNS}
+        for row in db.query(MetricRollup)
+    }
+
+def drifted(expected: dict, stored: dict) -> list:
+    empty = dict.fromkeys(COLUMNS, 0)
+    return [
+        key for key in set(expected) | set(stored)
+        if any(
+            abs(expected.get(key, empty)[name] - stored.get(key, empty)[name]) > 0.005
+            for name in COLUMNS
+        )
+    ]
+
+def backfill_metrics(check_only: bool = False):
+    """Rebuild metric_rollups from scratch; run while the shop is quiet, writes in between are overwritten"""
+    db = SessionLocal()
+    try:
+        expected = compute_rollups(db)
+        stale = drifted(expected, stored_rollups(db))
+        print(f"Rollup buckets: {len(expected)}, stale or missing: {len(stale)}")
+        if check_only or not stale:
+            return
+    
+        db.execute(delete(MetricRollup))
+        db.execute(insert(MetricRollup), [
+            {"granularity": granularity, "bucket": bucket, **counters}
+            for (granularity, bucket), counters in expected.items()
+        ])
+        db.commit()
+        print(f"✓ Rebuilt {len(expected)} rollup buckets")
+    except Exception as e:
+        print(f"\n✗ Error occurred: {type(e).__name__}: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild or verify the dashboard metric rollups")
+    parser.add_argument("--check", action="store_true", help="Only report drift, don't write")
+    args = parser.parse_args()
+    
+    print("=== Dashboard Metrics Backfill ===")
+    backfill_metrics(check_only=args.check)
\ No newline at end of file
@@ -0,0 +1,53 @@
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+from app.database import SessionLocal
+from app.models import user, product, cart, order  # Import all models
+from app.models.product import Product, Review
+from app.services.ratings import recompute_rating_aggregates
+
+def find_drifted_products(db):
+    """Return ids of products whose stored aggregates disagree with the reviews table"""
+    actual = db.query(
+        Review.product_id,
+        func.sum(Review.rating).label('rating_sum'),
+        func.count(Review.id).label('review_count')
+    ).group_by(Review.product_id).subquery()
+    
+    rows = db.query(Product.id).outerjoin(
+        actual, actual.c.product_id == Product.id
+    ).filter(
+        (Product.rating_sum != func.coalesce(actual.c.rating_sum, 0)) |
+        (Product.review_count != func.coalesce(actual.c.review_count, 0))
+    ).all()
+    return [row.id for row in rows]
+
+def backfill_ratings(check_only: bool = False):
+    """Recompute Product.rating_sum / Product.review_count from reviews"""
+    db = SessionLocal()
+    try:
+        drifted = find_drifted_products(db)
+        print(f"Products with stale rating aggregates: {len(drifted)}")
+        if check_only or not drifted:
+            return
+        
+        updated = db.execute(recompute_rating_aggregates(drifted)).rowcount
+        db.commit()
+        print(f"✓ Repaired {updated} products")
+    except Exception as e:
+        print(f"\n✗ Error occurred: {type(e).__name__}: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill or repair product rating aggregates")
+    parser.add_argument("--check", action="store_true", help="Only report drift, don't write")
+    args = parser.parse_args()
+    
+    print("=== Rating Aggregate Backfill ===")
+    backfill_ratings(check_only=args.check)
@@ -0,0 +1,133 @@
+import sys
+import os
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The backend is read at import time, so pick it before importing the app
+parser = argparse.ArgumentParser(description="Cart churn against the database or a write-behind cart store")
+parser.add_argument("--backend", choices=["database", "memory", "redis"], default="memory")
+parser.add_argument("--users", type=int, default=50)
+parser.add_argument("--ops", type=int, default=40, help="Cart changes per user")
+parser.add_argument("--seed", type=int, default=7)
+args = parser.parse_args()
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'carts.db')}"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["CART_STORE_BACKEND"] = args.backend
+
+import httpx
+from sqlalchemy import event
+from app.core.cart_store import cart_store
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.database import SessionLocal, async_engine, create_db_and_tables
+from app.models.user import User
+from app.models.product import Product
+from app.models.cart import Cart, CartItem
+from app.services.carts import flush_carts
+
+PRODUCTS = 20
+
+def seed(users: int):
+    db = SessionLocal()
+    try:
+        db.add_all([Product(name=f"Product {n}", price=1 + n, stock_quantity=10 ** 6) for n in range(PRODUCTS)])
+        shoppers = [User(email=f"shopper{n}@carts.shopswift.com", hashed_password="-") for n in range(users)]
+        db.add_all(shoppers)
+        db.commit()
+        return [create_access_token(data={"sub": u.email, "uid": u.id, "ver": 0}) for u in shoppers]
+    finally:
+        db.close()
+
+async def churn(client, token: str, ops: int, rng: random.Random):
+    """Add, change and remove lines like a shopper making up their mind"""
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.get("/api/cart/", headers=headers)
+    for _ in range(ops):
+        product_id = rng.randint(1, PRODUCTS)
+        action = rng.random()
+        if action < 0.6:
+            response = await client.post("/api/cart/items", json={"product_id": product_id, "quantity": 1}, headers=headers)
+        else:
+            cart = (await client.get("/api/cart/", headers=headers)).json()
+            if not cart["items"]:
+                continue
+            item = rng.choice(cart["items"])
+            if action < 0.85:
+                response = await client.put(f"/api/cart/items/{item['id']}", json={"quantity": rng.randint(1, 5)}, headers=headers)
+            else:
+                response = await client.delete(f"/api/cart/items/{item['id']}", headers=headers)
+        response.raise_for_status()
+
+async def run(tokens):
+    from main import app
+    if args.backend == "redis":
+        await cart_store._redis.flushdb()
+    counts = {"statements": 0, "commits": 0}
+    def statement(conn, cursor, statement, parameters, context, executemany):
+        counts["statements"] += 1
+    def commit(conn):
+        counts["commits"] += 1
+    event.listen(async_engine.sync_engine, "before_cursor_execute", statement)
+    event.listen(async_engine.sync_engine, "commit", commit)
+    
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://carts", timeout=120) as client:
+        # Warm the principal cache so only cart work is counted
+        for token in tokens:
+            await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+        counts.update(statements=0, commits=0)
+        start = time.perf_counter()
+        await asyncio.gather(*[churn(client, token, args.ops, random.Random(rng.random())) for token in tokens])
+        elapsed = time.perf_counter() - start
+    
+        during = dict(counts)
+        snapshot = None
+        if cart_store is not None:
+            snapshot = {}
+            for token in tokens:
+                cart = (await client.get("/api/cart/", headers={"Authorization": f"Bearer {token}"})).json()
+                snapshot[cart["id"]] = sorted((item["product"]["id"], item["quantity"]) for item in cart["items"])
+            await flush_carts(cart_store, settings.CART_WRITE_BEHIND_BATCH)
+    
+    event.remove(async_engine.sync_engine, "before_cursor_execute", statement)
+    event.remove(async_engine.sync_engine, "commit", commit)
+    await async_engine.dispose()
+    return elapsed, during, counts, snapshot
+
+def persisted_carts() -> dict:
+    db = SessionLocal()
+    try:
+        carts = {}
+        for item in db.query(CartItem).join(Cart):
+            carts.setdefault(item.cart_id, []).append((item.product_id, item.quantity))
+        return {cart_id: sorted(lines) for cart_id, lines in carts.items()}
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=== Cart Store Benchmark ===")
+    create_db_and_tables()
+    tokens = seed(args.users)
+    print(f"backend={args.backend}, {args.users} users x {args.ops} cart changes\n")
+    
+    elapsed, during, total, snapshot = asyncio.run(run(tokens))
+    requests = args.users * args.ops
+    print(f"Time:                {elapsed:.2f}s ({requests / elapsed:.0f} changes/s)")
+    print(f"Statements:          {during['statements']} ({during['statements'] / requests:.2f} per change)")
+    print(f"Commits:             {during['commits']}")
+    if snapshot is None:
+        sys.exit(0)
+    
+    print(f"Write-behind flush:  {total['statements'] - during['statements']} statements, "
+          f"{total['commits'] - during['commits']} commit(s)")
+    stored = {cart_id: lines for cart_id, lines in snapshot.items() if lines}
+    passed = persisted_carts() == stored
+    print(f"\n{'✓' if passed else '✗'} cart_items matches the store after the flush ({len(stored)} non-empty carts)")
+    sys.exit(0 if passed else 1)
\ No newline at end of file
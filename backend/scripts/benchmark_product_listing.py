@@ -0,0 +1,163 @@
+import sys
+import os
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure the queries, not the response cache
+os.environ.setdefault("RESPONSE_CACHE_BACKEND", "none")
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload
+from app.database import Base
+from app.models import user, product, cart, order  # Import all models
+from app.models.user import User
+from app.models.product import Product, Category, Review
+from app.schemas.product import ProductListResponse
+from app.routers.products import get_products
+from app.services.ratings import recompute_rating_aggregates
+
+class CountingCursor(sqlite3.Cursor):
+    """sqlite3 cursor that tallies every row handed back to SQLAlchemy"""
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            CountingConnection.rows_fetched += 1
+        return row
+    
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        CountingConnection.rows_fetched += len(rows)
+        return rows
+    
+    def fetchall(self):
+        rows = super().fetchall()
+        CountingConnection.rows_fetched += len(rows)
+        return rows
+
+class CountingConnection(sqlite3.Connection):
+    # Shared across connections: the async driver runs each one on its own thread
+    rows_fetched = 0
+    
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+def build_database(path: str, products: int, max_reviews: int, seed: int):
+    """Seed a throwaway SQLite file with a Pareto-skewed review distribution"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"email": "bench@example.com", "hashed_password": "x"}])
+        conn.execute(insert(Category), [{"name": f"Category {i}"} for i in range(10)])
+    
+        review_counts = [min(max_reviews, int(rng.paretovariate(1.1)) - 1) for _ in range(products)]
+        conn.execute(insert(Product), [
+            {
+                "name": f"Product {i}",
+                "price": round(rng.uniform(1, 500), 2),
+                "stock_quantity": 10,
+                "category_id": rng.randint(1, 10),
+                "is_active": True,
+                "is_featured": False,
+                "rating_sum": 0,
+                "review_count": 0,
+            }
+            for i in range(products)
+        ])
+    
+        batch = []
+        for product_id, count in enumerate(review_counts, start=1):
+            for _ in range(count):
+                batch.append({"rating": rng.randint(1, 5), "user_id": 1, "product_id": product_id})
+            if len(batch) >= 50000:
+                conn.execute(insert(Review), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Review), batch)
+        conn.execute(recompute_rating_aggregates())
+    engine.dispose()
+    
+    return sum(review_counts), max(review_counts)
+
+def legacy_query(db, skip: int, limit: int, sort_by: str):
+    """The pre-rework listing: joined reviews collection plus a Python-side average"""
+    query = db.query(Product).options(
+        joinedload(Product.category),
+        joinedload(Product.reviews)
+    ).filter(Product.is_active == True)
+    total = query.count()
+    products = query.order_by(getattr(Product, sort_by).desc()).offset(skip).limit(limit).all()
+    for p in products:
+        ratings = [r.rating for r in p.reviews]
+        p.__dict__["average_rating"] = sum(ratings) / len(ratings) if ratings else 0
+    return {"data": products, "total": total, "skip": skip, "limit": limit}
+
+async def legacy_listing(db, skip: int, limit: int, sort_by: str):
+    return await db.run_sync(legacy_query, skip, limit, sort_by)
+
+async def current_listing(db, skip: int, limit: int, sort_by: str):
+    response = await get_products(
+        skip=skip, limit=limit, category_id=None, search=None, min_price=None,
+        max_price=None, sort_by=sort_by, order="desc", featured_only=False,
+        cursor=None, include_total=True, if_none_match=None, db=db
+    )
+    return json.loads(response.body)
+
+async def measure(path: str, listing, pages: int, limit: int, sort_by: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"factory": CountingConnection})
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    statements = []
+    def count_statement(*args):
+        statements.append(1)
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    
+    latencies, rows, round_trips = [], [], []
+    for page in range(pages):
+        async with Session() as db:
+            await db.connection()
+            CountingConnection.rows_fetched = 0
+            statements.clear()
+    
+            start = time.perf_counter()
+            ProductListResponse.model_validate(await listing(db, page * limit, limit, sort_by))
+            latencies.append((time.perf_counter() - start) * 1000)
+            rows.append(CountingConnection.rows_fetched)
+            round_trips.append(len(statements))
+    
+    event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+    await engine.dispose()
+    return latencies, rows, round_trips
+
+def report(name: str, latencies, rows, round_trips):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    print(f"{name:<10} median {statistics.median(latencies):8.2f} ms   p95 {p95:8.2f} ms   "
+          f"rows/page avg {statistics.mean(rows):9.1f} max {max(rows):7d}   "
+          f"queries/page max {max(round_trips)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark GET /api/products/ against a skewed review distribution")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--max-reviews", type=int, default=5000, help="Cap on reviews for the most-reviewed product")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--sort-by", default="price", choices=["price", "name", "created_at"])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    print("=== Product Listing Benchmark ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        total_reviews, top = build_database(path, args.products, args.max_reviews, args.seed)
+        print(f"Seeded {args.products} products, {total_reviews} reviews (most-reviewed product: {top})\n")
+    
+        report("legacy", *asyncio.run(measure(path, legacy_listing, args.pages, args.limit, args.sort_by)))
+        report("current", *asyncio.run(measure(path, current_listing, args.pages, args.limit, args.sort_by)))
@@ -0,0 +1,116 @@
+import sys
+import os
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure the queries, not the response cache
+os.environ.setdefault("RESPONSE_CACHE_BACKEND", "none")
+
+from sqlalchemy import create_engine, func, insert, or_
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.database import Base
+from app.models import user, product, cart, order  # Import all models
+from app.models.product import Product
+from app.routers.products import get_products
+from app.services.search import install_search_index
+
+ADJECTIVES = ["red", "blue", "wireless", "organic", "vintage", "compact", "premium", "rugged",
+              "smart", "classic", "portable", "ergonomic", "waterproof", "leather", "bamboo"]
+NOUNS = ["headphones", "backpack", "kettle", "jacket", "keyboard", "lamp", "sneakers", "blender",
+         "tent", "watch", "camera", "notebook", "speaker", "mattress", "bicycle", "charger"]
+
+def make_vocabulary(rng, size: int):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)]
+
+def build_database(path: str, products: int, seed: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, 5000) + NOUNS
+    
+    with engine.begin() as conn:
+        install_search_index(conn)
+        for start in range(0, products, 20000):
+            conn.execute(insert(Product), [
+                {
+                    "name": f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS).title()} {i}",
+                    "description": " ".join(rng.choice(vocabulary) for _ in range(rng.randint(20, 60))),
+                    "price": round(rng.uniform(1, 500), 2),
+                    "stock_quantity": 10,
+                    "is_active": True,
+                    "is_featured": False,
+                    "rating_sum": 0,
+                    "review_count": 0,
+                }
+                for i in range(start, min(start + 20000, products))
+            ])
+    engine.dispose()
+
+def ilike_query(db, term: str, limit: int):
+    """The previous implementation: substring match over name and description"""
+    pattern = f"%{term}%"
+    query = db.query(Product).filter(
+        Product.is_active == True,
+        or_(Product.name.ilike(pattern), Product.description.ilike(pattern))
+    )
+    total = db.query(func.count(Product.id)).filter(
+        Product.is_active == True,
+        or_(Product.name.ilike(pattern), Product.description.ilike(pattern))
+    ).scalar()
+    return total, query.order_by(Product.created_at.desc()).limit(limit).all()
+
+async def ilike_search(db, term: str, limit: int):
+    return await db.run_sync(ilike_query, term, limit)
+
+async def indexed_search(db, term: str, limit: int, sort_by: str = "created_at"):
+    response = await get_products(
+        skip=0, limit=limit, category_id=None, search=term, min_price=None,
+        max_price=None, sort_by=sort_by, order="desc", featured_only=False,
+        cursor=None, include_total=True, if_none_match=None, db=db
+    )
+    result = json.loads(response.body)
+    return result["total"], result["data"]
+
+async def measure(path: str, search, terms, repeats: int, **kwargs):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    latencies = []
+    for _ in range(repeats):
+        for term in terms:
+            async with Session() as db:
+                start = time.perf_counter()
+                await search(db, term, 20, **kwargs)
+                latencies.append((time.perf_counter() - start) * 1000)
+    await engine.dispose()
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ILIKE search with the full-text index")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    
+    terms = ["headphones", "wireless head", "bamboo lamp", "kett", "waterproof jacket"]
+    
+    print("=== Product Search Benchmark ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, args.products, args.seed)
+        print(f"Seeded and indexed {args.products} products in {time.perf_counter() - start:.1f}s\n")
+    
+        for name, search, kwargs in [
+            ("ILIKE", ilike_search, {}),
+            ("FTS newest", indexed_search, {}),
+            ("FTS ranked", indexed_search, {"sort_by": "relevance"}),
+        ]:
+            median, p95 = asyncio.run(measure(path, search, terms, args.repeats, **kwargs))
+            print(f"{name:<12} median {median:9.2f} ms   p95 {p95:9.2f} ms")
@@ -0,0 +1,156 @@
+import sys
+import os
+import argparse
+import asyncio
+import http.client
+import multiprocessing
+import re
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PATHS = ["/health", "/api/products/?limit=20", "/api/products/1"]
+
+CONTENT_LENGTH = re.compile(rb"content-length:\s*(\d+)", re.IGNORECASE)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def healthy(port: int) -> bool:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+    try:
+        connection.request("GET", "/health")
+        return connection.getresponse().status == 200
+    except OSError:
+        return False
+    finally:
+        connection.close()
+
+def seed(env):
+    """Migrate a fresh database and fill the catalog"""
+    subprocess.run(
+        [sys.executable, "scripts/migrate.py"], cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL
+    )
+    code = (
+        "from app.database import SessionLocal\n"
+        "from app.models.product import Product\n"
+        "db = SessionLocal()\n"
+        "db.add_all([Product(name=f'Product {n}', description='Benchmark product', price=5 + n, "
+        "stock_quantity=100) for n in range(200)])\n"
+        "db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, check=True)
+
+async def keep_alive_connection(port: int, path: str, deadline: float, latencies, errors):
+    """One client connection issuing GETs back to back until the deadline"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = f"GET {path} HTTP/1.1\r\nHost: benchmark\r\n\r\n".encode()
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            await reader.readexactly(int(CONTENT_LENGTH.search(head).group(1)))
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n", 1)[0])
+    finally:
+        writer.close()
+
+def client_process(job):
+    """A load generator process; a plain asyncio client keeps its own overhead small"""
+    port, path, connections, seconds = job
+    latencies, errors = [], []
+    
+    async def main():
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*[keep_alive_connection(port, path, deadline, latencies, errors) for _ in range(connections)])
+    
+    asyncio.run(main())
+    return latencies, len(errors)
+
+def load(pool, port: int, path: str, clients: int, connections: int, seconds: float):
+    start = time.perf_counter()
+    results = pool.map(client_process, [(port, path, connections, seconds)] * clients)
+    elapsed = time.perf_counter() - start
+    latencies = sorted(l for result, _ in results for l in result)
+    errors = sum(e for _, e in results)
+    return len(latencies) / elapsed, latencies, errors
+
+def start_server(command, env, port: int) -> subprocess.Popen:
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while not healthy(port):
+        if server.poll() is not None:
+            raise RuntimeError(f"{' '.join(command)} exited during startup")
+        time.sleep(0.05)
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of serve.py against the development entry point (main.py)")
+    parser.add_argument("--workers", type=int, default=None, help="serve.py workers (default: one per CPU)")
+    parser.add_argument("--clients", type=int, default=2, help="Load generator processes")
+    parser.add_argument("--connections", type=int, default=32, help="Keep-alive connections per client process")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration per endpoint")
+    parser.add_argument("--path", action="append", help="Endpoint to load (repeatable)")
+    args = parser.parse_args()
+    paths = args.path or DEFAULT_PATHS
+    
+    print("=== Server Throughput Benchmark ===")
+    from serve import available_cpus
+    workers = args.workers or available_cpus()
+    print(f"{available_cpus()} CPUs available; load from {args.clients} processes x {args.connections} connections")
+    if available_cpus() <= args.clients:
+        print("  (the load generator shares the CPUs with the server, so absolute numbers are pessimistic)")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'server.db')}",
+            UPLOAD_DIR=os.path.join(tmp, "uploads"),
+            PASSWORD_HASH_WORKERS="0",
+            IMAGE_WORKERS="0",
+            CART_STORE_BACKEND="database",
+        )
+        seed(env)
+    
+        port = free_port()
+        # main.py's __main__ runs exactly this: uvicorn's auto loop/http, one process, --reload
+        targets = [
+            ("main.py (uvicorn --reload, 1 worker)",
+             [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--reload"], {}),
+            (f"serve.py ({workers} worker{'s' if workers > 1 else ''}, asyncio/h11)",
+             [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers)],
+             {"SERVER_LOOP": "asyncio", "SERVER_HTTP": "h11"}),
+            (f"serve.py ({workers} worker{'s' if workers > 1 else ''}, uvloop/httptools)",
+             [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers)], {}),
+        ]
+    
+        results = {}
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            for name, command, overrides in targets:
+                server = start_server(command, dict(env, **overrides), port)
+                try:
+                    print(f"\n{name}")
+                    for path in paths:
+                        load(pool, port, path, args.clients, args.connections, 1)  # Warm-up
+                        rate, latencies, errors = load(pool, port, path, args.clients, args.connections, args.seconds)
+                        results[(name, path)] = rate
+                        p50 = statistics.median(latencies) * 1000
+                        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+                        print(f"  {path:28} {rate:8.0f} req/s   p50 {p50:6.1f} ms   p99 {p99:6.1f} ms"
+                              + (f"   ✗ {errors} non-200" if errors else ""))
+                finally:
+                    server.terminate()
+                    server.wait()
+    
+        baseline, tuned = targets[0][0], targets[-1][0]
+        print("\nserve.py vs main.py:")
+        for path in paths:
+            print(f"  {path:28} {results[(tuned, path)] / results[(baseline, path)]:5.2f}x")
\ No newline at end of file
@@ -0,0 +1,92 @@
+import sys
+import os
+import argparse
+import http.client
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def healthy(port: int) -> bool:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+    try:
+        connection.request("GET", "/health")
+        return connection.getresponse().status == 200
+    except OSError:
+        return False
+    finally:
+        connection.close()
+
+def timed_run(command, env) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def cold_start(env, workers: int) -> float:
+    """Seconds from launching uvicorn to its first healthy response"""
+    port = free_port()
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers)]
+    start = time.perf_counter()
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while not healthy(port):
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup; is the database migrated?")
+            time.sleep(0.005)
+        return time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+def summary(samples) -> str:
+    return f"median {statistics.median(samples) * 1000:7.0f} ms   min {min(samples) * 1000:7.0f} ms   max {max(samples) * 1000:7.0f} ms"
+
+def legacy_startup_work(database_url: str):
+    """What each worker used to do on startup: create_all and, for a missing admin, a bcrypt hash"""
+    os.environ["DATABASE_URL"] = database_url
+    from sqlalchemy import create_engine
+    from app.database import Base
+    from app.models import user, product, cart, order, metrics, media  # Import all models
+    from app.core.security import get_password_hash
+    engine = create_engine(database_url)
+    start = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    create_all = time.perf_counter() - start
+    engine.dispose()
+    start = time.perf_counter()
+    get_password_hash("benchmark")
+    return create_all, time.perf_counter() - start, len(Base.metadata.tables)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold starts of the API: import, first healthy response, migrations")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn --workers for the cold starts")
+    args = parser.parse_args()
+    
+    print("=== Startup Benchmark ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        env = dict(os.environ, DATABASE_URL=database_url, UPLOAD_DIR=os.path.join(tmp, "uploads"))
+    
+        migrate = [sys.executable, "scripts/migrate.py"]
+        print(f"Deploy step, new database:      {timed_run(migrate, env) * 1000:7.0f} ms (migrations + admin user)")
+        print(f"Deploy step, up to date:        {timed_run(migrate + ['--skip-bootstrap'], env) * 1000:7.0f} ms\n")
+    
+        imports = [timed_run([sys.executable, "-c", "import main"], env) for _ in range(args.runs)]
+        print(f"import main                     {summary(imports)}")
+        starts = [cold_start(env, args.workers) for _ in range(args.runs)]
+        print(f"first /health ({args.workers} worker{'s' if args.workers > 1 else ''})       {summary(starts)}\n")
+    
+        create_all, bcrypt, tables = legacy_startup_work(database_url)
+        print("No longer done by each worker on startup:")
+        print(f"  create_all over {tables} tables:  {create_all * 1000:7.1f} ms (one round trip per table on a server database)")
+        print(f"  admin password hash:          {bcrypt * 1000:7.1f} ms (whenever the admin user was missing)")
\ No newline at end of file
@@ -0,0 +1,81 @@
+import sys
+import os
+import argparse
+import asyncio
+import json
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import AsyncSessionLocal, async_engine
+from app.models import user, product, cart, order, metrics, media  # Import all models
+from app.routers.admin import export_rows
+from app.services.product_import import IMPORT_BATCH_SIZE, export_query, import_products
+
+CHUNK_SIZE = 1 << 16
+
+def feed_format(path: str, format: str) -> str:
+    if format:
+        return format
+    return "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+
+async def file_chunks(path: str):
+    """The feed in fixed-size chunks, so a 200k-row file is never read whole"""
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while chunk := stream.read(CHUNK_SIZE):
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+async def run_import(args) -> int:
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        report = await import_products(
+            db, file_chunks(args.path), feed_format(args.path, args.format), args.create_categories, args.batch_size
+        )
+    await async_engine.dispose()
+    elapsed = time.perf_counter() - start
+    
+    for error in report["errors"][:args.show_errors]:
+        print(f"✗ line {error['line']}: {'; '.join(error['errors'])}")
+    if report["failed"] > args.show_errors:
+        print(f"  ... {report['failed'] - args.show_errors} more")
+    print(f"\nRows: {report['rows']}, written: {report['written']}, failed: {report['failed']} "
+          f"({elapsed:.1f}s, {report['rows'] / elapsed if elapsed else 0:.0f} rows/s)")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["failed"] else 0
+
+async def run_export(args) -> int:
+    format = feed_format(args.path, args.format)
+    stream = sys.stdout if args.path == "-" else open(args.path, "w", newline="")
+    try:
+        async for text in export_rows(export_query(), format):
+            stream.write(text)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    await async_engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk product import (upsert on SKU) and export, as CSV or NDJSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="Upsert products from a feed file ('-' for stdin)")
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    importer.add_argument("--create-categories", action="store_true", help="Create categories the feed names")
+    importer.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    importer.add_argument("--show-errors", type=int, default=20)
+    importer.add_argument("--report", help="Write the full JSON report here")
+    exporter = commands.add_parser("export", help="Write every product to a file ('-' for stdout)")
+    exporter.add_argument("path")
+    exporter.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    args = parser.parse_args()
+    
+    if args.command == "import":
+        print("=== Product Import ===", file=sys.stderr if args.path == "-" else sys.stdout)
+        sys.exit(asyncio.run(run_import(args)))
+    sys.exit(asyncio.run(run_export(args)))
\ No newline at end of file
@@ -0,0 +1,199 @@
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Throwaway database, and count the queries behind each response rather than cache hits
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'budgets.db')}"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["RESPONSE_CACHE_BACKEND"] = "none"
+
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.database import SessionLocal, async_engine, create_db_and_tables
+from app.models.user import User
+from app.models.product import Product, Category, Review
+from app.models.cart import Cart, CartItem
+from app.models.order import Order, OrderItem
+
+# Big enough that a per-row lazy load can't hide inside a budget
+CART_ITEMS = 30
+ORDER_LINES = 30
+REVIEWS = 20
+
+def seed() -> dict:
+    """Catalog, a reviewed product, a full cart and a few large orders; returns the ids requests use"""
+    db = SessionLocal()
+    try:
+        categories = [Category(name=f"Category {n}") for n in range(3)]
+        db.add_all(categories)
+        db.flush()
+        products = [
+            Product(name=f"Product {n}", price=5 + n, stock_quantity=1000,
+                    category_id=categories[n % 3].id, is_featured=n < 8)
+            for n in range(40)
+        ]
+        db.add_all(products)
+        db.flush()
+    
+        reviewers = [User(email=f"reviewer{n}@budget.shopswift.com", hashed_password="-") for n in range(REVIEWS)]
+        customer = User(email="customer@budget.shopswift.com", hashed_password="-", full_name="Customer")
+        db.add_all(reviewers + [customer])
+        db.flush()
+        db.add_all([Review(rating=4, comment="Fine", user_id=u.id, product_id=products[0].id) for u in reviewers])
+        products[0].rating_sum, products[0].review_count = 4 * REVIEWS, REVIEWS
+    
+        cart = Cart(user_id=customer.id)
+        db.add(cart)
+        db.flush()
+        items = [CartItem(cart_id=cart.id, product_id=p.id, quantity=1) for p in products[:CART_ITEMS]]
+        db.add_all(items)
+    
+        orders = []
+        for _ in range(3):
+            order = Order(user_id=customer.id, total_amount=0, shipping_address="1 Budget Lane")
+            db.add(order)
+            db.flush()
+            db.add_all([
+                OrderItem(order_id=order.id, product_id=p.id, quantity=1, price=p.price)
+                for p in products[:ORDER_LINES]
+            ])
+            orders.append(order)
+        db.commit()
+    
+        admin = db.query(User).filter(User.email == settings.ADMIN_EMAIL).one()
+        return {
+            "category_id": categories[0].id,
+            "product_id": products[0].id,
+            "reviewable_product_id": products[-1].id,
+            "new_cart_product_id": products[-2].id,
+            "cart_item_id": items[0].id,
+            "removed_cart_item_id": items[1].id,
+            "patched_product_id": products[2].id,
+            "unpatched_product_id": products[3].id,
+            "patch_new_product_id": products[-3].id,
+            "order_id": orders[0].id,
+            "customer": create_access_token(data={"sub": customer.email, "uid": customer.id, "ver": 0}),
+            "admin": create_access_token(data={"sub": admin.email, "uid": admin.id, "ver": admin.token_version}),
+        }
+    finally:
+        db.close()
+
+# (method, route path, caller, request path, JSON body); run in order, so writes come last
+SAMPLES = [
+    ("GET", "/api/products/", None, "/api/products/?limit=20", None),
+    ("GET", "/api/products/featured", None, "/api/products/featured", None),
+    ("GET", "/api/products/categories", None, "/api/products/categories", None),
+    ("GET", "/api/products/categories/{category_id}", None, "/api/products/categories/{category_id}", None),
+    ("GET", "/api/categories/", None, "/api/categories/", None),
+    ("GET", "/api/categories/{category_id}", None, "/api/categories/{category_id}", None),
+    ("GET", "/api/products/{product_id}", None, "/api/products/{product_id}", None),
+    ("GET", "/api/products/{product_id}/reviews", None, "/api/products/{product_id}/reviews", None),
+    ("GET", "/api/auth/me", "customer", "/api/auth/me", None),
+    ("GET", "/api/users/me", "customer", "/api/users/me", None),
+    ("GET", "/api/cart/", "customer", "/api/cart/", None),
+    ("GET", "/api/orders/", "customer", "/api/orders/", None),
+    ("GET", "/api/orders/{order_id}", "customer", "/api/orders/{order_id}", None),
+    ("GET", "/api/admin/orders", "admin", "/api/admin/orders?status=pending&limit=2", None),
+    ("GET", "/api/admin/orders/export", "admin", "/api/admin/orders/export?format=csv", None),
+    ("GET", "/api/admin/products/export", "admin", "/api/admin/products/export?format=csv", None),
+    ("GET", "/api/admin/users", "admin", "/api/admin/users", None),
+    ("GET", "/api/admin/stats", "admin", "/api/admin/stats?days=30", None),
+    ("PUT", "/api/cart/items/{item_id}", "customer", "/api/cart/items/{cart_item_id}", {"quantity": 2}),
+    ("DELETE", "/api/cart/items/{item_id}", "customer", "/api/cart/items/{removed_cart_item_id}", None),
+    ("POST", "/api/cart/items", "customer", "/api/cart/items", {"product_id": "{new_cart_product_id}", "quantity": 1}),
+    ("PATCH", "/api/cart/items", "customer", "/api/cart/items", {"items": [
+        {"product_id": "{patched_product_id}", "quantity": 3},
+        {"product_id": "{unpatched_product_id}", "quantity": 0},
+        {"product_id": "{patch_new_product_id}", "quantity": 1},
+    ]}),
+    ("POST", "/api/orders/", "customer", "/api/orders/", {"shipping_address": "1 Budget Lane"}),
+    ("DELETE", "/api/cart/", "customer", "/api/cart/", None),
+    ("POST", "/api/products/{product_id}/reviews", "customer", "/api/products/{reviewable_product_id}/reviews",
+     {"rating": 5, "comment": "Great"}),
+    ("PUT", "/api/admin/orders/{order_id}", "admin", "/api/admin/orders/{order_id}", {"status": "shipped"}),
+]
+
+def fill(value, ids: dict):
+    if isinstance(value, str) and value.startswith("{") and value.endswith("}") and value[1:-1] in ids:
+        return ids[value[1:-1]]
+    if isinstance(value, str):
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {key: fill(item, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill(item, ids) for item in value]
+    return value
+
+def declared_budgets(app) -> dict:
+    return {
+        (method, route.path): route.endpoint.query_budget
+        for route in app.routes
+        if isinstance(route, APIRoute) and hasattr(route.endpoint, "query_budget")
+        for method in route.methods
+    }
+
+async def measure(app, ids: dict):
+    """Run every sample and return (method, route, status, statement count)"""
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://budgets") as client:
+        # Warm the principal cache, as any steady-state request finds it
+        for caller in ("customer", "admin"):
+            await client.get("/api/auth/me", headers={"Authorization": f"Bearer {ids[caller]}"})
+    
+        for method, route, caller, path, body in SAMPLES:
+            headers = {"Authorization": f"Bearer {ids[caller]}"} if caller else {}
+            statements.clear()
+            response = await client.request(method, fill(path, ids), json=fill(body, ids), headers=headers)
+            results.append((method, route, response.status_code, len(statements)))
+    
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    await async_engine.dispose()
+    return results
+
+def check_query_budgets() -> int:
+    from main import app
+    create_db_and_tables()
+    ids = seed()
+    budgets = declared_budgets(app)
+    results = asyncio.run(measure(app, ids))
+    
+    failures = 0
+    measured = set()
+    for method, route, status_code, queries in results:
+        measured.add((method, route))
+        budget = budgets.get((method, route))
+        label = f"{method} {route}: {queries} queries"
+        if status_code >= 400:
+            print(f"✗ {label} (HTTP {status_code})")
+            failures += 1
+        elif budget is None:
+            print(f"- {label}, no budget declared")
+        elif queries > budget:
+            print(f"✗ {label}, budget {budget}")
+            failures += 1
+        else:
+            print(f"✓ {label}, budget {budget}")
+    
+    for method, route in sorted(set(budgets) - measured):
+        print(f"✗ {method} {route}: has a budget but no sample request in this script")
+        failures += 1
+    return failures
+
+if __name__ == "__main__":
+    print("=== Query Budget Check ===")
+    print(f"{CART_ITEMS}-item cart, {ORDER_LINES}-line orders, {REVIEWS} reviews\n")
+    failures = check_query_budgets()
+    print(f"\n{'✓ All endpoints within budget' if not failures else f'✗ {failures} problem(s)'}")
+    sys.exit(1 if failures else 0)
\ No newline at end of file
@@ -0,0 +1,176 @@
+import sys
+import os
+import asyncio
+import json
+import random
+import re
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure the queries, not the response cache
+os.environ.setdefault("RESPONSE_CACHE_BACKEND", "none")
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.database import Base
+from app.models import user, product, cart, order, metrics, media  # Import all models
+from app.models.user import User
+from app.models.product import Product, Category, Review
+from app.models.cart import Cart, CartItem
+from app.models.order import Order, OrderItem, OrderStatus
+from app.schemas.cart import CartRead
+from app.schemas.order import OrderRead
+from app.routers import products, cart as cart_router, orders, admin
+from app.services.search import install_search_index
+
+# A plan line like "SCAN products" (no index) is a full table scan
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+# Scanning a materialized subquery (e.g. the full-text matches) reads only its result rows
+MATERIALIZED = re.compile(r"^MATERIALIZE (\w+)$")
+
+def seed(engine):
+    rng = random.Random(1)
+    with engine.begin() as conn:
+        install_search_index(conn)
+        conn.execute(insert(User), [{"email": f"user{i}@example.com", "hashed_password": "x"} for i in range(50)])
+        conn.execute(insert(Category), [{"name": f"Category {i}"} for i in range(20)])
+        conn.execute(insert(Product), [
+            {
+                "name": f"Product {i}", "description": "sample product", "price": rng.uniform(1, 500),
+                "stock_quantity": 100, "category_id": rng.randint(1, 20), "is_active": i % 10 != 0,
+                "is_featured": i % 25 == 0, "rating_sum": rng.randint(0, 50), "review_count": rng.randint(0, 10),
+            }
+            for i in range(2000)
+        ])
+        conn.execute(insert(Review), [
+            {"rating": rng.randint(1, 5), "user_id": rng.randint(1, 50), "product_id": rng.randint(1, 2000)}
+            for _ in range(5000)
+        ])
+        conn.execute(insert(Cart), [{"user_id": i} for i in range(1, 51)])
+        conn.execute(insert(CartItem), [
+            {"cart_id": rng.randint(1, 50), "product_id": rng.randint(1, 2000), "quantity": 1} for _ in range(500)
+        ])
+        conn.execute(insert(Order), [
+            {"user_id": rng.randint(1, 50), "total_amount": 10.0, "status": "PENDING", "shipping_address": "x"}
+            for _ in range(1000)
+        ])
+        conn.execute(insert(OrderItem), [
+            {"order_id": rng.randint(1, 1000), "product_id": rng.randint(1, 2000), "quantity": 1, "price": 1.0}
+            for _ in range(3000)
+        ])
+        conn.execute(text("ANALYZE"))
+
+def listing(**overrides):
+    params = dict(
+        skip=0, limit=20, category_id=None, search=None, min_price=None, max_price=None,
+        sort_by="created_at", order="desc", featured_only=False, cursor=None, include_total=True,
+        if_none_match=None
+    )
+    params.update(overrides)
+    return lambda db, user: products.get_products(db=db, **params)
+
+def next_page(**overrides):
+    """Second page of a listing, reached through the keyset cursor"""
+    async def run(db, user):
+        first = json.loads((await listing(**overrides)(db, user)).body)
+        return await listing(cursor=first["next_cursor"], **overrides)(db, user)
+    return run
+
+def admin_orders(**overrides):
+    params = dict(limit=50, cursor=None, status=None, user_id=None, created_from=None, created_to=None)
+    params.update(overrides)
+    return lambda db, user: admin.get_all_orders(admin=user, db=db, **params)
+
+async def serialized(call, schema, many=False):
+    """Await a router call and validate it the way its response_model would"""
+    result = await call
+    return [schema.model_validate(item) for item in result] if many else schema.model_validate(result)
+
+# (name, call, whether ORDER BY must come from an index)
+CASES = [
+    ("products newest", listing(), True),
+    ("products by price", listing(sort_by="price", order="asc"), True),
+    ("products by name", listing(sort_by="name", order="asc"), True),
+    ("products by rating", listing(sort_by="rating"), True),
+    ("products in category", listing(category_id=3), True),
+    ("products in category by price", listing(category_id=3, sort_by="price"), True),
+    ("products price range", listing(min_price=10, max_price=50, sort_by="price"), True),
+    ("products featured only", listing(featured_only=True), True),
+    ("products cursor page", next_page(sort_by="price"), True),
+    ("products search", listing(search="product"), False),
+    ("featured products", lambda db, user: products.get_featured_products(limit=8, if_none_match=None, db=db), True),
+    ("product reviews", lambda db, user: products.get_product_reviews(product_id=7, skip=0, limit=50, db=db), True),
+    ("cart", lambda db, user: serialized(cart_router.get_cart(current_user=user, db=db), CartRead), False),
+    ("my orders", lambda db, user: serialized(orders.get_my_orders(current_user=user, db=db), OrderRead, many=True), True),
+    ("admin orders", admin_orders(), True),
+    ("admin orders by status", admin_orders(status=OrderStatus.PENDING), True),
+    ("admin orders by customer", admin_orders(user_id=3), True),
+    ("admin orders in date range", admin_orders(created_from=datetime(2024, 1, 1), created_to=datetime(2024, 2, 1)), True),
+    ("admin dashboard", lambda db, user: admin.get_admin_stats(days=30, granularity="day", current_user=user, db=db), True),
+]
+
+async def run_case(async_engine, Session, call):
+    """Run one router call and return every SELECT it sent"""
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    
+    try:
+        async with Session() as db:
+            user = await db.get(User, 1)
+            statements.clear()
+            await call(db, user)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    return statements
+
+def check_case(loop, engine, async_engine, Session, name, call, ordered):
+    statements = loop.run_until_complete(run_case(async_engine, Session, call))
+    
+    problems = []
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        for statement, parameters in statements:
+            plan = [row[3] for row in raw.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            materialized = {m.group(1) for m in map(MATERIALIZED.match, plan) if m}
+            for line in plan:
+                match = FULL_SCAN.match(line)
+                if match and match.group(1) not in materialized:
+                    problems.append(f"full scan of {match.group(1)}: {statement.split(chr(10))[0][:100]}")
+                if ordered and line == TEMP_SORT and "ORDER BY" in statement and "LIMIT" in statement:
+                    problems.append(f"sort not served by an index: {statement.split(chr(10))[0][:100]}")
+    return problems
+
+def check_query_plans() -> int:
+    failures = 0
+    loop = asyncio.new_event_loop()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'plans.db')
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        seed(engine)
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        Session = async_sessionmaker(async_engine, expire_on_commit=False)
+    
+        for name, call, ordered in CASES:
+            problems = check_case(loop, engine, async_engine, Session, name, call, ordered)
+            if problems:
+                failures += 1
+                print(f"✗ {name}")
+                for problem in problems:
+                    print(f"    {problem}")
+            else:
+                print(f"✓ {name}")
+        loop.run_until_complete(async_engine.dispose())
+        engine.dispose()
+    loop.close()
+    return failures
+
+if __name__ == "__main__":
+    print("=== Query Plan Check ===")
+    failed = check_query_plans()
+    print(f"\n{len(CASES) - failed}/{len(CASES)} endpoints use indexes")
+    sys.exit(1 if failed else 0)
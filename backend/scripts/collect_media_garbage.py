@@ -0,0 +1,29 @@
+import sys
+import os
+import argparse
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.storage import blob_store
+from app.database import async_engine
+from app.models import user, product, cart, order, metrics, media  # Import all models
+from app.services.media import collect_garbage
+
+async def run(grace: float, check_only: bool):
+    try:
+        result = await collect_garbage(blob_store, grace, check_only)
+    finally:
+        await blob_store.close()
+        await async_engine.dispose()
+    verb = "Would collect" if check_only else "✓ Collected"
+    print(f"{verb} {result['blobs']} orphaned blobs ({result['bytes'] / 1024 / 1024:.1f} MB)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete image blobs no product has used for the grace period")
+    parser.add_argument("--grace", type=float, default=settings.MEDIA_GC_GRACE_SECONDS, help="Seconds unreferenced")
+    parser.add_argument("--check", action="store_true", help="Only report what would be collected")
+    args = parser.parse_args()
+    
+    print("=== Media Garbage Collection ===")
+    asyncio.run(run(args.grace, args.check))
\ No newline at end of file
@@ -0,0 +1,105 @@
+import sys
+import os
+import argparse
+import asyncio
+import hashlib
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.storage import blob_store
+from app.core.uploads import SNIFF_BYTES, ReceivedImage, remove_file, sniff_image, staging_dir, upload_path
+from app.database import AsyncSessionLocal, async_engine
+from app.models import user, product, cart, order, metrics, media  # Import all models
+from app.models.media import Blob
+from app.models.product import Product
+from app.services.images import ImageJobs, image_files
+from app.services.media import blob_key, media_url, set_product_image, store_image
+
+def stage_copy(path) -> ReceivedImage:
+    """Hash and sniff a legacy upload, copying it to the staging directory on the way"""
+    digest = hashlib.sha256()
+    fd, name = tempfile.mkstemp(dir=staging_dir(), suffix=".part")
+    with open(path, "rb") as source, os.fdopen(fd, "wb") as copy:
+        head = source.read(SNIFF_BYTES)
+        source.seek(0)
+        while chunk := source.read(1 << 20):
+            digest.update(chunk)
+            copy.write(chunk)
+    extension = sniff_image(head)
+    if extension is None:
+        remove_file(name)
+        raise ValueError(f"{path} is not a JPEG, PNG or WebP image")
+    return ReceivedImage(Path(name), extension, digest.hexdigest(), os.path.getsize(name))
+
+async def adopt_legacy_images(check_only: bool) -> int:
+    """Move /uploads/ product images into content-addressed storage, deduplicating as it goes"""
+    async with AsyncSessionLocal() as db:
+        products = list(await db.scalars(select(Product).filter(Product.image.like("/uploads/%"))))
+        present = [p for p in products if upload_path(p.image) is not None and upload_path(p.image).exists()]
+        print(f"Legacy /uploads images: {len(present)} ({len(products) - len(present)} missing on disk)")
+        if check_only:
+            return 0
+    
+        adopted = 0
+        for product in present:
+            try:
+                image = await asyncio.to_thread(stage_copy, upload_path(product.image))
+            except ValueError as e:
+                print(f"✗ product {product.id}: {e}")
+                continue
+            legacy_files = image_files(product.image, product.image_variants)
+            blob = await store_image(db, blob_store, image)
+            await set_product_image(db, product, media_url(blob_key(blob.digest, blob.extension)))
+            await db.commit()
+            for path in legacy_files:
+                remove_file(path)
+            adopted += 1
+        if adopted:
+            print(f"✓ Moved {adopted} images into {settings.MEDIA_STORAGE_BACKEND} media storage")
+        return adopted
+
+async def generate_variants(workers: int, regenerate: bool, check_only: bool) -> int:
+    """Render variants for blobs in use that lack them (or all of them with `regenerate`)"""
+    await adopt_legacy_images(check_only)
+    async with AsyncSessionLocal() as db:
+        query = select(Blob.digest).filter(Blob.ref_count > 0)
+        if not regenerate:
+            query = query.filter(Blob.variants.is_(None))
+        digests = list(await db.scalars(query))
+    print(f"Images to render: {len(digests)}")
+    if check_only or not digests:
+        await blob_store.close()
+        await async_engine.dispose()
+        return 0
+    
+    jobs = ImageJobs(blob_store, workers, settings.IMAGE_VARIANT_FORMAT, settings.IMAGE_VARIANT_QUALITY)
+    start = time.perf_counter()
+    for digest in digests:
+        jobs.enqueue(digest)
+    await jobs.join()
+    elapsed = time.perf_counter() - start
+    jobs.shutdown()
+    await blob_store.close()
+    await async_engine.dispose()
+    
+    stats = jobs.stats()
+    print(f"✓ Rendered {stats['completed']} images in {elapsed:.1f}s ({stats['format']}, {workers} workers)")
+    if stats["failed"]:
+        print(f"✗ {stats['failed']} images could not be decoded")
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move legacy /uploads product images into media storage and render their thumb/card/detail variants"
+    )
+    parser.add_argument("--workers", type=int, default=max(settings.IMAGE_WORKERS, os.cpu_count() or 1))
+    parser.add_argument("--all", action="store_true", help="Re-render images that already have variants")
+    parser.add_argument("--check", action="store_true", help="Only count what would be moved and rendered")
+    args = parser.parse_args()
+    
+    print("=== Image Variants ===")
+    sys.exit(asyncio.run(generate_variants(args.workers, args.all, args.check)))
\ No newline at end of file
@@ -0,0 +1,78 @@
+import sys
+import os
+import argparse
+import asyncio
+import statistics
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+# Read-heavy mix of the storefront's public endpoints
+DEFAULT_PATHS = [
+    "/api/products/?limit=20",
+    "/api/products/?limit=20&sort_by=price&order=asc",
+    "/api/products/featured",
+    "/api/products/categories",
+    "/api/products/1",
+]
+
+async def client_loop(client, paths, deadline: float, latencies, errors, offset: int):
+    """One simulated client: issue requests back to back until the deadline"""
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def run_load(url: str, paths, concurrency: int, duration: float, warmup: float):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        if warmup:
+            await asyncio.gather(*[
+                client_loop(client, paths, time.perf_counter() + warmup, [], [], n)
+                for n in range(min(concurrency, 20))
+            ])
+
+        latencies, errors = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            client_loop(client, paths, start + duration, latencies, errors, n)
+            for n in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+def report(latencies, errors, elapsed: float, concurrency: int):
+    latencies.sort()
+    print(f"Clients:      {concurrency}")
+    print(f"Requests:     {len(latencies)} ok, {len(errors)} failed in {elapsed:.1f}s")
+    if not latencies:
+        return
+    print(f"Throughput:   {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latency p50:  {statistics.median(latencies):.1f} ms")
+    print(f"Latency p99:  {latencies[int(len(latencies) * 0.99) - 1]:.1f} ms")
+    if errors:
+        print(f"Errors:       {sorted(set(map(str, errors)))}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive a running server with many concurrent clients")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--path", action="append", dest="paths", help="Endpoint to request; repeatable")
+    args = parser.parse_args()
+
+    print("=== Load Test ===")
+    print(f"Target: {args.url}\n")
+    report(*asyncio.run(run_load(args.url, args.paths or DEFAULT_PATHS, args.concurrency, args.duration, args.warmup)), args.concurrency)
\ No newline at end of file
@@ -0,0 +1,109 @@
+import sys
+import os
+import argparse
+import hashlib
+import hmac
+import re
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A stand-in for an S3-compatible object store, enough for MEDIA_STORAGE_BACKEND=s3 in
+# development: path-style PUT/GET/HEAD/DELETE of objects kept as files, single-range
+# GETs, and SigV4 checked with the same keys the app is configured with.
+import anyio
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from app.core.storage import sigv4_authorization
+
+AUTHORIZATION = re.compile(r"AWS4-HMAC-SHA256 Credential=([^/]+)/(\d{8})/([^/]+)/s3/aws4_request, SignedHeaders=([^,]+), Signature=(\w+)")
+
+def s3_error(status_code: int, code: str) -> Response:
+    return Response(f"<Error><Code>{code}</Code></Error>", status_code=status_code, media_type="application/xml")
+
+def create_app(root: str, access_key: str, secret_key: str) -> Starlette:
+    def object_path(request: Request) -> str:
+        bucket, key = request.path_params["bucket"], request.path_params["key"]
+        if ".." in key.split("/") or not key:
+            raise ValueError(key)
+        return os.path.join(root, bucket, key)
+    
+    def signed(request: Request) -> bool:
+        match = AUTHORIZATION.fullmatch(request.headers.get("authorization", ""))
+        if not match or match.group(1) != access_key:
+            return False
+        headers = {name: request.headers.get(name, "") for name in match.group(4).split(";")}
+        expected = sigv4_authorization(
+            request.method, request.url.path, headers, request.headers.get("x-amz-content-sha256", ""),
+            access_key, secret_key, match.group(3), request.headers.get("x-amz-date", "")
+        )
+        return hmac.compare_digest(expected.rsplit("=", 1)[1], match.group(5))
+    
+    async def handle(request: Request) -> Response:
+        if not signed(request):
+            return s3_error(403, "SignatureDoesNotMatch")
+        try:
+            path = object_path(request)
+        except ValueError:
+            return s3_error(400, "InvalidRequest")
+    
+        if request.method == "PUT":
+            await anyio.to_thread.run_sync(lambda: os.makedirs(os.path.dirname(path), exist_ok=True))
+            fd, temp = tempfile.mkstemp(dir=os.path.dirname(path))
+            digest = hashlib.md5()
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in request.stream():
+                    digest.update(chunk)
+                    await anyio.to_thread.run_sync(f.write, chunk)
+            os.replace(temp, path)
+            return Response(headers={"ETag": f'"{digest.hexdigest()}"'})
+        if request.method == "DELETE":
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return Response(status_code=204)
+    
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            return s3_error(404, "NoSuchKey")
+        start, end, status_code = 0, size - 1, 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", request.headers.get("range", ""))
+        if match:
+            start, end, status_code = int(match.group(1)), min(int(match.group(2) or size - 1), size - 1), 206
+            if start >= size:
+                return s3_error(416, "InvalidRange")
+        headers = {"Content-Length": str(end - start + 1), "Accept-Ranges": "bytes"}
+        if status_code == 206:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        if request.method == "HEAD":
+            return Response(status_code=status_code, headers=headers)
+    
+        async def body():
+            f = await anyio.open_file(path, "rb")
+            try:
+                await f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0 and (chunk := await f.read(min(65536, remaining))):
+                    remaining -= len(chunk)
+                    yield chunk
+            finally:
+                await f.aclose()
+        return StreamingResponse(body(), status_code=status_code, headers=headers)
+    
+    return Starlette(routes=[Route("/{bucket}/{key:path}", handle, methods=["GET", "HEAD", "PUT", "DELETE"])])
+
+if __name__ == "__main__":
+    from app.core.config import settings
+    parser = argparse.ArgumentParser(description="Local S3-compatible object store for MEDIA_STORAGE_BACKEND=s3")
+    parser.add_argument("--root", default="./s3-data", help="Directory holding one folder per bucket")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    
+    print("=== Local S3 ===")
+    print(f"Serving {os.path.abspath(args.root)} on http://127.0.0.1:{args.port}")
+    app = create_app(args.root, settings.MEDIA_S3_ACCESS_KEY, settings.MEDIA_S3_SECRET_KEY)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
\ No newline at end of file
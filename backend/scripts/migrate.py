@@ -0,0 +1,60 @@
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from app.core.config import settings
+from app.database import alembic_config, create_admin_user, engine, schema_revision, upgrade_database
+
+def migrate(bootstrap: bool) -> int:
+    """Bring the database to the latest migration, then create the admin user unless told not to.
+    
+    Run it once per deploy, before starting the workers: the server itself
+    neither creates tables nor hashes passwords on startup.
+    """
+    from alembic import command
+    with engine.connect() as conn:
+        current = schema_revision(conn)
+        legacy = current is None and inspect(conn).has_table("users")
+    
+    if legacy:
+        # Created by create_all() before there were migrations: add what it's missing, then adopt it
+        if engine.dialect.name != "sqlite":
+            sys.exit(
+                f"✗ This {engine.dialect.name} database predates migrations and can only be updated in place on SQLite; "
+                "bring it up to the models by hand, then run `alembic stamp head`"
+            )
+        from scripts.update_database import update_database_schema
+        from scripts.backfill_ratings import backfill_ratings
+        from scripts.backfill_category_counts import backfill_category_counts
+        from scripts.backfill_metrics import backfill_metrics
+        print("Database predates migrations; updating it in place before stamping it")
+        update_database_schema()
+        # The aggregates its new columns and tables start without; stamped only once they're filled,
+        # so a failure here is retried on the next run
+        backfill_ratings()
+        backfill_category_counts()
+        backfill_metrics()
+        command.stamp(alembic_config(), "head")
+    else:
+        upgrade_database()
+    
+    with engine.connect() as conn:
+        head = schema_revision(conn)
+    print(f"✓ Schema at revision {head}" + ("" if head == current else f" (was {current or ('unversioned' if legacy else 'empty')})"))
+    
+    if bootstrap:
+        if create_admin_user():
+            print(f"✓ Created admin user {settings.ADMIN_EMAIL}")
+        else:
+            print(f"✓ Admin user {settings.ADMIN_EMAIL} already exists")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply database migrations and create the admin user")
+    parser.add_argument("--skip-bootstrap", action="store_true", help="Only migrate; don't create the admin user")
+    args = parser.parse_args()
+    
+    print("=== Database Migrations ===")
+    sys.exit(migrate(bootstrap=not args.skip_bootstrap))
\ No newline at end of file
@@ -0,0 +1,17 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.models import user, product, cart, order  # Import all models
+from app.services.search import install_search_index
+
+def rebuild_search_index():
+    """Recreate the product full-text index from the products table"""
+    with engine.begin() as conn:
+        install_search_index(conn, rebuild=True)
+    print("✓ Product search index rebuilt")
+
+if __name__ == "__main__":
+    print("=== Search Index Rebuild ===")
+    rebuild_search_index()
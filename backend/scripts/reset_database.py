@@ -4,6 +4,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import engine, Base
 from app.models import user, product, cart, order  # Import all models
+from app.services.search import install_search_index, drop_search_index
 
 def reset_database():
     """Drop all tables and recreate them"""
@@ -14,10 +15,14 @@ def reset_database():
         return
     
     print("\nDropping all tables...")
+    with engine.begin() as conn:
+        drop_search_index(conn)
     Base.metadata.drop_all(bind=engine)
     
     print("Creating all tables...")
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        install_search_index(conn)
     
     print("\n✓ Database reset complete!")
     
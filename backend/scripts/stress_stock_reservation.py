@@ -0,0 +1,113 @@
+import sys
+import os
+import argparse
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Always a throwaway database: this script creates users, carts and orders
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'stress.db')}"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+
+import httpx
+from sqlalchemy import func
+from app.database import SessionLocal, async_engine, create_db_and_tables
+from app.models.user import User
+from app.models.product import Product
+from app.models.cart import Cart, CartItem
+from app.models.order import OrderItem
+from app.core.security import create_access_token
+
+def seed(buyers: int, stock: int, quantity: int):
+    """One scarce product, one plentiful one, and a cart holding both for every buyer"""
+    db = SessionLocal()
+    try:
+        scarce = Product(name="Scarce widget", price=10, stock_quantity=stock)
+        plentiful = Product(name="Plentiful widget", price=1, stock_quantity=buyers * quantity)
+        db.add_all([scarce, plentiful])
+        db.flush()
+    
+        tokens = []
+        for n in range(buyers):
+            user = User(email=f"buyer{n}@stress.test", hashed_password="-", full_name=f"Buyer {n}")
+            db.add(user)
+            db.flush()
+            cart = Cart(user_id=user.id)
+            db.add(cart)
+            db.flush()
+            db.add_all([
+                CartItem(cart_id=cart.id, product_id=scarce.id, quantity=quantity),
+                CartItem(cart_id=cart.id, product_id=plentiful.id, quantity=quantity),
+            ])
+            tokens.append(create_access_token(data={"sub": user.email, "uid": user.id, "ver": 0}))
+        db.commit()
+        return scarce.id, plentiful.id, tokens
+    finally:
+        db.close()
+
+async def checkout_all(tokens):
+    """Every buyer places their order at the same moment"""
+    from main import app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://stress", timeout=120) as client:
+        responses = await asyncio.gather(*[
+            client.post(
+                "/api/orders/",
+                json={"shipping_address": "1 Stress Test Way"},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            for token in tokens
+        ])
+    await async_engine.dispose()
+    return responses
+
+def stock_and_sold(product_id: int):
+    db = SessionLocal()
+    try:
+        stock = db.get(Product, product_id).stock_quantity
+        sold = db.query(func.coalesce(func.sum(OrderItem.quantity), 0)).filter(
+            OrderItem.product_id == product_id
+        ).scalar()
+        return stock, sold
+    finally:
+        db.close()
+
+def check(label: str, passed: bool) -> bool:
+    print(f"{'✓' if passed else '✗'} {label}")
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Race many buyers for a few units and check nothing is oversold")
+    parser.add_argument("--buyers", type=int, default=100)
+    parser.add_argument("--stock", type=int, default=10)
+    parser.add_argument("--quantity", type=int, default=1, help="Units of each product per buyer")
+    args = parser.parse_args()
+    
+    print("=== Stock Reservation Stress Test ===")
+    create_db_and_tables()
+    scarce_id, plentiful_id, tokens = seed(args.buyers, args.stock, args.quantity)
+    print(f"{args.buyers} buyers x {args.quantity} unit(s) of a product with {args.stock} in stock\n")
+    
+    responses = asyncio.run(checkout_all(tokens))
+    placed = sum(1 for r in responses if r.status_code == 200)
+    rejected = sum(
+        1 for r in responses
+        if r.status_code == 400 and r.json()["detail"]["message"] == "Insufficient stock"
+    )
+    errors = sorted({r.status_code for r in responses} - {200, 400})
+    print(f"Orders placed: {placed}, rejected for stock: {rejected}, other failures: {len(responses) - placed - rejected}")
+    
+    expected = min(args.buyers, args.stock // args.quantity)
+    scarce_stock, scarce_sold = stock_and_sold(scarce_id)
+    plentiful_stock, plentiful_sold = stock_and_sold(plentiful_id)
+    results = [
+        check(f"No unexpected responses {errors or ''}", not errors and placed + rejected == len(responses)),
+        check(f"Every available unit sold: {placed} orders (expected {expected})", placed == expected),
+        check(f"No oversell: {scarce_sold} sold, {scarce_stock} left of {args.stock}",
+              scarce_stock >= 0 and scarce_sold + scarce_stock == args.stock),
+        check(f"Rejected orders kept none of their other lines: {plentiful_sold} plentiful units sold",
+              plentiful_sold == placed * args.quantity
+              and plentiful_stock == args.buyers * args.quantity - plentiful_sold),
+    ]
+    sys.exit(0 if all(results) else 1)
\ No newline at end of file
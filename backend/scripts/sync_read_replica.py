@@ -0,0 +1,52 @@
+import sys
+import os
+import argparse
+import sqlite3
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+
+def sqlite_path(url: str) -> str:
+    """Filesystem path of a sqlite:/// URL, including file: URIs"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or not parsed.database:
+        raise ValueError(f"Not a SQLite file URL: {url}")
+    path = parsed.database
+    if path.startswith("file:"):
+        path = path[len("file:"):].split("?", 1)[0]
+    return path
+
+def sync_replica(primary: str, replica: str) -> float:
+    """Copy the primary into the replica in place, so open replica connections see the new data"""
+    start = time.perf_counter()
+    source = sqlite3.connect(primary)
+    target = sqlite3.connect(replica, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+    try:
+        # The backup API copies a consistent snapshot even while the app is writing
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh a local SQLite read replica from the primary database")
+    parser.add_argument("--interval", type=float, default=0, help="Keep copying every N seconds to simulate replication lag")
+    args = parser.parse_args()
+
+    if not settings.DATABASE_READ_URL:
+        print("✗ DATABASE_READ_URL is not set")
+        sys.exit(1)
+
+    primary = sqlite_path(settings.DATABASE_URL)
+    replica = sqlite_path(settings.DATABASE_READ_URL)
+    print("=== Read Replica Sync ===")
+    print(f"{primary} -> {replica}")
+    while True:
+        elapsed = sync_replica(primary, replica)
+        print(f"✓ Replica refreshed in {elapsed * 1000:.0f} ms")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
\ No newline at end of file
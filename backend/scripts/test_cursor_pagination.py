@@ -0,0 +1,81 @@
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Throwaway database; cached pages would hide what each cursor actually selects
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'cursors.db')}"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["RESPONSE_CACHE_BACKEND"] = "none"
+
+import httpx
+from sqlalchemy import text
+from app.database import SessionLocal, async_engine, create_db_and_tables
+from app.models.product import Product
+
+SORTS = ["created_at", "price", "name", "rating"]
+
+def seed() -> set:
+    """Products sharing timestamps the way server defaults leave them; returns their ids"""
+    db = SessionLocal()
+    try:
+        # One commit: every row gets the same CURRENT_TIMESTAMP
+        db.add_all([Product(name=f"Product {n}", price=5 + n % 3, stock_quantity=10) for n in range(7)])
+        db.commit()
+        # A few older ties too, stored in the same "YYYY-MM-DD HH:MM:SS" text
+        db.execute(text("UPDATE products SET created_at = '2024-01-01 10:00:00' WHERE id IN (2, 4, 6)"))
+        db.commit()
+        return {id for (id,) in db.execute(text("SELECT id FROM products"))}
+    finally:
+        db.close()
+
+async def walk(client, sort_by: str, order: str, limit: int):
+    """Follow next_cursor from the first page to the last; returns every product id seen"""
+    seen = []
+    params = {"sort_by": sort_by, "order": order, "limit": limit}
+    for _ in range(100):
+        response = await client.get("/api/products/", params=params)
+        response.raise_for_status()
+        page = response.json()
+        seen.extend(p["id"] for p in page["data"])
+        if not page["next_cursor"]:
+            return seen
+        params["cursor"] = page["next_cursor"]
+    raise RuntimeError("next_cursor never ran out")
+
+async def check(app, ids: set) -> int:
+    failures = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://cursors") as client:
+        for sort_by in SORTS:
+            for order in ("desc", "asc"):
+                for limit in (1, 2, 3):
+                    label = f"sort_by={sort_by} order={order} limit={limit}"
+                    try:
+                        seen = await walk(client, sort_by, order, limit)
+                    except RuntimeError as e:
+                        print(f"✗ {label}: {e}")
+                        failures += 1
+                        continue
+                    if sorted(seen) != sorted(ids):
+                        print(f"✗ {label}: got {seen}")
+                        failures += 1
+                    else:
+                        print(f"✓ {label}")
+    await async_engine.dispose()
+    return failures
+
+def test_cursor_pagination() -> int:
+    from main import app
+    create_db_and_tables()
+    ids = seed()
+    return asyncio.run(check(app, ids))
+
+if __name__ == "__main__":
+    print("=== Cursor Pagination Test ===")
+    print("Every page of every sort, with duplicate timestamps; each product exactly once\n")
+    failures = test_cursor_pagination()
+    print(f"\n{'✓ Every walk saw each product once' if not failures else f'✗ {failures} walk(s) failed'}")
+    sys.exit(1 if failures else 0)
\ No newline at end of file
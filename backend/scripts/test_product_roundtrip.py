@@ -0,0 +1,103 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Throwaway database
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'roundtrip.db')}"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["IMAGE_WORKERS"] = "0"
+os.environ["UPLOAD_DIR"] = os.path.join(TMP_DIR, "uploads")
+
+import httpx
+from sqlalchemy import select
+from app.core.security import create_access_token
+from app.database import SessionLocal, async_engine, create_db_and_tables
+from app.models.user import User
+from app.models.product import Product, Category
+
+# Everything an import could change; updated_at is bumped by design
+COLUMNS = [
+    Product.id, Product.sku, Product.name, Product.description, Product.price, Product.stock_quantity,
+    Product.category_id, Product.image, Product.image_variants, Product.is_featured, Product.is_active,
+    Product.created_at,
+]
+
+def seed() -> str:
+    """A catalog that's mostly SKU-less, as it is after the sku column was added; returns an admin token"""
+    db = SessionLocal()
+    try:
+        tools = Category(name="Tools")
+        db.add(tools)
+        db.flush()
+        db.add_all([
+            Product(name="NoSku", description="Has, commas\nand a newline", price=9.5, stock_quantity=3,
+                    category_id=tools.id, image="https://cdn.example.com/nosku.jpg", is_featured=True),
+            Product(name="Bare", price=1, stock_quantity=0),
+            Product(name="Retired", price=2, stock_quantity=5, is_active=False),
+            Product(sku="SKU-1", name="Skued", description="Keyed on SKU", price=20, stock_quantity=7,
+                    category_id=tools.id),
+        ])
+        admin = User(email="admin@roundtrip.shopswift.com", hashed_password="-", is_admin=True)
+        db.add(admin)
+        db.commit()
+        return create_access_token(data={"sub": admin.email, "uid": admin.id, "ver": admin.token_version})
+    finally:
+        db.close()
+
+def snapshot():
+    db = SessionLocal()
+    try:
+        return [tuple(row) for row in db.execute(select(*COLUMNS).order_by(Product.id))]
+    finally:
+        db.close()
+
+async def check(app, token: str) -> int:
+    failures = 0
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://roundtrip", headers=headers) as client:
+        for format in ("csv", "ndjson"):
+            before = snapshot()
+            feed = await client.get("/api/admin/products/export", params={"format": format})
+            feed.raise_for_status()
+            response = await client.post("/api/admin/products/import", params={"format": format}, content=feed.content)
+            response.raise_for_status()
+            report = response.json()
+            after = snapshot()
+            if report["failed"] or report["written"] != len(before):
+                print(f"✗ {format}: import reported {report}")
+                failures += 1
+            elif after != before:
+                print(f"✗ {format}: catalog changed")
+                for row in sorted(set(after) ^ set(before)):
+                    print(f"    {'+' if row in after else '-'} {row}")
+                failures += 1
+            else:
+                print(f"✓ {format}: export re-imported, {len(after)} products unchanged")
+    
+        before = snapshot()
+        ghost = json.dumps({"id": 999, "name": "Ghost", "price": 1}) + "\n"
+        report = (await client.post("/api/admin/products/import", params={"format": "ndjson"}, content=ghost)).json()
+        if report["failed"] != 1 or snapshot() != before:
+            print(f"✗ SKU-less row naming a missing id: {report}")
+            failures += 1
+        else:
+            print(f"✓ SKU-less row naming a missing id rejected: {report['errors'][0]['errors'][0]}")
+    await async_engine.dispose()
+    return failures
+
+def test_product_roundtrip() -> int:
+    from main import app
+    create_db_and_tables()
+    token = seed()
+    return asyncio.run(check(app, token))
+
+if __name__ == "__main__":
+    print("=== Product Export/Import Round Trip Test ===\n")
+    failures = test_product_roundtrip()
+    print(f"\n{'✓ Round trips leave the catalog as it was' if not failures else f'✗ {failures} problem(s)'}")
+    sys.exit(1 if failures else 0)
\ No newline at end of file
@@ -2,9 +2,34 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import text
-from app.database import engine
-from app.models import user, product, cart, order  # Import all models to ensure they're loaded
+from sqlalchemy import text, inspect
+from app.database import engine, Base
+from app.models import user, product, cart, order, metrics, media  # Import all models to ensure they're loaded
+from app.services.search import install_search_index, pg_search_index
+
+def existing_index_names(conn, table_name):
+    if conn.dialect.name == "sqlite":
+        # The SQLite inspector skips expression indexes, so read the catalog directly
+        rows = conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+            {"table": table_name}
+        )
+        return {row[0] for row in rows}
+    return {index["name"] for index in inspect(conn).get_indexes(table_name)}
+
+def create_missing_indexes(conn):
+    """Create every index declared on the models that the database doesn't have yet"""
+    existing_tables = set(inspect(conn).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = existing_index_names(conn, table.name)
+        for index in table.indexes:
+            if index is pg_search_index or index.name in existing:
+                continue  # the search index is managed by install_search_index
+            print(f"Creating index {index.name} on {table.name}...")
+            index.create(conn)
+            print(f"✓ Created {index.name}")
 
 def update_database_schema():
     """Add missing columns to existing tables"""
@@ -15,29 +40,77 @@ def update_database_schema():
             # Check if image column exists
             result = conn.execute(text("PRAGMA table_info(products)"))
             columns = [row[1] for row in result]
-            
+    
             if 'image' not in columns:
                 print("Adding 'image' column to products table...")
                 conn.execute(text("ALTER TABLE products ADD COLUMN image VARCHAR(500)"))
                 conn.commit()
                 print("✓ Added 'image' column")
-            
+    
             if 'is_featured' not in columns:
                 print("Adding 'is_featured' column to products table...")
                 conn.execute(text("ALTER TABLE products ADD COLUMN is_featured BOOLEAN DEFAULT 0"))
                 conn.commit()
                 print("✓ Added 'is_featured' column")
-                
+    
             if 'updated_at' not in columns:
                 print("Adding 'updated_at' column to products table...")
                 conn.execute(text("ALTER TABLE products ADD COLUMN updated_at DATETIME"))
                 conn.commit()
                 print("✓ Added 'updated_at' column")
-                
+    
+            if 'rating_sum' not in columns:
+                print("Adding 'rating_sum' column to products table...")
+                conn.execute(text("ALTER TABLE products ADD COLUMN rating_sum INTEGER NOT NULL DEFAULT 0"))
+                conn.commit()
+                print("✓ Added 'rating_sum' column (run scripts/backfill_ratings.py to populate)")
+    
+            if 'review_count' not in columns:
+                print("Adding 'review_count' column to products table...")
+                conn.execute(text("ALTER TABLE products ADD COLUMN review_count INTEGER NOT NULL DEFAULT 0"))
+                conn.commit()
+                print("✓ Added 'review_count' column (run scripts/backfill_ratings.py to populate)")
+    
+            if 'sku' not in columns:
+                # Its unique index is created with the other model indexes below
+                print("Adding 'sku' column to products table...")
+                conn.execute(text("ALTER TABLE products ADD COLUMN sku VARCHAR(64)"))
+                conn.commit()
+                print("✓ Added 'sku' column")
+    
+            if 'image_variants' not in columns:
+                print("Adding 'image_variants' column to products table...")
+                conn.execute(text("ALTER TABLE products ADD COLUMN image_variants JSON"))
+                conn.commit()
+                print("✓ Added 'image_variants' column (run scripts/generate_image_variants.py to populate)")
+    
+            if 'image_blob' not in columns:
+                # Its index is created with the other model indexes below
+                print("Adding 'image_blob' column to products table...")
+                conn.execute(text("ALTER TABLE products ADD COLUMN image_blob VARCHAR(64)"))
+                conn.commit()
+                print("✓ Added 'image_blob' column")
+    
+            # Check users table
+            result = conn.execute(text("PRAGMA table_info(users)"))
+            user_columns = [row[1] for row in result]
+    
+            if 'token_version' not in user_columns:
+                print("Adding 'token_version' column to users table...")
+                conn.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+                conn.commit()
+                print("✓ Added 'token_version' column")
+    
             # Check categories table
             result = conn.execute(text("PRAGMA table_info(categories)"))
             cat_columns = [row[1] for row in result]
-            
+    
+            if cat_columns and 'product_count' not in cat_columns:
+                print("Adding 'product_count' column to categories table...")
+                conn.execute(text("ALTER TABLE categories ADD COLUMN product_count INTEGER NOT NULL DEFAULT 0"))
+                conn.commit()
+                print("✓ Added 'product_count' column (run scripts/backfill_category_counts.py to populate)")
+    
             if not any('categories' in str(row[0]) for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))):
                 print("\nCreating categories table...")
                 conn.execute(text("""
@@ -52,7 +125,7 @@ def update_database_schema():
                 """))
                 conn.commit()
                 print("✓ Created categories table")
-                
+    
                 # Add some default categories
                 conn.execute(text("""
                     INSERT INTO categories (name, description) VALUES 
@@ -63,7 +136,7 @@ def update_database_schema():
                 """))
                 conn.commit()
                 print("✓ Added default categories")
-            
+    
             # Check reviews table
             if not any('reviews' in str(row[0]) for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))):
                 print("\nCreating reviews table...")
@@ -81,9 +154,31 @@ def update_database_schema():
                 """))
                 conn.commit()
                 print("✓ Created reviews table")
-            
+    
+            if not inspect(conn).has_table("metric_rollups"):
+                print("\nCreating metric_rollups table...")
+                Base.metadata.tables["metric_rollups"].create(conn)
+                conn.commit()
+                print("✓ Created metric_rollups table (run scripts/backfill_metrics.py to populate)")
+    
+            if not inspect(conn).has_table("blobs"):
+                print("\nCreating blobs table...")
+                Base.metadata.tables["blobs"].create(conn)
+                conn.commit()
+                print("✓ Created blobs table (scripts/generate_image_variants.py moves /uploads images into it)")
+    
+            # Composite indexes declared on the models
+            create_missing_indexes(conn)
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+    
+            # Full-text search index (FTS5 table + triggers), populated on first creation
+            install_search_index(conn)
+            conn.commit()
+            print("✓ Product search index is in place")
+    
             print("\n✓ Database schema updated successfully!")
-            
+    
         except Exception as e:
             print(f"\n✗ Error updating database: {e}")
             raise
@@ -0,0 +1,134 @@
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from typing import List, Optional
+import uvicorn
+from app.core.config import settings
+
+# Production entry point: `python serve.py` after `python scripts/migrate.py`.
+# main.py's __main__ is the single-worker, auto-reloading development server.
+
+# A worker that dies sooner than this after starting is failing to boot, not crashing
+MIN_WORKER_UPTIME_SECONDS = 5
+
+def available_cpus() -> int:
+    """CPUs this process may run on, which a container limit can make fewer than the machine has"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(settings.SERVER_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(host: str, port: int, shared: Optional[socket.socket]):
+    """A worker process: one uvicorn server on its own SO_REUSEPORT socket, or on the shared one"""
+    sock = shared if shared is not None else bind_socket(host, port, reuse_port=True)
+    config = uvicorn.Config(
+        "main:app",
+        host=host,
+        port=port,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        lifespan="on",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        access_log=settings.SERVER_ACCESS_LOG,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+class Supervisor:
+    """Starts the workers, replaces any that crash, and stops them all gracefully.
+    
+    SIGTERM or SIGINT is passed on to every worker as SIGTERM: each stops
+    accepting connections, finishes its requests (checkouts in full) and flushes
+    write-behind carts, and is killed only if it outlives the graceful timeout.
+    """
+    def __init__(self, host: str, port: int, workers: int, reuse_port: bool):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        # Without SO_REUSEPORT the workers accept from one socket bound here
+        self.shared = None if reuse_port else bind_socket(host, port, reuse_port=False)
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: List[multiprocessing.Process] = []
+        self.started_at: List[float] = []
+        self.should_exit = False
+        self.exit_code = 0
+    
+    def spawn(self, index: int) -> multiprocessing.Process:
+        process = self.context.Process(
+            target=run_worker, args=(self.host, self.port, self.shared), name=f"shopswift-worker-{index}"
+        )
+        process.start()
+        return process
+    
+    def handle_exit(self, sig, frame):
+        self.should_exit = True
+    
+    def run(self) -> int:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.handle_exit)
+        for index in range(self.workers):
+            self.processes.append(self.spawn(index))
+            self.started_at.append(time.monotonic())
+    
+        while not self.should_exit:
+            time.sleep(0.5)
+            for index, process in enumerate(self.processes):
+                if process.is_alive() or self.should_exit:
+                    continue
+                if time.monotonic() - self.started_at[index] < MIN_WORKER_UPTIME_SECONDS:
+                    print(f"✗ {process.name} exited with {process.exitcode} while starting; stopping", file=sys.stderr)
+                    self.should_exit = True
+                    self.exit_code = 1
+                    break
+                print(f"✗ {process.name} exited with {process.exitcode}; restarting it", file=sys.stderr)
+                self.processes[index] = self.spawn(index)
+                self.started_at[index] = time.monotonic()
+    
+        self.stop()
+        return self.exit_code
+    
+    def stop(self):
+        for process in self.processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+        # Workers cancel what's left at the graceful timeout; allow for their lifespan shutdown too
+        deadline = time.monotonic() + settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS + 10
+        for process in self.processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                print(f"✗ {process.name} didn't stop in time; killing it", file=sys.stderr)
+                process.kill()
+                process.join()
+        if self.shared is not None:
+            self.shared.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API with one worker per CPU (settings: SERVER_*)")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS or available_cpus())
+    args = parser.parse_args()
+    
+    if args.workers > 1 and settings.CART_STORE_BACKEND == "memory":
+        sys.exit("CART_STORE_BACKEND=memory keeps carts in one process; use redis (or database) with several workers")
+    reuse_port = settings.SERVER_REUSE_PORT and hasattr(socket, "SO_REUSEPORT")
+    print(
+        f"Serving on http://{args.host}:{args.port} with {args.workers} workers "
+        f"({settings.SERVER_LOOP}/{settings.SERVER_HTTP}, {'SO_REUSEPORT' if reuse_port else 'shared socket'})"
+    )
+    sys.exit(Supervisor(args.host, args.port, args.workers, reuse_port).run())
\ No newline at end of file
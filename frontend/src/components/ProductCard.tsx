@@ -1,11 +1,21 @@
 import { Link } from 'react-router-dom';
 import { ShoppingCart, Star, Zap } from 'lucide-react';
 
+const API_ORIGIN = 'http://127.0.0.1:8000';
+
+interface ImageVariant {
+  url: string;
+  width: number;
+  height: number;
+}
+
 interface Product {
   id: number;
   name: string;
   price: number;
   image?: string;
+  image_variants?: Record<string, ImageVariant> | null;
+  image_srcset?: string | null;
   category?: {
     name: string;
   };
@@ -15,8 +25,13 @@ interface ProductCardProps {
   product: Product;
 }
 
+// The API serves image paths, so every srcset candidate needs its origin
+const withOrigin = (srcset: string) =>
+  srcset.split(', ').map((candidate) => `${API_ORIGIN}${candidate}`).join(', ');
+
 export default function ProductCard({ product }: ProductCardProps) {
-  console.log("product",product.image);
+  // Until the variants are rendered the card falls back to the original upload
+  const image = product.image_variants?.card?.url ?? product.image;
   
   return (
     <div className="group relative">
@@ -29,7 +44,11 @@ export default function ProductCard({ product }: ProductCardProps) {
           <div className="relative h-56 overflow-hidden">
           
             <img
-              src={`http://127.0.0.1:8000${product.image}` || 'https://via.placeholder.com/300'}
+              src={image ? `${API_ORIGIN}${image}` : 'https://via.placeholder.com/300'}
+              srcSet={product.image_srcset ? withOrigin(product.image_srcset) : undefined}
+              sizes="(min-width: 1024px) 25vw, (min-width: 768px) 50vw, 100vw"
+              loading="lazy"
+              decoding="async"
               alt={product.name}
               className="w-full h-full object-cover transform group-hover:scale-110 transition-transform duration-500"
             />
@@ -70,6 +70,9 @@ export const cartAPI = {
     api.post('/cart/items', data),
   updateItem: (itemId: number, data: { quantity: number }) =>
     api.put(`/cart/items/${itemId}`, data),
+  // Sets each line's quantity (0 removes it) and returns the updated cart
+  updateItems: (items: { product_id: number; quantity: number }[]) =>
+    api.patch('/cart/items', { items }),
   removeItem: (itemId: number) => api.delete(`/cart/items/${itemId}`),
   clear: () => api.delete('/cart'),
 };
\ No newline at end of file
@@ -17,10 +17,11 @@ export default function Cart() {
   });
 
   const updateItemMutation = useMutation({
-    mutationFn: ({ itemId, quantity }: { itemId: number; quantity: number }) =>
-      cartAPI.updateItem(itemId, { quantity }),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['cart'] });
+    mutationFn: ({ productId, quantity }: { productId: number; quantity: number }) =>
+      cartAPI.updateItems([{ product_id: productId, quantity }]),
+    onSuccess: (response) => {
+      // The PATCH returns the whole cart, so no refetch is needed
+      queryClient.setQueryData(['cart'], response);
     },
   });
 
@@ -90,7 +91,7 @@ export default function Cart() {
                     <button
                       onClick={() =>
                         updateItemMutation.mutate({
-                          itemId: item.id,
+                          productId: item.product.id,
                           quantity: Math.max(1, item.quantity - 1),
                         })
                       }
@@ -102,7 +103,7 @@ export default function Cart() {
                     <button
                       onClick={() =>
                         updateItemMutation.mutate({
-                          itemId: item.id,
+                          productId: item.product.id,
                           quantity: item.quantity + 1,
                         })
                       }